@@ -1,197 +1,3620 @@
-from owlready2 import *
-from rdflib import Graph
-from rdflib.namespace import NamespaceManager
-from requests.structures import CaseInsensitiveDict
 from shutil import copyfileobj
-from alive_progress import alive_bar
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+import subprocess
 import random
+import heapq
+import bisect
+import math
+import re
+import threading
+import time
+import hashlib
+import zlib
+import sqlite3
+import tempfile
+import gc
 import os
-import owlready2
-import requests
+import urllib.parse
 import json
+import sys
 import argparse
 
 OUTPUT_DIR = './analysis/'
+RANDOM_SEED = 357
+ANALYSIS_VERSION = "1"
+USE_CACHE = True
+CACHE_SETTINGS = {}
+QUADSTORE_DIR = None
+MAX_RSS = None
+WORKER_MAX_TASKS = 25
+REASONER = "hermit"
+REASONER_TIMEOUT = 600
+REASONER_MEMORY = 2000
+REASONER_JOBS = 1
+REASONER_SLOTS = None
+REASONING = True
+TELEMETRY = None
+PROFILE = 0
+OOPS_URL = "https://oops.linkeddata.es/rest"
+FOOPS_URL = "https://foops.linkeddata.es/assessOntology"
+FAIR_URL = "https://fair-checker.france-bioinformatique.fr/api/check/metrics_all"
+OOPS_ROUTE = "auto"
+OOPS_MAX_BYTES = None
+OOPS_GZIP = False
+IMPORT_MIRROR = None
+IMPORTS_OFFLINE = False
+CLIENT_SETTINGS = {}
+_client = None
+_cache = None
+_index = None
+_reasoner_pool = None
+_telemetry = None
+_catalog = None
+INDEX_FILE = "results_index.sqlite"
+MANIFEST_FILE = "manifest.sqlite"
+_initialized = False
+# owlready2, rdflib, requests and alive_progress are imported where they are used, so commands that only read
+# the results store do not pay for importing them
+SETTINGS = {"output_dir": "OUTPUT_DIR", "use_cache": "USE_CACHE", "cache_settings": "CACHE_SETTINGS",
+            "quadstore_dir": "QUADSTORE_DIR", "max_rss": "MAX_RSS", "reasoner": "REASONER",
+            "reasoner_timeout": "REASONER_TIMEOUT", "reasoner_memory": "REASONER_MEMORY", "reasoner_jobs": "REASONER_JOBS",
+            "reasoning": "REASONING", "telemetry": "TELEMETRY", "profile": "PROFILE", "oops_route": "OOPS_ROUTE",
+            "oops_max_bytes": "OOPS_MAX_BYTES", "oops_gzip": "OOPS_GZIP",
+            "import_mirror": "IMPORT_MIRROR", "imports_offline": "IMPORTS_OFFLINE"}
 
 def init():
     """
     Initializes owlready Java path, otnology path and random seed
     """
+    global _initialized
+    import owlready2
     owlready2.JAVA_EXE = "java"
-    onto_path.append("./")
-    random.seed(357)
+    if not _initialized:
+        owlready2.onto_path.append("./")
+    _initialized = True
+    random.seed(RANDOM_SEED)
 
 
-def get_random_classes_fair_foops(n, ontology_dir, fair_foops):
+def configure(**settings):
+    """Sets the analysis settings of this process, the remote services are set with configure_client.
+    A new output directory drops the results store and result cache of the former one
+
+    Args:
+        **settings: output_dir, use_cache, cache_settings, quadstore_dir, max_rss, reasoner, reasoner_timeout,
+            reasoner_memory, reasoner_jobs, reasoning, telemetry, profile, oops_route, oops_max_bytes, oops_gzip,
+            import_mirror and imports_offline, see the module globals of the same name
+
+    Raises:
+        TypeError: if a setting is unknown
+    """
+    global _cache, _index, _catalog
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise TypeError("Unknown settings: %s" % ", ".join(sorted(unknown)))
+    if "output_dir" in settings and settings["output_dir"] != OUTPUT_DIR:
+        for store in (_cache, _index):
+            if store is not None:
+                store.close()
+        _cache = None
+        _index = None
+    if "import_mirror" in settings or "imports_offline" in settings:
+        _catalog = None
+    for name, value in settings.items():
+        globals()[SETTINGS[name]] = value
+
+
+def init_worker(output_dir, client_settings, use_cache, cache_settings, quadstore_dir, reasoner_settings, reasoner_slots, telemetry_settings, oops_settings, import_settings):
+    """Initializes a worker process of the parallel directory analysis
+
+    Args:
+        output_dir (str): output directory of the main process
+        client_settings (dict): RemoteClient arguments of the worker
+        use_cache (bool): use the persistent result cache
+        cache_settings (dict): ResultCache arguments
+        quadstore_dir (str): directory of the on-disk owlready2 quadstores, None for in-memory worlds
+        reasoner_settings (tuple): reasoner, timeout in seconds, heap in MB and whether the reasoner is run
+        reasoner_slots (multiprocessing.BoundedSemaphore): limits the reasoners running in all workers
+        telemetry_settings (tuple): run log path and number of profiled ontologies of the main process
+        oops_settings (tuple): OOPS submission route, upload limit in bytes and whether uploads are compressed
+        import_settings (tuple): import mirror directory, None without a mirror, and whether imports are never fetched
+    """
+    global OUTPUT_DIR, USE_CACHE, CACHE_SETTINGS, QUADSTORE_DIR, REASONER, REASONER_TIMEOUT, REASONER_MEMORY, REASONING, REASONER_SLOTS, TELEMETRY, PROFILE, OOPS_ROUTE, OOPS_MAX_BYTES, OOPS_GZIP, IMPORT_MIRROR, IMPORTS_OFFLINE, _cache, _index, _reasoner_pool, _telemetry, _catalog
+    OUTPUT_DIR = output_dir
+    USE_CACHE = use_cache
+    CACHE_SETTINGS = cache_settings
+    QUADSTORE_DIR = quadstore_dir
+    REASONER, REASONER_TIMEOUT, REASONER_MEMORY, REASONING = reasoner_settings
+    REASONER_SLOTS = reasoner_slots
+    TELEMETRY, PROFILE = telemetry_settings
+    OOPS_ROUTE, OOPS_MAX_BYTES, OOPS_GZIP = oops_settings
+    IMPORT_MIRROR, IMPORTS_OFFLINE = import_settings
+    # connections and threads inherited from the main process must not be shared
+    _cache = None
+    _index = None
+    _reasoner_pool = None
+    _telemetry = None
+    # the main process built the catalog before starting the workers, they only read it
+    _catalog = ImportCatalog(IMPORT_MIRROR, IMPORTS_OFFLINE, update=False) if IMPORT_MIRROR else None
+    configure_client(**client_settings)
+    init()
+
+
+class OntologyContext:
+    """Per-ontology analysis context. Parses the ontology file once and hands the same in-memory
+    representation to every analysis stage. RDF/XML and N-Triples are loaded into owlready2 directly,
+    other formats are converted to N-Triples from the parsed rdflib graph, in the cache directory if a cache is used.
+    With an import mirror the imported ontologies are loaded from it before the ontology, see ImportCatalog.
+
+    Args:
+        ontology_dir (str): path to ontology file
+        world (owlready2.World): world the ontology is loaded into, owlready2.default_world if None
+        cache (ResultCache): persistent result cache, results are not cached if None
+        quadstore (str): path of the quadstore file of world, it is deleted on close
+        stream_sample (int): if given, namespaces, counts and this many sampled classes are taken from a
+            single streaming pass over the file instead of the rdflib graph and the owlready2 ontology
+    """
+
+    def __init__(self, ontology_dir, world=None, cache=None, quadstore=None, stream_sample=None):
+        self.ontology_dir = ontology_dir
+        self.world = world
+        self.cache = cache
+        self.quadstore = quadstore
+        self.stream_sample = stream_sample
+        self._summary = None
+        self.triples = None
+        self.consumed = {}
+        self.status = {}
+        self.imports = None
+        self._hash = None
+        self.parses = 0
+        self._graph = None
+        self._namespaces = None
+        self._namespaces_source = None
+        self._onto = None
+        self._onto_error = None
+
+    @property
+    def graph(self):
+        """rdflib graph of the ontology, parsed on first access"""
+        if self._graph is None:
+            from rdflib import Graph
+            g = Graph(bind_namespaces='none')
+            try:
+                g.parse(self.ontology_dir)
+            except Exception:
+                g.close()
+                raise
+            self.parses += 1
+            self.triples = len(g)
+            # serializing binds extra prefixes, so the namespaces of the file are kept right after parsing
+            if self._namespaces is None:
+                self._namespaces = list(g.namespace_manager.namespaces())
+                self._namespaces_source = "rdflib.Graph"
+            self._graph = g
+        return self._graph
+
+    @property
+    def namespaces(self):
+        """namespaces declared in the ontology file. A file owlready2 loads directly is not parsed with rdflib for
+        them, they are streamed from its namespace declarations"""
+        if self._namespaces is None:
+            if self._graph is None and self.direct_format() is not None:
+                self._namespaces = stream_namespaces(self.ontology_dir)
+                self._namespaces_source = "stream_namespaces"
+            else:
+                self.graph
+        return self._namespaces
+
+    @property
+    def onto(self):
+        """owlready2 ontology, loaded on first access. A failed load raises its error again on every access"""
+        if self._onto is None:
+            if self._onto_error is not None:
+                raise self._onto_error
+            try:
+                self._onto = self.load()
+                self.parses += 1
+            except Exception as e:
+                # owlready2 marks an ontology loaded before its imports, loading it again would return it without them
+                self._onto_error = e
+                raise
+        return self._onto
+
+    def load(self):
+        """Loads the ontology into the world from the file or from its N-Triples conversion, after its imports if an
+        import mirror is used
+
+        Returns:
+            owlready2.Ontology: the ontology
+        """
+        if self.world is None:
+            import owlready2
+            self.world = owlready2.default_world
+        catalog = get_catalog()
+        if catalog is not None:
+            imports = self.cached("imports")
+            if imports is None:
+                imports = stream_imports(self.ontology_dir)
+                self.store("imports", imports)
+            ontology_iri, imported = imports
+            self.imports = catalog.preload(self.world, imported, [ontology_iri] if ontology_iri else [])
+            self.consumed["imports"] = "ImportCatalog"
+        # loaded under the .owl name so entity names match the reports of converted ttl files
+        iri = "file://" + os.path.splitext(self.ontology_dir)[0] + ".owl"
+        format = self.direct_format()
+        if format is not None:
+            with open(self.ontology_dir, 'rb') as f:
+                return self.world.get_ontology(iri).load(fileobj=f, format=format)
+        nt, temporary = self.ntriples()
+        try:
+            with open(nt, 'rb') as f:
+                return self.world.get_ontology(iri).load(fileobj=f, format="ntriples")
+        finally:
+            if temporary:
+                os.remove(nt)
+
+    def direct_format(self):
+        """Returns the owlready2 format of a file that is loaded without conversion, "rdfxml" or "ntriples", None otherwise"""
+        if stream_format(self.ontology_dir) == "xml":
+            return "rdfxml"
+        if os.path.splitext(self.ontology_dir)[1] == ".nt":
+            return "ntriples"
+        return None
+
+    def ntriples(self):
+        """Converts the ontology to N-Triples. With a cache the conversion is kept in the cache directory under the
+        content hash of the file and reused, otherwise it is written to a temporary file
+
+        Returns:
+            tuple: path of the N-Triples file and whether it is temporary
+        """
+        if self.cache is None:
+            directory = os.path.dirname(self.quadstore) if self.quadstore is not None else None
+            with tempfile.NamedTemporaryFile(dir=directory, suffix=".nt", delete=False) as f:
+                self.graph.serialize(destination=f, format="nt", encoding="utf-8")
+            return f.name, True
+        nt = self.cache.conversion(self.content_hash)
+        if os.path.isfile(nt):
+            self.consumed["conversion"] = "cache"
+            return nt, False
+        os.makedirs(os.path.dirname(nt), exist_ok=True)
+        # written under a temporary name so other processes never load a partial conversion
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(nt), suffix=".tmp", delete=False) as f:
+            self.graph.serialize(destination=f, format="nt", encoding="utf-8")
+        os.replace(f.name, nt)
+        self.consumed["conversion"] = "rdflib.Graph"
+        return nt, False
+
+    def release_graph(self):
+        """Frees the rdflib graph once the owlready2 ontology is loaded from it"""
+        if self._graph is not None and self._onto is not None:
+            self._graph.close()
+            self._graph = None
+
+    @property
+    def content_hash(self):
+        """sha256 of the ontology file content"""
+        if self._hash is None:
+            self._hash = self.cache.file_hash(self.ontology_dir) if self.cache is not None else file_hash(self.ontology_dir)
+        return self._hash
+
+    def cached(self, stage):
+        """Returns the cached result of a stage for the current file content
+
+        Args:
+            stage (str): name of the analysis stage
+
+        Returns:
+            object: the cached result, None if there is none or no cache is used
+        """
+        if self.cache is None:
+            return None
+        value = self.cache.get(self.content_hash, stage)
+        if value is not None:
+            self.consumed[stage] = "cache"
+        return value
+
+    def store(self, stage, value):
+        """Caches the result of a stage for the current file content
+
+        Args:
+            stage (str): name of the analysis stage
+            value (object): json serializable result
+        """
+        if self.cache is not None:
+            self.cache.put(self.content_hash, stage, value)
+
+    def keep_output(self, ontpath):
+        """Checks if an existing report can be kept. Without a cache every non-empty report is kept,
+        with a cache reports are rewritten from the result for the current file content
+
+        Args:
+            ontpath (str): path of the report
+
+        Returns:
+            bool: True if the report is kept
+        """
+        return self.cache is None and os.path.isfile(ontpath) and os.path.getsize(ontpath) > 0
+
+    def use(self, stage, representation):
+        """Returns the shared representation and records that the given stage consumed it
+
+        Args:
+            stage (str): name of the analysis stage
+            representation (str): "graph", "namespaces" or "onto"
+
+        Returns:
+            object: the shared representation
+        """
+        value = getattr(self, representation)
+        self.consumed[stage] = {"graph": "rdflib.Graph", "namespaces": self._namespaces_source, "onto": "owlready2.Ontology"}[representation]
+        return value
+
+    def streamed(self, stage):
+        """Returns the stream_ontology summary of the file and records that the given stage consumed it. The class
+        hierarchy is collected only if the structure stage has no cached result
+
+        Args:
+            stage (str): name of the analysis stage
+
+        Returns:
+            dict: the summary, None if streaming is not used or the file could not be streamed,
+                the stage then falls back to the parsed representations
+        """
+        if self.stream_sample is None:
+            return None
+        if self._summary is None:
+            try:
+                hierarchy = self.cache is None or self.cache.get(self.content_hash, "structure") is None
+                self._summary = stream_ontology(self.ontology_dir, self.stream_sample, hierarchy=hierarchy)
+            except Exception as e:
+                record_error("stream_ontology", e)
+                self.stream_sample = None
+                return None
+            self.triples = self._summary["triples"]
+        self.consumed[stage] = "stream_ontology"
+        return self._summary
+
+    def finished(self, kind, error=None, status=None):
+        """Records that the stage of a report kind is done, or failed if error is given
+
+        Args:
+            kind (str): report kind, see report_kind
+            error (str): error message of a failed stage, or the reason a stage was skipped
+            status (str): "skipped" for a stage that was left out on purpose
+        """
+        self.status[kind] = {"status": status or ("failed" if error is not None else "done"), "error": error}
+
+    def report(self):
+        """Writes which shared representation each stage consumed, how often the file was parsed into an rdflib graph or
+        loaded into owlready2 and the imports loaded from the mirror to <ontname>_context.json"""
+        ontname, ontpath, path = name_path_ontpath(ontology_dir=self.ontology_dir, filename="_context.json")
+        os.makedirs(path, exist_ok=True)
+        with atomic_write(ontpath) as f:
+            json.dump({"ontology": self.ontology_dir, "parses": self.parses, "stages": self.consumed, "imports": self.imports}, f)
+
+    def close(self):
+        """Releases the shared representations, a world other than default_world is closed as well"""
+        if self._onto is not None:
+            self._onto.destroy()
+            self._onto = None
+        if self._graph is not None:
+            self._graph.close()
+            self._graph = None
+        if self.world is not None:
+            import owlready2
+            if self.world is not owlready2.default_world:
+                self.world.close()
+        if self.quadstore is not None:
+            for suffix in ("", "-journal", "-wal", "-shm"):
+                if os.path.exists(self.quadstore + suffix):
+                    os.remove(self.quadstore + suffix)
+
+
+_umask = None
+
+def file_umask():
+    """Returns the umask of this process, it is read once
+
+    Returns:
+        int: the umask
+    """
+    global _umask
+    if _umask is None:
+        try:
+            # reading the umask from /proc does not change it while other threads create files
+            with open("/proc/self/status") as f:
+                _umask = next(int(line.split()[1], 8) for line in f if line.startswith("Umask:"))
+        except (OSError, StopIteration):
+            _umask = os.umask(0o022)
+            os.umask(_umask)
+    return _umask
+
+@contextmanager
+def atomic_write(path, mode='w', **kwargs):
+    """Opens a temporary file next to path that replaces path when the with block finishes without error,
+    so an interrupted write never leaves a truncated report behind
+
+    Args:
+        path (str): path of the file
+        mode (str): "w" or "wb"
+        **kwargs: further arguments of open
+
+    Yields:
+        file: the temporary file
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with open(fd, mode, **kwargs) as f:
+            yield f
+        # mkstemp creates the file readable by its owner only, the file gets the mode open would give it
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp, 0o666 & ~file_umask())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def add_report(ctx, kind, ontpath, result=None):
+    """Adds a finished report to the results store and marks its stage as done
+
+    Args:
+        ctx (OntologyContext): analysis context of the ontology, or None
+        kind (str): report kind, see report_kind
+        ontpath (str): path of the report
+        result (object): result of the stage, read from the report if None
+    """
+    get_index().add(kind, ontpath, result)
+    if ctx is not None:
+        ctx.finished(kind)
+
+
+def file_hash(path):
+    """Computes the sha256 of a file
+
+    Args:
+        path (str): path to file
+
+    Returns:
+        str: hex digest
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Persistent sqlite cache of analysis results keyed by the content hash of the ontology file, ANALYSIS_VERSION
+    and the analysis stage. File hashes are remembered by path, size and modification time so unchanged files are not read again.
+    N-Triples conversions of ontology files are kept next to the cache file in ntriples/<hash>.nt.
+
+    Args:
+        path (str): path to the cache file
+        max_entries (int): maximum number of cached results, the least recently used ones are evicted first
+        max_age (float): days after which an unused result is evicted
+    """
+
+    def __init__(self, path, max_entries=200000, max_age=90):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conversions = os.path.join(os.path.dirname(path), "ntriples")
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS results (hash TEXT, version TEXT, stage TEXT, value TEXT, last_used REAL, PRIMARY KEY (hash, version, stage))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, hash TEXT)")
+
+    def file_hash(self, path):
+        """Returns the sha256 of a file, it is only computed if the file changed since it was last hashed
+
+        Args:
+            path (str): path to file
+
+        Returns:
+            str: hex digest
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self.lock:
+            row = self.conn.execute("SELECT hash FROM files WHERE path=? AND size=? AND mtime=?", (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+        if row:
+            return row[0]
+        digest = file_hash(path)
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def get(self, digest, stage):
+        """Returns a cached result
+
+        Args:
+            digest (str): content hash of the ontology file
+            stage (str): name of the analysis stage
+
+        Returns:
+            object: the cached result, None if there is none
+        """
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT value FROM results WHERE hash=? AND version=? AND stage=?", (digest, ANALYSIS_VERSION, stage)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE results SET last_used=? WHERE hash=? AND version=? AND stage=?", (time.time(), digest, ANALYSIS_VERSION, stage))
+        return json.loads(row[0])
+
+    def put(self, digest, stage, value):
+        """Caches a result
+
+        Args:
+            digest (str): content hash of the ontology file
+            stage (str): name of the analysis stage
+            value (object): json serializable result
+        """
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (digest, ANALYSIS_VERSION, stage, json.dumps(value), time.time()))
+
+    def conversion(self, digest):
+        """Returns the path of the N-Triples conversion of an ontology file, it may not exist yet
+
+        Args:
+            digest (str): content hash of the ontology file
+
+        Returns:
+            str: path of the conversion
+        """
+        return os.path.join(self.conversions, digest + ".nt")
+
+    def evict(self):
+        """Removes results of other analysis versions, results unused for longer than max_age and the least
+        recently used results above max_entries. Conversions of files without results are removed as well
+
+        Returns:
+            int: number of removed results
+        """
+        with self.lock, self.conn:
+            removed = self.conn.execute("DELETE FROM results WHERE version!=? OR last_used<?", (ANALYSIS_VERSION, time.time() - self.max_age * 86400)).rowcount
+            removed += self.conn.execute("DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+            self.conn.execute("DELETE FROM files WHERE hash NOT IN (SELECT hash FROM results)")
+            hashes = {row[0] for row in self.conn.execute("SELECT DISTINCT hash FROM results")}
+        if os.path.isdir(self.conversions):
+            for name in os.listdir(self.conversions):
+                if name.endswith(".nt") and name[:-3] not in hashes:
+                    os.remove(os.path.join(self.conversions, name))
+        return removed
+
+    def close(self):
+        """Closes the cache file"""
+        self.conn.close()
+
+
+def get_cache():
+    """Returns the ResultCache of this process in <output dir>/.cache, it is opened on first use
+
+    Returns:
+        ResultCache: the cache, None if no cache is used
+    """
+    global _cache
+    if not USE_CACHE:
+        return None
+    if _cache is None:
+        _cache = ResultCache(os.path.join(OUTPUT_DIR, ".cache", "results.sqlite"), **CACHE_SETTINGS)
+    return _cache
+
+
+class ImportCatalog:
+    """Local mirror of the ontologies imported by a corpus, so every imported ontology is fetched and parsed once
+    instead of once per importing ontology. Each imported ontology is converted to N-Triples in <dir>/ntriples and
+    listed in <dir>/catalog.json with the ontologies it imports in turn. Imports are taken from ontology files put
+    into the mirror directory, the iri mappings of catalog-v001.xml files (as written by Protégé) and the ontologies
+    of the corpus before they are fetched from the network. The analyses only read the mirror, it is shared by
+    all worker processes.
+
+    Args:
+        dir (str): mirror directory
+        offline (bool): never fetch an import from the network, imports missing in the mirror are loaded empty
+        update (bool): imports missing in the mirror are added to it when preloaded, False in worker processes
+    """
+
+    CATALOG = "catalog.json"
+    XML_CATALOG = "catalog-v001.xml"
+    ACCEPT = "application/rdf+xml, text/turtle;q=0.9, application/n-triples;q=0.8, */*;q=0.1"
+    FORMATS = {"application/rdf+xml": "xml", "application/xml": "xml", "text/xml": "xml", "text/turtle": "turtle",
+               "application/x-turtle": "turtle", "application/n-triples": "nt", "text/n3": "n3", "application/ld+json": "json-ld"}
+
+    def __init__(self, dir, offline=False, update=True):
+        self.dir = dir
+        self.offline = offline
+        self.update = update
+        self.entries = self.read()
+        # local file by ontology iri, the mirror directory is only scanned once an import has to be added
+        self.local = None
+        # iris fetched by this catalog, failed ones are not tried again
+        self.tried = set()
+
+    @staticmethod
+    def key(iri):
+        """Ontology iri without a trailing #, owl:imports and owlready2 differ in it"""
+        return iri[:-1] if iri.endswith("#") else iri
+
+    def read(self):
+        """Reads catalog.json
+
+        Returns:
+            dict: catalog entry by ontology iri
+        """
+        path = os.path.join(self.dir, self.CATALOG)
+        if not os.path.isfile(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)["ontologies"]
+
+    def save(self):
+        """Writes catalog.json, entries added by another process in the meantime are kept"""
+        os.makedirs(self.dir, exist_ok=True)
+        entries = self.read()
+        entries.update(self.entries)
+        self.entries = entries
+        with atomic_write(os.path.join(self.dir, self.CATALOG)) as f:
+            json.dump({"ontologies": entries}, f, indent=1, sort_keys=True)
+
+    def register(self, path, cache=None):
+        """Makes an ontology file the local source of its ontology iri
+
+        Args:
+            path (str): path to ontology file
+            cache (ResultCache): the imports of the file are taken from and kept in this cache if given
+
+        Returns:
+            list: iris imported by the ontology
+        """
+        digest = cache.file_hash(path) if cache is not None else None
+        value = cache.get(digest, "imports") if cache is not None else None
+        if value is None:
+            value = stream_imports(path)
+            if cache is not None:
+                cache.put(digest, "imports", value)
+        iri, imports = value
+        if iri is not None:
+            self.sources().setdefault(self.key(iri), os.path.abspath(path))
+        return imports
+
+    def sources(self):
+        """Returns the local file by ontology iri, the mirror directory is registered on first use"""
+        if self.local is None:
+            self.local = {}
+            self.register_dir(self.dir)
+        return self.local
+
+    def register_dir(self, dir):
+        """Registers the ontology files of a directory and the mappings of its catalog-v001.xml, the N-Triples of the
+        mirror are left out
+
+        Args:
+            dir (str): directory
+        """
+        if not os.path.isdir(dir):
+            return
+        catalog = os.path.join(dir, self.XML_CATALOG)
+        if os.path.isfile(catalog):
+            self.register_xml_catalog(catalog)
+        conversions = os.path.join(os.path.abspath(self.dir), "ntriples")
+        for path in get_ont_files(dir):
+            if not os.path.abspath(path).startswith(conversions + os.sep):
+                try:
+                    self.register(path)
+                except Exception as e:
+                    record_error("imports", e)
+
+    def register_xml_catalog(self, path):
+        """Registers the local files of the uri mappings of an OASIS XML catalog
+
+        Args:
+            path (str): path to catalog-v001.xml
+        """
+        from xml.etree.ElementTree import parse
+        base = "file://" + os.path.abspath(path)
+        for elem in parse(path).iter():
+            if elem.tag.rsplit("}", 1)[-1] == "uri" and elem.get("name") and elem.get("uri"):
+                target = resolve_iri(base, elem.get("uri"))
+                if target.startswith("file://"):
+                    target = urllib.parse.unquote(target[len("file://"):])
+                    if os.path.isfile(target):
+                        self.sources().setdefault(self.key(elem.get("name")), target)
+
+    def entry(self, iri):
+        """Returns the catalog entry of an ontology iri
+
+        Args:
+            iri (str): ontology iri
+
+        Returns:
+            dict: file of the N-Triples relative to the mirror (None if the ontology could not be mirrored), source,
+                imported iris, number of triples and error, None if the iri is not in the catalog
+        """
+        return self.entries.get(self.key(iri))
+
+    def fetch(self, iri):
+        """Fetches and parses one ontology and writes it as N-Triples into the mirror
+
+        Args:
+            iri (str): ontology iri
+
+        Returns:
+            dict: catalog entry
+        """
+        from rdflib import Graph
+        from rdflib.namespace import OWL
+        key = self.key(iri)
+        source = self.sources().get(key)
+        entry = {"file": None, "source": source or iri, "imports": [], "triples": 0, "error": None}
+        g = Graph(bind_namespaces='none')
+        try:
+            if source is not None:
+                g.parse(source, publicID=key)
+            elif self.offline:
+                entry["error"] = "not in the mirror and offline"
+                return entry
+            else:
+                client = get_client()
+                with client.session.get(key, headers={"Accept": self.ACCEPT}, timeout=client.timeout) as reply:
+                    reply.raise_for_status()
+                    format = self.FORMATS.get(reply.headers.get("Content-Type", "").split(";")[0].strip())
+                    if format is None:
+                        from rdflib.util import guess_format
+                        format = guess_format(urllib.parse.urlparse(reply.url).path) or ("xml" if reply.content.lstrip().startswith(b"<") else "turtle")
+                    g.parse(data=reply.content, format=format, publicID=key)
+            name = os.path.join("ntriples", hashlib.sha256(key.encode("utf-8")).hexdigest() + ".nt")
+            os.makedirs(os.path.join(self.dir, "ntriples"), exist_ok=True)
+            with atomic_write(os.path.join(self.dir, name), 'wb') as f:
+                g.serialize(destination=f, format="nt", encoding="utf-8")
+            entry.update(file=name, triples=len(g), imports=sorted({str(o) for o in g.objects(None, OWL.imports)}))
+        except Exception as e:
+            record_error("imports", e)
+            entry["error"] = str(e)
+        finally:
+            g.close()
+        return entry
+
+    def build(self, iris):
+        """Adds the import closure of iris to the mirror, ontologies already in it are not fetched again.
+        Ontologies that could not be fetched before are tried once more unless offline
+
+        Args:
+            iris (list): imported iris
+
+        Returns:
+            int: number of ontologies added to the mirror
+        """
+        added = fetched = 0
+        todo = list(iris)
+        seen = set()
+        while todo:
+            key = self.key(todo.pop())
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = self.entries.get(key)
+            if entry is None or (entry["file"] is None and not self.offline and key not in self.tried) or \
+                    (entry["file"] is not None and not os.path.isfile(os.path.join(self.dir, entry["file"]))):
+                self.tried.add(key)
+                entry = self.entries[key] = self.fetch(key)
+                fetched += 1
+                added += entry["file"] is not None
+            todo.extend(entry["imports"])
+        if fetched:
+            self.save()
+        return added
+
+    def build_corpus(self, onts, cache=None):
+        """Registers the ontologies of a corpus as local sources and adds everything they import to the mirror
+
+        Args:
+            onts (list): paths to the ontology files of the corpus
+            cache (ResultCache): result cache the imports of the files are kept in, see register
+
+        Returns:
+            dict: number of imported ontologies, how many of them were added and which are missing
+        """
+        imports = set()
+        for path in onts:
+            try:
+                imports.update(self.register(path, cache))
+            except Exception as e:
+                record_error("imports", e)
+        added = self.build(sorted(imports))
+        closure = self.closure(sorted(imports))
+        return {"imports": len(closure), "added": added, "missing": [iri for iri, path in closure if path is None]}
+
+    def closure(self, iris, exclude=()):
+        """Orders the import closure of iris so every ontology comes after the ontologies it imports
+
+        Args:
+            iris (list): imported iris
+            exclude (tuple): iris left out with their imports, the importing ontology in case of cyclic imports
+
+        Returns:
+            list: (iri, path of the N-Triples or None if the ontology is not mirrored) pairs
+        """
+        order = []
+        seen = {self.key(iri) for iri in exclude}
+
+        def visit(iri):
+            key = self.key(iri)
+            if key in seen:
+                return
+            seen.add(key)
+            entry = self.entries.get(key)
+            for imported in (entry["imports"] if entry else []):
+                visit(imported)
+            order.append((iri, os.path.join(self.dir, entry["file"]) if entry and entry["file"] else None))
+
+        for iri in iris:
+            visit(iri)
+        return order
+
+    def preload(self, world, iris, exclude=()):
+        """Loads the import closure of iris from the mirror into a world before the importing ontology is loaded,
+        owlready2 then finds the imports loaded instead of fetching them. Imports missing in the mirror are added
+        to it first if the catalog is updated, offline they are loaded empty, otherwise owlready2 fetches them
+
+        Args:
+            world (owlready2.World): world of the importing ontology
+            iris (list): iris imported by the ontology
+            exclude (tuple): iris not to load, see closure
+
+        Returns:
+            dict: number of ontologies loaded from the mirror and the iris of the missing ones
+        """
+        if self.update:
+            self.build(iris)
+        closure = self.closure(iris, exclude)
+        missing = [iri for iri, path in closure if path is None]
+        if self.offline:
+            for iri in missing:
+                world.get_ontology(iri).loaded = True
+        for iri, path in closure:
+            onto = world.get_ontology(iri)
+            if path is not None and not onto.loaded:
+                with open(path, 'rb') as f:
+                    onto.load(fileobj=f, format="ntriples")
+        return {"mirror": len(closure) - len(missing), "missing": missing}
+
+
+def get_catalog():
+    """Returns the ImportCatalog of IMPORT_MIRROR, it is opened on first use
+
+    Returns:
+        ImportCatalog: the catalog, None if no import mirror is used
+    """
+    global _catalog
+    if IMPORT_MIRROR is None:
+        return None
+    if _catalog is None:
+        _catalog = ImportCatalog(IMPORT_MIRROR, IMPORTS_OFFLINE)
+    return _catalog
+
+
+def report_kind(filepath):
+    """Classifies a report file of an ontology by its name
+
+    Args:
+        filepath (str): path to report file
+
+    Returns:
+        str: "classes", "structure", "used_onts", "oops", "foops", "fair" or "reasoner", None if it is no indexed report
+    """
+    name, ext = os.path.splitext(os.path.basename(filepath))
+    # the aggregations, and the <ontology>Sum_OOPS_Pitfalls.txt older versions wrote next to every OOPS report
+    if name.startswith("Sum_") or name.endswith("Sum_OOPS_Pitfalls") or name in [default for _, default, _ in AGGREGATIONS.values()]:
+        return None
+    if ext == '.json':
+        if "_FOOPS" in name:
+            return "foops"
+        if "Fair_Checker" in name:
+            return "fair"
+        if name.endswith("_reasoner"):
+            return "reasoner"
+        if name.endswith("_structure"):
+            return "structure"
+    elif ext == '.txt':
+        if "_OOPS" in name:
+            return "oops"
+        if "_used_Ontologies" in name:
+            return "used_onts"
+        with open(filepath, "r") as f:
+            if f.readline().startswith("Classes:"):
+                return "classes"
+    return None
+
+def read_report(kind, filepath):
+    """Reads a report file back into the result its stage wrote, for reports that are indexed after the fact
+
+    Args:
+        kind (str): report kind, see report_kind
+        filepath (str): path to report file
+
+    Returns:
+        object: the result in the form ResultsIndex.add takes it
+    """
+    with open(filepath, "r", encoding='utf-8', errors='replace') as f:
+        if kind == "classes":
+            keys = ["classes", "annotation_properties", "data_properties", "object_properties", "properties"]
+            report = {key: int(f.readline().split(':')[1]) for key in keys}
+            lines = f.read().split('\n')
+            report["sample"] = [[lines[i], lines[i + 1] if i + 1 < len(lines) else ""] for i in range(0, len(lines) - 1, 2)]
+            report["base_iri"] = None
+            return report
+        if kind == "used_onts":
+            f.readline()
+            return [line.rstrip('\n').split(": ", 1) for line in f if ": " in line]
+        if kind == "oops":
+            return f.read()
+        return json.load(f)
+
+
+def oops_pitfalls(report):
+    """Extracts the pitfalls from an OOPS report
+
+    Args:
+        report (str): OOPS response in RDF/XML
+
+    Returns:
+        list: (code, name, importance, affected elements) of every pitfall
+    """
+    from xml.etree.ElementTree import fromstring, ParseError
+
+    def local(tag):
+        return tag.rsplit("}", 1)[-1]
+
+    pitfalls = []
+    try:
+        root = fromstring(report.encode('utf-8'))
+    except ParseError:
+        root = None
+    for element in root.iter() if root is not None else ():
+        # a pitfall is any node with an importance level, whether written as oops:Pitfall or rdf:Description
+        fields = {local(child.tag): (child.text or "").strip() for child in element}
+        if "hasImportanceLevel" in fields:
+            affected = fields.get("hasNumberAffectedElements")
+            pitfalls.append((fields.get("hasCode"), fields.get("hasName"), fields["hasImportanceLevel"],
+                             int(affected) if affected and affected.isdigit() else None))
+    if not pitfalls:
+        # no pitfalls in RDF/XML, e.g. an error page or another format, the importance lines are counted as before
+        pitfalls = [(None, None, "Minor" if "Minor" in line else "Important", None) for line in report.splitlines()
+                    if "Importance" in line and ("Minor" in line or "Important" in line)]
+    return pitfalls
+
+
+class ResultsIndex:
+    """Sqlite results store of an output directory with typed tables for the sizes, class structure, namespaces, sampled classes,
+    OOPS pitfalls, FOOPS and FAIR scores and reasoner outcomes of the ontologies. Every stage adds its result when
+    it is finished, so the aggregations are queries instead of rescans of the output directory. Every row belongs to
+    the report file it was written to, which is how results are replaced and selected by directory.
+    Inside batch() the results are written in one transaction. Reports are keyed by their path relative to the
+    directory of the store, so an output directory that is moved or copied keeps its index.
+
+    Args:
+        path (str): path to the store file
+    """
+
+    SCHEMA_VERSION = 4
+    TABLES = {
+        "sizes": "report TEXT PRIMARY KEY, ontology TEXT, base_iri TEXT, classes INTEGER, annotation_properties INTEGER, "
+                 "data_properties INTEGER, object_properties INTEGER, properties INTEGER",
+        "sampled_classes": "report TEXT, ontology TEXT, position INTEGER, class TEXT, comment TEXT",
+        "class_structure": "report TEXT PRIMARY KEY, ontology TEXT, classes INTEGER, subclass_edges INTEGER, roots INTEGER, "
+                           "leaves INTEGER, orphans INTEGER, unreachable INTEGER, multiple_inheritance INTEGER, max_depth INTEGER, "
+                           "mean_depth REAL, max_fan_out INTEGER, mean_fan_out REAL, max_fan_in INTEGER, mean_fan_in REAL, "
+                           "label_coverage REAL, comment_coverage REAL",
+        "class_depths": "report TEXT, ontology TEXT, depth INTEGER, classes INTEGER",
+        "namespaces": "report TEXT, ontology TEXT, position INTEGER, prefix TEXT, iri TEXT",
+        "oops_pitfalls": "report TEXT, ontology TEXT, code TEXT, name TEXT, importance TEXT, affected INTEGER",
+        "foops_scores": "report TEXT PRIMARY KEY, ontology TEXT, ontology_uri TEXT, overall_score REAL",
+        "fair_scores": "report TEXT PRIMARY KEY, ontology TEXT, f REAL, a REAL, i REAL, r REAL",
+        "fair_metrics": "report TEXT, ontology TEXT, metric TEXT, score INTEGER",
+        "reasoner_outcomes": "report TEXT PRIMARY KEY, ontology TEXT, reasoner TEXT, status TEXT, seconds REAL, error TEXT",
+    }
+    KIND_TABLES = {"classes": ["sizes", "sampled_classes"], "structure": ["class_structure", "class_depths"], "used_onts": ["namespaces"],
+                   "oops": ["oops_pitfalls"], "foops": ["foops_scores"], "fair": ["fair_scores", "fair_metrics"], "reasoner": ["reasoner_outcomes"]}
+    SUFFIXES = {"classes": ".txt", "structure": "_structure.json", "used_onts": "_used_Ontologies.txt", "oops": "_OOPS.txt",
+                "foops": "_FOOPS.json", "fair": "_Fair_Checker.json", "reasoner": "_reasoner.json"}
+    STRUCTURE_COLUMNS = ["classes", "subclass_edges", "roots", "leaves", "orphans", "unreachable", "multiple_inheritance", "max_depth",
+                         "mean_depth", "max_fan_out", "mean_fan_out", "max_fan_in", "mean_fan_in", "label_coverage", "comment_coverage"]
+
+    def __init__(self, path):
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.lock = threading.RLock()
+        self.pending = None
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        tables = [table for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        outdated = bool(tables) and version != self.SCHEMA_VERSION
+        with self.conn:
+            if outdated:
+                # stores of older versions are rebuilt from the reports
+                for table in tables:
+                    self.conn.execute("DROP TABLE %s" % table)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS reports (path TEXT PRIMARY KEY, kind TEXT)")
+            for table, columns in self.TABLES.items():
+                self.conn.execute("CREATE TABLE IF NOT EXISTS %s (%s)" % (table, columns))
+                self.conn.execute("CREATE INDEX IF NOT EXISTS %s_report ON %s (report)" % (table, table))
+            self.conn.execute("PRAGMA user_version=%d" % self.SCHEMA_VERSION)
+        if outdated:
+            self.rebuild()
+
+    @classmethod
+    def rows(cls, kind, filepath, result):
+        """Turns the result of a stage into the rows of its tables
+
+        Args:
+            kind (str): report kind, see report_kind
+            filepath (str): path to report file
+            result (object): result of the stage, see read_report
+
+        Returns:
+            dict: rows by table
+        """
+        name = os.path.basename(filepath)
+        ontology = name[:-len(cls.SUFFIXES[kind])] if name.endswith(cls.SUFFIXES[kind]) else name
+        if kind == "classes":
+            return {"sizes": [(filepath, ontology, result.get("base_iri"), result["classes"], result["annotation_properties"],
+                               result["data_properties"], result["object_properties"], result["properties"])],
+                    "sampled_classes": [(filepath, ontology, i, cl, comment) for i, (cl, comment) in enumerate(result["sample"])]}
+        if kind == "structure":
+            return {"class_structure": [(filepath, ontology) + tuple(result[column] for column in cls.STRUCTURE_COLUMNS)],
+                    "class_depths": [(filepath, ontology, depth, classes) for depth, classes in enumerate(result["depth_distribution"])]}
+        if kind == "used_onts":
+            return {"namespaces": [(filepath, ontology, i, prefix, str(iri)) for i, (prefix, iri) in enumerate(result)]}
+        if kind == "oops":
+            return {"oops_pitfalls": [(filepath, ontology) + pitfall for pitfall in oops_pitfalls(result)]}
+        if kind == "foops":
+            return {"foops_scores": [(filepath, ontology, result.get("ontology_URI"), result["overall_score"])]}
+        if kind == "fair":
+            mean = result[0]["mean"]
+            return {"fair_scores": [(filepath, ontology, mean["F"], mean["A"], mean["I"], mean["R"])],
+                    "fair_metrics": [(filepath, ontology, str(metric["metric"]), int(metric["score"])) for metric in result[1:]]}
+        return {"reasoner_outcomes": [(filepath, ontology, result.get("reasoner"), result["status"], result.get("seconds"), result.get("error"))]}
+
+    def add(self, kind, filepath, result=None):
+        """Adds or replaces the result of a report
+
+        Args:
+            kind (str): report kind, see report_kind
+            filepath (str): path to report file
+            result (object): result of the stage, read from the report file if None
+        """
+        if result is None:
+            result = read_report(kind, filepath)
+        filepath = self.key(filepath)
+        rows = self.rows(kind, filepath, result)
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((kind, filepath, rows))
+                return
+            with self.conn:
+                self.write(kind, filepath, rows)
+
+    def key(self, filepath):
+        """Returns the path of a report relative to the store directory, the report column of its rows"""
+        return os.path.relpath(os.path.abspath(filepath), self.root)
+
+    def remove(self, kind, filepath):
+        """Removes the rows of a report
+
+        Args:
+            kind (str): report kind, see report_kind
+            filepath (str): path to report file
+        """
+        filepath = self.key(filepath)
+        with self.lock:
+            self.flush()
+            with self.conn:
+                self.conn.execute("DELETE FROM reports WHERE path=?", (filepath,))
+                for table in self.KIND_TABLES[kind]:
+                    self.conn.execute("DELETE FROM %s WHERE report=?" % table, (filepath,))
+
+    def write(self, kind, filepath, rows):
+        """Replaces the rows of a report, the caller holds the lock and the transaction"""
+        self.conn.execute("INSERT OR REPLACE INTO reports VALUES (?, ?)", (filepath, kind))
+        for table in self.KIND_TABLES[kind]:
+            self.conn.execute("DELETE FROM %s WHERE report=?" % table, (filepath,))
+            if rows.get(table):
+                self.conn.executemany("INSERT INTO %s VALUES (%s)" % (table, ", ".join("?" * len(rows[table][0]))), rows[table])
+
+    def flush(self):
+        """Writes the results collected by batch so far in one transaction"""
+        with self.lock:
+            if self.pending:
+                with self.conn:
+                    for kind, filepath, rows in self.pending:
+                        self.write(kind, filepath, rows)
+                self.pending.clear()
+
+    @contextmanager
+    def batch(self):
+        """Collects the results added inside the with block and writes them in one transaction at its end"""
+        with self.lock:
+            nested = self.pending is not None
+            if not nested:
+                self.pending = []
+        try:
+            yield self
+        finally:
+            if not nested:
+                with self.lock:
+                    self.flush()
+                    self.pending = None
+
+    def select(self, sql, dir, *params):
+        """Runs a query on the results of the reports in a directory
+
+        Args:
+            sql (str): query, its parameter ?1 is the directory prefix to select the report column with, as the range
+                report >= ?1 AND report < ?1 || x'ff' that can be searched in the report index
+            dir (str): directory of the reports
+            *params: further query parameters
+
+        Returns:
+            list: result rows
+        """
+        prefix = self.key(dir)
+        prefix = "" if prefix == os.curdir else os.path.join(prefix, '')
+        with self.lock:
+            # results of an open batch are written first so the query sees them
+            self.flush()
+            return self.conn.execute(sql, (prefix,) + params).fetchall()
+
+    def rebuild(self, jobs=1, chunk=5000):
+        """Indexes every report in the subdirectories of the index directory. The directory is walked once, the
+        reports of all kinds are parsed in jobs worker processes and their rows are merged by table and written
+        chunk reports at a time in one transaction
+
+        Args:
+            jobs (int): number of worker processes, the reports are parsed in this process if 1
+            chunk (int): number of reports whose rows are merged before they are written
+
+        Returns:
+            int: number of indexed reports
+        """
+        reports = []
+        for dp, dn, filenames in os.walk(self.root):
+            if os.path.samefile(dp, self.root):
+                continue
+            for f in filenames:
+                kind = report_kind(os.path.join(dp, f))
+                if kind:
+                    reports.append((kind, os.path.join(dp, f), self.key(os.path.join(dp, f))))
+        if jobs > 1 and len(reports) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=jobs)
+            parsed = executor.map(index_rows, reports, chunksize=max(1, min(256, len(reports) // (jobs * 4))))
+        else:
+            executor = None
+            parsed = map(index_rows, reports)
+        try:
+            with self.lock, self.conn:
+                self.flush()
+                self.conn.execute("DELETE FROM reports")
+                for table in self.TABLES:
+                    self.conn.execute("DELETE FROM %s" % table)
+                done = False
+                while not done:
+                    paths = []
+                    merged = {table: [] for table in self.TABLES}
+                    for kind, filepath, rows in parsed:
+                        paths.append((filepath, kind))
+                        for table, table_rows in rows.items():
+                            merged[table].extend(table_rows)
+                        if len(paths) == chunk:
+                            break
+                    else:
+                        done = True
+                    self.conn.executemany("INSERT OR REPLACE INTO reports VALUES (?, ?)", paths)
+                    for table, table_rows in merged.items():
+                        if table_rows:
+                            self.conn.executemany("INSERT INTO %s VALUES (%s)" % (table, ", ".join("?" * len(table_rows[0]))), table_rows)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return len(reports)
+
+    def export(self, dir, format="csv"):
+        """Exports every table to dir as <table>.csv, or as <table>.parquet which needs pyarrow
+
+        Args:
+            dir (str): export directory
+            format (str): "csv" or "parquet"
+
+        Returns:
+            list: paths of the exported files
+        """
+        os.makedirs(dir, exist_ok=True)
+        paths = []
+        for table in self.TABLES:
+            with self.lock:
+                cursor = self.conn.execute("SELECT * FROM %s ORDER BY report" % table)
+                columns = [column[0] for column in cursor.description]
+                rows = cursor.fetchall()
+            path = os.path.join(dir, table + "." + format)
+            if format == "parquet":
+                import pyarrow
+                import pyarrow.parquet
+                pyarrow.parquet.write_table(pyarrow.table({c: [row[i] for row in rows] for i, c in enumerate(columns)}), path)
+            else:
+                import csv
+                with open(path, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    writer.writerows(rows)
+            paths.append(path)
+        return paths
+
+    def close(self):
+        """Closes the store file"""
+        self.conn.close()
+
+
+def index_rows(report):
+    """Reads a report file into the rows of the results store, the map step of ResultsIndex.rebuild
+
+    Args:
+        report (tuple): report kind, path to the report file and its key in the store, see ResultsIndex.key
+
+    Returns:
+        tuple: kind, key and rows by table in the form ResultsIndex.write takes them
+    """
+    kind, filepath, key = report
+    return kind, key, ResultsIndex.rows(kind, key, read_report(kind, filepath))
+
+def open_index(dir, jobs=1):
+    """Opens the results index of a directory. The index is searched in the directory and its parents, if there is
+    none it is built in the directory from the reports on disk
+
+    Args:
+        dir (str): directory of the reports
+        jobs (int): number of worker processes parsing the reports if the index is built
+
+    Returns:
+        ResultsIndex: the index
+    """
+    current = os.path.abspath(dir)
+    while True:
+        if os.path.isfile(os.path.join(current, INDEX_FILE)):
+            if _index is not None and _index.root == current:
+                return _index
+            return ResultsIndex(os.path.join(current, INDEX_FILE))
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    index = ResultsIndex(os.path.join(dir, INDEX_FILE))
+    index.rebuild(jobs)
+    return index
+
+def get_index():
+    """Returns the ResultsIndex of the output directory for this process, it is opened on first use
+
+    Returns:
+        ResultsIndex: the index
+    """
+    global _index
+    if _index is None:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        _index = ResultsIndex(os.path.join(OUTPUT_DIR, INDEX_FILE))
+    return _index
+
+
+def new_context(ontology_dir, stream_sample=None):
+    """Creates the analysis context of an ontology with its own owlready2 world. The world is kept in memory,
+    or in a quadstore file in QUADSTORE_DIR in memory-bounded mode
+
+    Args:
+        ontology_dir (str): path to ontology file
+        stream_sample (int): number of classes sampled by the streaming extractor, it is not used if None
+
+    Returns:
+        OntologyContext: the context
+    """
+    if QUADSTORE_DIR is None:
+        from owlready2 import World
+        return OntologyContext(ontology_dir, World(), get_cache(), stream_sample=stream_sample)
+    os.makedirs(QUADSTORE_DIR, exist_ok=True)
+    fd, quadstore = tempfile.mkstemp(dir=QUADSTORE_DIR, suffix=".sqlite3")
+    os.close(fd)
+    os.remove(quadstore)
+    from owlready2 import World
+    return OntologyContext(ontology_dir, World(filename=quadstore), get_cache(), quadstore, stream_sample)
+
+def current_rss():
+    """Resident set size of this process and all its child processes, uses psutil if it is installed
+
+    Returns:
+        float: rss in MB
+    """
+    try:
+        import psutil
+        p = psutil.Process()
+        return sum(q.memory_info().rss for q in [p] + p.children(recursive=True)) / 2**20
+    except ImportError:
+        pass
+    if not os.path.isdir("/proc"):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = {}
+    for pid in os.listdir("/proc"):
+        if pid.isdigit():
+            try:
+                with open("/proc/%s/stat" % pid) as f:
+                    ppid = f.read().rsplit(")", 1)[1].split()[1]
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(pid)
+    rss = 0
+    todo = [str(os.getpid())]
+    while todo:
+        pid = todo.pop()
+        todo.extend(children.get(pid, []))
+        try:
+            with open("/proc/%s/statm" % pid) as f:
+                rss += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            pass
+    return rss / 2**20
+
+
+class OrderedResultWriter:
+    """Writes analysis results as json lines in the order of the ontology files, no matter in which order they finish
+
+    Args:
+        f (file): opened results file
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.next = 0
+        self.pending = {}
+
+    def add(self, index, result):
+        """Adds the result of the ontology at position index and writes every result that is next in order
+
+        Args:
+            index (int): position of the ontology in the file list
+            result (dict): analysis result
+        """
+        self.pending[index] = result
+        while self.next in self.pending:
+            self.f.write(json.dumps(self.pending.pop(self.next)) + '\n')
+            self.f.flush()
+            self.next += 1
+
+
+class JobManifest:
+    """Sqlite manifest of the directory analyses of an output directory. An ontology is marked as running when it
+    is started and gets the status of each of its stages when it is finished, so ontologies that failed or were
+    interrupted by a crash can be found and analyzed again. Ontologies are identified by path, size and mtime, and
+    an analysis only counts as finished for the stages and settings it was started with, see settings.
+
+    Args:
+        path (str): path to the manifest file
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS ontologies (ontology TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+                              "status TEXT, result TEXT, updated REAL, settings TEXT)")
+            if "settings" not in [column[1] for column in self.conn.execute("PRAGMA table_info(ontologies)")]:
+                # analyses recorded by older versions have no settings and are not finished for any
+                self.conn.execute("ALTER TABLE ontologies ADD COLUMN settings TEXT")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS stages (ontology TEXT, stage TEXT, status TEXT, error TEXT, "
+                              "updated REAL, PRIMARY KEY (ontology, stage))")
+
+    @staticmethod
+    def signature(ontology_dir):
+        """Returns the size and mtime in nanoseconds of an ontology file"""
+        stat = os.stat(ontology_dir)
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def settings():
+        """Returns the stages analyze_ontology runs and the settings their results depend on as json"""
+        return json.dumps({"stages": analysis_stages(), "analysis_version": ANALYSIS_VERSION, "random_seed": RANDOM_SEED,
+                           "reasoner": [REASONER, REASONER_TIMEOUT, REASONER_MEMORY] if REASONING else None,
+                           "oops_route": OOPS_ROUTE, "import_mirror": IMPORT_MIRROR is not None, "imports_offline": IMPORTS_OFFLINE},
+                          sort_keys=True)
+
+    def start(self, ontology_dir):
+        """Marks an ontology as running and forgets the status of its stages
+
+        Args:
+            ontology_dir (str): path to ontology file
+        """
+        ontology = os.path.abspath(ontology_dir)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO ontologies VALUES (?, ?, ?, 'running', NULL, ?, ?)",
+                              (ontology,) + self.signature(ontology_dir) + (time.time(), self.settings()))
+            self.conn.execute("DELETE FROM stages WHERE ontology=?", (ontology,))
+
+    def finish(self, result):
+        """Records the result of an ontology and the status of its stages. The ontology failed if the analysis
+        or any of its stages failed
+
+        Args:
+            result (dict): result of analyze_ontology
+
+        Returns:
+            str: "done" or "failed"
+        """
+        ontology = os.path.abspath(result["ontology"])
+        status = result.get("status", {})
+        failed = result["error"] is not None or not status or any(stage["status"] not in ("done", "skipped") for stage in status.values())
+        now = time.time()
+        with self.conn:
+            self.conn.execute("UPDATE ontologies SET status=?, result=?, updated=? WHERE ontology=?",
+                              ("failed" if failed else "done", json.dumps(result), now, ontology))
+            self.conn.executemany("INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?, ?)",
+                                  [(ontology, kind, stage["status"], stage["error"], now) for kind, stage in status.items()])
+        return "failed" if failed else "done"
+
+    def plan(self, onts):
+        """Finds the ontologies whose last analysis of their current file with the current settings is done,
+        the failed and interrupted ones are analyzed again
+
+        Args:
+            onts (list): paths to ontology files
+
+        Returns:
+            dict: stored result by path of the ontologies that are not analyzed again
+        """
+        rows = {row[0]: row[1:] for row in self.conn.execute("SELECT ontology, size, mtime, status, result FROM ontologies WHERE settings=?",
+                                                              (self.settings(),))}
+        kept = {}
+        for o in onts:
+            row = rows.get(os.path.abspath(o))
+            if row is None or tuple(row[:2]) != self.signature(o):
+                continue
+            if row[2] == "done":
+                kept[o] = json.loads(row[3])
+        return kept
+
+    def finished(self):
+        """Returns the size and mtime of every ontology whose last analysis with the current settings finished, done or failed, by path"""
+        return {row[0]: tuple(row[1:]) for row in self.conn.execute("SELECT ontology, size, mtime FROM ontologies WHERE status IN ('done', 'failed') "
+                                                                     "AND settings=?", (self.settings(),))}
+
+    def get(self, ontology_dir):
+        """Returns what is recorded about an ontology
+
+        Args:
+            ontology_dir (str): path to ontology file
+
+        Returns:
+            dict: ontology, size, mtime, status, result, update time, settings and the status of every stage by report kind,
+                None if the ontology was never started
+        """
+        ontology = os.path.abspath(ontology_dir)
+        row = self.conn.execute("SELECT ontology, size, mtime, status, result, updated, settings FROM ontologies WHERE ontology=?", (ontology,)).fetchone()
+        if row is None:
+            return None
+        state = dict(zip(("ontology", "size", "mtime", "status", "result", "updated", "settings"), row))
+        state["result"] = json.loads(state["result"]) if state["result"] else None
+        state["settings"] = json.loads(state["settings"]) if state["settings"] else None
+        state["stages"] = {stage: {"status": status, "error": error} for stage, status, error in
+                           self.conn.execute("SELECT stage, status, error FROM stages WHERE ontology=?", (ontology,))}
+        return state
+
+    def unfinished(self, ontology_dir):
+        """Returns the report kinds of an ontology whose stage is not recorded as done with the current settings"""
+        done = {stage for (stage,) in self.conn.execute("SELECT stages.stage FROM stages JOIN ontologies ON stages.ontology=ontologies.ontology "
+                                                         "WHERE stages.ontology=? AND stages.status='done' AND ontologies.settings=?",
+                                                         (os.path.abspath(ontology_dir), self.settings()))}
+        return [kind for kind in ResultsIndex.SUFFIXES if kind not in done]
+
+    def close(self):
+        """Closes the manifest file"""
+        self.conn.close()
+
+
+def reset_peak_rss():
+    """Resets the peak resident set size of this process, only possible on Linux (clear_refs in proc(5))"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss():
+    """Peak resident set size of this process since the last reset_peak_rss, or since its start where the peak
+    can not be reset
+
+    Returns:
+        float: peak rss in MB
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Telemetry:
+    """Opt-in instrumentation of the analysis. Collects the events of this process, the main process writes them as
+    json lines to the run log. Every event has the fields event, time and ontology, the ontology being analyzed in
+    this process when it was emitted. Events: "stage" (wall, cpu, peak_rss, error), "request" (service, method,
+    seconds, attempts, status, error), "ontology" (bytes, triples, wall, cpu, peak_rss, error) and "error" (stage, error)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.ontology = None
+
+    def emit(self, event, **fields):
+        """Records an event
+
+        Args:
+            event (str): event type
+            **fields: event fields
+        """
+        record = {"event": event, "time": time.time(), "ontology": self.ontology}
+        record.update(fields)
+        with self.lock:
+            self.events.append(record)
+
+    def drain(self):
+        """Returns and forgets the recorded events
+
+        Returns:
+            list: events in the order they were emitted
+        """
+        with self.lock:
+            events, self.events = self.events, []
+        return events
+
+    @contextmanager
+    def stage(self, name):
+        """Measures the wall time, the cpu time of the calling thread and the peak rss of a stage
+
+        Args:
+            name (str): name of the stage
+        """
+        reset_peak_rss()
+        start, cpu = time.perf_counter(), time.thread_time()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.emit("stage", stage=name, wall=time.perf_counter() - start, cpu=time.thread_time() - cpu, peak_rss=peak_rss(), error=error)
+
+
+def get_telemetry():
+    """Returns the Telemetry of this process, it is created on first use
+
+    Returns:
+        Telemetry: the telemetry, None if no run log is written
+    """
+    global _telemetry
+    if not TELEMETRY:
+        return None
+    if _telemetry is None:
+        _telemetry = Telemetry()
+    return _telemetry
+
+
+def measure(stage):
+    """Context manager measuring a stage if telemetry is enabled
+
+    Args:
+        stage (str): name of the stage
+    """
+    telemetry = get_telemetry()
+    return telemetry.stage(stage) if telemetry is not None else nullcontext()
+
+
+def record_error(stage, error):
+    """Adds an error that a stage handled itself to the run log
+
+    Args:
+        stage (str): name of the stage
+        error (Exception): the error
+    """
+    telemetry = get_telemetry()
+    if telemetry is not None:
+        telemetry.emit("error", stage=stage, error="%s: %s" % (type(error).__name__, error))
+
+
+class RunLog:
+    """Run log of the main process, the telemetry events of every ontology are appended to it as json lines.
+    It also keeps the cProfile output of the slowest ontologies and removes the others
+
+    Args:
+        path (str): path of the run log, no events are written if None
+        profile (int): number of slowest ontologies whose profile is kept
+    """
+
+    def __init__(self, path, profile=0):
+        self.f = open(path, 'a') if path else None
+        self.profile = profile
+        self.profiles = []
+
+    def write(self, events):
+        """Appends events to the run log
+
+        Args:
+            events (list): telemetry events
+        """
+        if self.f is not None:
+            for event in events:
+                self.f.write(json.dumps(event) + '\n')
+            self.f.flush()
+
+    def add(self, result):
+        """Takes the events and the profile out of an analysis result
+
+        Args:
+            result (dict): analysis result of analyze_ontology
+
+        Returns:
+            dict: the result without them
+        """
+        self.write(result.pop("events", []))
+        profile = result.pop("profile", None)
+        if profile is not None:
+            heapq.heappush(self.profiles, (profile["wall"], profile["path"], result["ontology"]))
+            if len(self.profiles) > self.profile:
+                os.remove(heapq.heappop(self.profiles)[1])
+        return result
+
+    def close(self):
+        """Writes the 40 most expensive functions of every kept profile next to it and closes the run log"""
+        import pstats
+        for wall, path, ontology in sorted(self.profiles, reverse=True):
+            with open(os.path.splitext(path)[0] + ".txt", 'w') as f:
+                f.write("%s %.3fs\n" % (ontology, wall))
+                pstats.Stats(path, stream=f).sort_stats("cumulative").print_stats(40)
+            self.write([{"event": "profile", "time": time.time(), "ontology": ontology, "wall": wall, "path": path}])
+        if self.f is not None:
+            self.f.close()
+
+
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS_COMMENT = "http://www.w3.org/2000/01/rdf-schema#comment"
+RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+RDFS_SUBCLASSOF = "http://www.w3.org/2000/01/rdf-schema#subClassOf"
+OWL_NS = "http://www.w3.org/2002/07/owl#"
+STREAM_DECLARATIONS = {OWL_NS + "Class": "classes", OWL_NS + "AnnotationProperty": "annotation_properties",
+                       OWL_NS + "DatatypeProperty": "data_properties", OWL_NS + "ObjectProperty": "object_properties"}
+
+_TURTLE_TOKEN = re.compile(r'''
+    (?P<ws>\s+|\#[^\n]*)
+  | (?P<iri><[^<>"{}|^`\\\s]*>)
+  | (?P<lstring>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!\'\'))*\'\'\')
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<at>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+  | (?P<dtype>\^\^)
+  | (?P<punct>[;,.\[\]()])
+  | (?P<word>[^\s<>"';,\[\]()\#^]+)
+''', re.X | re.S)
+_ESCAPE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)', re.S)
+_SCHEME = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:')
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f"}
+
+def _unescape(value):
+    """Resolves the escape sequences of a Turtle string or name"""
+    def replace(m):
+        e = m.group(1)
+        if e[0] in "uU" and len(e) > 1:
+            return chr(int(e[1:], 16))
+        return _ESCAPES.get(e, e)
+    return _ESCAPE.sub(replace, value)
+
+def resolve_iri(base, iri):
+    """Resolves an iri against the base, absolute iris are returned as they are. urljoin alone drops an empty
+    fragment, which would turn namespaces like http://www.w3.org/2002/07/owl# into http://www.w3.org/2002/07/owl
+
+    Args:
+        base (str): base iri
+        iri (str): absolute or relative iri
+
+    Returns:
+        str: absolute iri
+    """
+    if _SCHEME.match(iri):
+        return iri
+    resolved = urllib.parse.urljoin(base, iri)
+    if iri.endswith("#") and not resolved.endswith("#"):
+        resolved += "#"
+    return resolved
+
+class NamespaceBindings:
+    """Prefix bindings as rdflib's namespace manager keeps them while it parses a file, so the streamed namespaces
+    are the ones of the parsed graph: every namespace has one prefix, a prefix already bound to another namespace
+    gets a number appended and without override a namespace keeps the prefix it was bound to first
+    """
+
+    def __init__(self):
+        self.namespaces = {}
+        self.prefixes = {}
+
+    def store(self, prefix, iri, override):
+        """Binds like the rdflib memory store"""
+        bound_namespace = self.namespaces.get(prefix)
+        bound_prefix = self.prefixes.get(iri)
+        if bound_prefix is None:
+            bound_prefix = self.prefixes.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self.namespaces[bound_prefix]
+            if bound_namespace is not None:
+                del self.prefixes[bound_namespace]
+            self.prefixes[iri] = prefix
+            self.namespaces[prefix] = iri
+        else:
+            self.prefixes[bound_namespace if bound_namespace is not None else iri] = bound_prefix if bound_prefix is not None else prefix
+            self.namespaces[bound_prefix if bound_prefix is not None else prefix] = bound_namespace if bound_namespace is not None else iri
+
+    def bind(self, prefix, iri, override=True):
+        """Binds a prefix to a namespace
+
+        Args:
+            prefix (str): prefix, "" for the default namespace
+            iri (str): namespace iri
+            override (bool): rebind a namespace that is already bound to another prefix
+        """
+        prefix = prefix or ""
+        bound_namespace = self.namespaces.get(prefix)
+        if bound_namespace and bound_namespace != iri:
+            prefix = prefix or "default"
+            num = 1
+            while True:
+                bound = self.namespaces.get("%s%d" % (prefix, num))
+                if bound and bound == iri:
+                    return
+                if not bound:
+                    break
+                num += 1
+            self.store("%s%d" % (prefix, num), iri, override)
+            return
+        bound_prefix = self.prefixes.get(iri)
+        if bound_prefix is None or (bound_prefix != prefix and (override or bound_prefix.startswith("_"))):
+            self.store(prefix, iri, override)
+
+    def items(self):
+        """Returns the (prefix, iri) bindings in the order of the rdflib memory store"""
+        return list(self.namespaces.items())
+
+def _turtle_tokens(f, chunk_size=1 << 16):
+    """Tokenizes a Turtle or N-Triples file chunk by chunk
+
+    Args:
+        f (file): file opened in text mode
+        chunk_size (int): number of characters read at once
+
+    Yields:
+        tuple: token kind and token text
+    """
+    buffer = ""
+    eof = False
+    pos = 0
+    while True:
+        if not eof and len(buffer) - pos < chunk_size:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        if pos >= len(buffer):
+            return
+        m = _TURTLE_TOKEN.match(buffer, pos)
+        # a token touching the end of the buffer may continue in the next chunk, as may a long string
+        # matched as an empty string because its closing quotes are not read yet
+        if not eof and (m is None or m.end() == len(buffer) or buffer.startswith(buffer[pos] * 3, pos) and m.lastgroup == "string"):
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if m is None:
+            raise ValueError("Invalid Turtle near: %r" % buffer[pos:pos + 40])
+        kind = m.lastgroup
+        text = m.group(kind)
+        pos = m.end()
+        if kind == "word" and text.endswith("."):
+            # a statement terminating dot written directly after a name
+            stripped = text.rstrip(".")
+            pos -= len(text) - len(stripped)
+            text = stripped
+        if kind != "ws":
+            yield kind, text
+
+def stream_turtle(ontology_dir):
+    """Streams the prefixes and triples of a Turtle or N-Triples file without building a graph.
+    Blank nodes are returned as "_:" names, literals as (value,) tuples and the items of collections are skipped
+
+    Args:
+        ontology_dir (str): path to ontology file
+
+    Yields:
+        tuple: ("ns", prefix, iri) or ("triple", subject, predicate, object)
+    """
+    prefixes = {}
+    base = "file://" + os.path.abspath(ontology_dir)
+    blank = 0
+    # open [ ] and ( ) with the subject, predicate and state to return to
+    stack = []
+    state = "subject"
+    subject = predicate = None
+    directive = prefix = None
+    skip_datatype = False
+    with open(ontology_dir, "r", encoding="utf-8", errors="replace") as f:
+        for kind, text in _turtle_tokens(f):
+            if directive is not None:
+                if kind == "word" and text.endswith(":"):
+                    prefix = text[:-1]
+                elif kind == "iri":
+                    iri = resolve_iri(base, _unescape(text[1:-1]))
+                    if directive == "prefix":
+                        prefixes[prefix] = iri
+                        yield ("ns", prefix, iri)
+                    else:
+                        base = iri
+                    directive = None
+                continue
+            if kind == "at" and text in ("@prefix", "@base"):
+                directive = text[1:]
+                continue
+            if kind == "word" and text.upper() in ("PREFIX", "BASE") and state == "subject" and not stack:
+                directive = text.lower()
+                continue
+            if skip_datatype:
+                skip_datatype = False
+                continue
+            if kind == "dtype":
+                skip_datatype = True
+                continue
+            if kind == "at":
+                continue
+            in_collection = bool(stack) and stack[-1][0] == "collection"
+            if kind == "punct":
+                if text == "[":
+                    blank += 1
+                    node = "_:stream%d" % blank
+                    if state == "object" and not in_collection:
+                        yield ("triple", subject, predicate, node)
+                    stack.append(("node", subject, predicate, state))
+                    subject, state = node, "predicate"
+                elif text == "(":
+                    blank += 1
+                    node = "_:stream%d" % blank
+                    if state == "object" and not in_collection:
+                        yield ("triple", subject, predicate, node)
+                    stack.append(("collection", subject, predicate, state))
+                    subject, state = node, "object"
+                elif text in "])" and stack:
+                    node = subject
+                    _, subject, predicate, outer = stack.pop()
+                    if outer == "subject":
+                        # [ ... ] or ( ... ) as subject of the following predicates
+                        subject, state = node, "predicate"
+                    elif stack and stack[-1][0] == "collection":
+                        state = "object"
+                    else:
+                        state = "after"
+                elif text == ",":
+                    state = "object"
+                elif text == ";":
+                    state = "predicate"
+                elif text == ".":
+                    state = "subject"
+                continue
+            if kind in ("string", "lstring"):
+                term = (_unescape(text[3:-3] if kind == "lstring" else text[1:-1]),)
+            elif kind == "iri":
+                term = resolve_iri(base, _unescape(text[1:-1]))
+            elif text == "a" and state == "predicate":
+                term = RDF_NS + "type"
+            elif text.startswith("_:"):
+                term = text
+            elif ":" in text and text.split(":", 1)[0] in prefixes:
+                name, local = text.split(":", 1)
+                term = prefixes[name] + _unescape(local)
+            else:
+                term = (text,)
+            if state == "subject":
+                subject, state = term, "predicate"
+            elif state == "predicate":
+                predicate, state = term, "object"
+            elif not in_collection:
+                yield ("triple", subject, predicate, term)
+                state = "after"
+
+def stream_rdfxml(ontology_dir):
+    """Streams the prefixes and triples of a RDF/XML file without building a graph, every top level
+    element is cleared once it is parsed. Literals are returned as (value,) tuples, XML literals and the items of
+    collections are skipped
+
+    Args:
+        ontology_dir (str): path to ontology file
+
+    Yields:
+        tuple: ("ns", prefix, iri) or ("triple", subject, predicate, object)
+    """
+    from xml.etree.ElementTree import iterparse
+    base = "file://" + os.path.abspath(ontology_dir)
+    xml_base = "{http://www.w3.org/XML/1998/namespace}base"
+    syntax = {"{%s}%s" % (RDF_NS, name) for name in ("about", "ID", "nodeID", "resource", "parseType", "datatype")}
+    blank = 0
+    # one frame per open element: ("node", subject), ("property", subject, predicate) or ("skip",)
+    stack = []
+    root = None
+    for event, elem in iterparse(ontology_dir, events=("start-ns", "start", "end")):
+        if event == "start-ns":
+            yield ("ns", elem[0], elem[1])
+            continue
+        tag = elem.tag[1:].replace("}", "", 1) if elem.tag.startswith("{") else elem.tag
+        if event == "end":
+            frame = stack.pop()
+            if frame[0] == "property" and len(elem) == 0:
+                yield ("triple", frame[1], frame[2], (elem.text or "",))
+            if len(stack) == 1:
+                # parsed elements stay referenced by the root element unless it is cleared
+                root.clear()
+            continue
+        base = elem.get(xml_base, base)
+        if root is None:
+            root = elem
+            if tag == RDF_NS + "RDF":
+                stack.append(("rdf",))
+                continue
+        parent = stack[-1] if stack else ("rdf",)
+        if parent[0] == "skip":
+            stack.append(("skip",))
+        elif parent[0] in ("rdf", "property", "collection"):
+            if elem.get("{%s}about" % RDF_NS) is not None:
+                subject = resolve_iri(base, elem.get("{%s}about" % RDF_NS))
+            elif elem.get("{%s}ID" % RDF_NS) is not None:
+                subject = resolve_iri(base, "#" + elem.get("{%s}ID" % RDF_NS))
+            else:
+                blank += 1
+                subject = "_:" + elem.get("{%s}nodeID" % RDF_NS, "stream%d" % blank)
+            if parent[0] == "property":
+                yield ("triple", parent[1], parent[2], subject)
+            if tag != RDF_NS + "Description":
+                yield ("triple", subject, RDF_NS + "type", tag)
+            for key, value in elem.attrib.items():
+                if key == "{%s}type" % RDF_NS:
+                    yield ("triple", subject, RDF_NS + "type", resolve_iri(base, value))
+                elif key not in syntax and key.startswith("{") and not key.startswith("{http://www.w3.org/XML/1998/namespace}"):
+                    yield ("triple", subject, key[1:].replace("}", "", 1), (value,))
+            stack.append(("node", subject))
+        else:
+            subject = parent[1]
+            resource = elem.get("{%s}resource" % RDF_NS)
+            parse_type = elem.get("{%s}parseType" % RDF_NS)
+            if resource is not None or elem.get("{%s}nodeID" % RDF_NS) is not None:
+                obj = resolve_iri(base, resource) if resource is not None else "_:" + elem.get("{%s}nodeID" % RDF_NS)
+                yield ("triple", subject, tag, obj)
+                stack.append(("skip",))
+            elif parse_type == "Resource":
+                blank += 1
+                node = "_:stream%d" % blank
+                yield ("triple", subject, tag, node)
+                stack.append(("node", node))
+            elif parse_type == "Collection":
+                stack.append(("collection",))
+            elif parse_type is not None:
+                stack.append(("skip",))
+            else:
+                stack.append(("property", subject, tag))
+
+def stream_namespaces(ontology_dir):
+    """Streams the namespaces of a RDF/XML file as rdflib binds them when it parses the file, only the namespace
+    declarations are read and no elements are built. N-Triples files declare no namespaces
+
+    Args:
+        ontology_dir (str): path to ontology file
+
+    Returns:
+        list: (prefix, iri) pairs in the order of the rdflib graph
+    """
+    bindings = NamespaceBindings()
+    if stream_format(ontology_dir) != "xml":
+        return bindings.items()
+    from xml.parsers import expat
+    parser = expat.ParserCreate(namespace_separator=" ")
+    # the RDF/XML parser of rdflib binds every xmlns as it comes without override, like stream_ontology
+    parser.StartNamespaceDeclHandler = lambda prefix, iri: bindings.bind(prefix or "", iri or "", override=False)
+    with open(ontology_dir, "rb") as f:
+        parser.ParseFile(f)
+    return bindings.items()
+
+def stream_format(ontology_dir):
+    """Guesses the syntax of an ontology file from its first bytes
+
+    Args:
+        ontology_dir (str): path to ontology file
+
+    Returns:
+        str: "xml" or "turtle" (also used for N-Triples)
+    """
+    with open(ontology_dir, "rb") as f:
+        head = f.read(4096).lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head.startswith(b"<?xml") or head.startswith(b"<rdf:RDF") or head.startswith(b"<!") or head.startswith(b"<RDF"):
+        return "xml"
+    return "turtle"
+
+def stream_ontology(ontology_dir, n, hierarchy=False):
+    """Single pass extraction of the prefixes, the declaration counts and a reservoir sample of n classes of a
+    Turtle, N-Triples or RDF/XML file without building a graph, only the declared iris are kept. The comments of a
+    class are collected from the moment it is sampled, every declared iri is counted once per kind. With hierarchy the class hierarchy is collected as well, every
+    iri is replaced by an integer id so it takes a few integers per class.
+
+    Args:
+        ontology_dir (str): path to ontology file
+        n (int): number of classes to sample
+        hierarchy (bool): also collect the class hierarchy, see hierarchy_metrics
+
+    Returns:
+        dict: namespaces, base_iri, declaration counts, number of triples and the sampled classes with their
+            comments, the sample is smaller than n if the ontology has fewer classes. With hierarchy the ids of the
+            declared classes, of both ends of the subClassOf statements and of the labelled and commented subjects
+            under "hierarchy"
+    """
+    xml = stream_format(ontology_dir) == "xml"
+    events = stream_rdfxml(ontology_dir) if xml else stream_turtle(ontology_dir)
+    ids = {}
+    classes = {"classes": [], "children": [], "parents": [], "labelled": [], "commented": []} if hierarchy else None
+    counts = {"classes": 0, "annotation_properties": 0, "data_properties": 0, "object_properties": 0}
+    # a declaration repeated in the file is counted and sampled once
+    declared = {kind: set() for kind in counts}
+    # the RDF/XML parser of rdflib binds every xmlns as it comes without override, the Turtle parser binds the
+    # last iri of every prefix once the file is parsed
+    bindings = NamespaceBindings()
+    prefixes = {}
+    ontology_iri = None
+    sample = []
+    comments = {}
+    triples = 0
+    for event in events:
+        if event[0] == "ns":
+            if xml:
+                bindings.bind(event[1], event[2], override=False)
+            else:
+                prefixes[event[1]] = event[2]
+            continue
+        triples += 1
+        s, p, o = event[1:]
+        if not isinstance(s, str) or s.startswith("_:"):
+            continue
+        if classes is not None:
+            if p == RDFS_SUBCLASSOF:
+                # restrictions and class expressions are blank nodes and no part of the named hierarchy
+                if isinstance(o, str) and not o.startswith("_:"):
+                    classes["children"].append(ids.setdefault(s, len(ids)))
+                    classes["parents"].append(ids.setdefault(o, len(ids)))
+            elif p == RDFS_LABEL:
+                classes["labelled"].append(ids.setdefault(s, len(ids)))
+            elif p == RDFS_COMMENT:
+                classes["commented"].append(ids.setdefault(s, len(ids)))
+            elif p == RDF_NS + "type" and o == OWL_NS + "Class":
+                classes["classes"].append(ids.setdefault(s, len(ids)))
+        if p == RDF_NS + "type" and o in STREAM_DECLARATIONS:
+            if s in declared[STREAM_DECLARATIONS[o]]:
+                continue
+            declared[STREAM_DECLARATIONS[o]].add(s)
+            counts[STREAM_DECLARATIONS[o]] += 1
+            if o == OWL_NS + "Class":
+                # reservoir sampling, every class is sampled with probability n / classes
+                if len(sample) < n:
+                    sample.append(s)
+                    comments[s] = []
+                else:
+                    i = random.randrange(counts["classes"])
+                    if i < n:
+                        del comments[sample[i]]
+                        sample[i] = s
+                        comments[s] = []
+        elif p == RDF_NS + "type" and o == OWL_NS + "Ontology" and ontology_iri is None:
+            ontology_iri = s
+        elif p == RDFS_COMMENT and s in comments and isinstance(o, tuple):
+            comments[s].append(o[0])
+    # same base iri as the ontology loaded by OntologyContext.onto
+    base_iri = ontology_iri or "file://" + os.path.splitext(ontology_dir)[0] + ".owl"
+    if not base_iri.endswith(("#", "/")):
+        base_iri += "#"
+    report = dict(counts)
+    report["properties"] = counts["annotation_properties"] + counts["data_properties"] + counts["object_properties"]
+    report["base_iri"] = base_iri
+    for prefix, iri in prefixes.items():
+        bindings.bind(prefix, iri)
+    report["namespaces"] = bindings.items()
+    report["triples"] = triples
+    report["sample"] = [[entity_name(iri), str(comments[iri])] for iri in sorted(sample)]
+    if classes is not None:
+        report["hierarchy"] = classes
+    return report
+
+def stream_imports(ontology_dir):
+    """Streams the ontology iri and the owl:imports of a Turtle, N-Triples or RDF/XML file without building a graph
+
+    Args:
+        ontology_dir (str): path to ontology file
+
+    Returns:
+        tuple: ontology iri, None if the file declares no ontology, and the imported iris
+    """
+    events = stream_rdfxml(ontology_dir) if stream_format(ontology_dir) == "xml" else stream_turtle(ontology_dir)
+    ontology_iri = None
+    imports = []
+    for event in events:
+        if event[0] != "triple":
+            continue
+        s, p, o = event[1:]
+        if p == OWL_NS + "imports" and isinstance(o, str) and o not in imports:
+            imports.append(o)
+        elif p == RDF_NS + "type" and o == OWL_NS + "Ontology" and ontology_iri is None and isinstance(s, str) and not s.startswith("_:"):
+            ontology_iri = s
+    return ontology_iri, imports
+
+def entity_name(iri):
+    """Names an entity like owlready2 does, the last path segment of its namespace and its name
+
+    Args:
+        iri (str): entity iri
+
+    Returns:
+        str: entity name
+    """
+    cut = max(iri.rfind("#"), iri.rfind("/")) + 1
+    namespace = iri[:cut][:-1].rsplit("/", 1)[-1]
+    if namespace.endswith(".owl") or namespace.endswith(".rdf"):
+        namespace = namespace[:-4]
+    return namespace + "." + iri[cut:]
+
+def onto_hierarchy(onto):
+    """Reads the class hierarchy of a loaded ontology from the quadstore, the owlready2 storids serve as class ids
+
+    Args:
+        onto (owlready2.Ontology): the ontology
+
+    Returns:
+        dict: class hierarchy in the form of hierarchy_metrics
+    """
+    import owlready2
+    from owlready2.base import rdf_type, owl_class, rdfs_subclassof
+    graph, c = onto.world.graph, onto.graph.c
+    # blank nodes have negative storids, restrictions and class expressions are no part of the named hierarchy
+    edges = graph.execute("SELECT s, o FROM objs WHERE c=? AND p=? AND s>0 AND o>0", (c, rdfs_subclassof)).fetchall()
+    return {"classes": [s for (s,) in graph.execute("SELECT s FROM objs WHERE c=? AND p=? AND o=? AND s>0", (c, rdf_type, owl_class))],
+            "children": [s for s, o in edges], "parents": [o for s, o in edges],
+            "labelled": [s for (s,) in graph.execute("SELECT s FROM datas WHERE c=? AND p=?", (c, owlready2.label.storid))],
+            "commented": [s for (s,) in graph.execute("SELECT s FROM datas WHERE c=? AND p=?", (c, owlready2.comment.storid))]}
+
+def _hierarchy_counts_numpy(np, hierarchy):
+    """hierarchy_counts with numpy arrays, the levels of the hierarchy are expanded in one operation each"""
+    ids = np.unique(np.asarray(hierarchy["classes"], dtype=np.int64))
+    n = len(ids)
+    labelled = int(np.isin(ids, np.asarray(hierarchy["labelled"], dtype=np.int64)).sum())
+    commented = int(np.isin(ids, np.asarray(hierarchy["commented"], dtype=np.int64)).sum())
+    if not n:
+        return 0, 0, 0, 0, [], [], [], labelled, commented
+    children = np.asarray(hierarchy["children"], dtype=np.int64)
+    parents = np.asarray(hierarchy["parents"], dtype=np.int64)
+    child = np.minimum(np.searchsorted(ids, children), n - 1)
+    parent = np.minimum(np.searchsorted(ids, parents), n - 1)
+    inside = (ids[child] == children) & (ids[parent] == parents) & (child != parent)
+    # duplicate statements are dropped, the edges are sorted by parent which gives the compressed sparse rows
+    edges = np.unique(parent[inside] * n + child[inside])
+    parent, child = edges // n, edges % n
+    fan_out = np.bincount(parent, minlength=n)
+    fan_in = np.bincount(child, minlength=n)
+    indptr = np.concatenate(([0], np.cumsum(fan_out)))
+    depth = np.full(n, -1, dtype=np.int64)
+    frontier = np.flatnonzero(fan_in == 0)
+    depth[frontier] = 0
+    level = 0
+    while frontier.size:
+        level += 1
+        counts = fan_out[frontier]
+        total = int(counts.sum())
+        if not total:
+            break
+        # positions of the children of every frontier class in the rows of the adjacency
+        positions = np.repeat(indptr[frontier] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        kids = child[positions]
+        frontier = np.unique(kids[depth[kids] < 0])
+        depth[frontier] = level
+    reached = depth[depth >= 0]
+    orphans = int(((fan_in == 0) & (fan_out == 0)).sum())
+    return (n, len(edges), orphans, n - len(reached), np.bincount(reached).tolist(), np.bincount(fan_out).tolist(),
+            np.bincount(fan_in).tolist(), labelled, commented)
+
+def _bincount(values):
+    """Number of occurrences of every integer from 0 to the largest of values"""
+    counts = [0] * (max(values) + 1 if values else 0)
+    for value in values:
+        counts[value] += 1
+    return counts
+
+def hierarchy_counts(hierarchy):
+    """Counts the edges, orphans, classes per depth and classes per number of direct sub- and superclasses of a
+    class hierarchy, only subClassOf statements between two declared classes are edges. Uses numpy if it is installed
+
+    Args:
+        hierarchy (dict): class hierarchy in the form of hierarchy_metrics
+
+    Returns:
+        tuple: classes, edges, orphans, unreachable classes, classes per depth, classes per fan-out, classes per
+            fan-in, labelled classes and commented classes
+    """
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is not None:
+        return _hierarchy_counts_numpy(numpy, hierarchy)
+    index = {id: i for i, id in enumerate(sorted(set(hierarchy["classes"])))}
+    n = len(index)
+    labelled = len(index.keys() & set(hierarchy["labelled"]))
+    commented = len(index.keys() & set(hierarchy["commented"]))
+    edges = set()
+    for child, parent in zip(hierarchy["children"], hierarchy["parents"]):
+        child, parent = index.get(child), index.get(parent)
+        if child is not None and parent is not None and child != parent:
+            edges.add((parent, child))
+    fan_out, fan_in = [0] * n, [0] * n
+    kids = [[] for _ in range(n)]
+    for parent, child in edges:
+        fan_out[parent] += 1
+        fan_in[child] += 1
+        kids[parent].append(child)
+    depth = [-1] * n
+    frontier = [i for i in range(n) if not fan_in[i]]
+    for i in frontier:
+        depth[i] = 0
+    level = 0
+    while frontier:
+        level += 1
+        following = []
+        for parent in frontier:
+            for child in kids[parent]:
+                if depth[child] < 0:
+                    depth[child] = level
+                    following.append(child)
+        frontier = following
+    reached = [d for d in depth if d >= 0]
+    orphans = sum(1 for i in range(n) if not fan_in[i] and not fan_out[i])
+    return n, len(edges), orphans, n - len(reached), _bincount(reached), _bincount(fan_out), _bincount(fan_in), labelled, commented
+
+def hierarchy_metrics(hierarchy):
+    """Structure metrics of a class hierarchy. The subClassOf statements between the declared classes form an
+    adjacency from superclasses to subclasses that is walked level by level from the roots. A root has no superclass
+    and a leaf no subclass among the declared classes, an orphan is both. The depth of a class is its shortest
+    distance from a root, classes only reachable through a cycle have none
+
+    Args:
+        hierarchy (dict): integer ids of the declared classes ("classes"), of the subclasses and superclasses of the
+            subClassOf statements ("children", "parents") and of the subjects with a label or comment
+            ("labelled", "commented"), see stream_ontology and onto_hierarchy
+
+    Returns:
+        dict: numbers of classes, edges, roots, leaves, orphans, classes without depth and classes with several
+            superclasses, largest and mean depth, fan-out and fan-in, classes per depth, [fan-out, classes] pairs
+            and the shares of classes with a label and with a comment. Means of fan-out and fan-in are taken over the
+            classes that have sub- or superclasses
+    """
+    n, edges, orphans, unreachable, depths, fan_out, fan_in, labelled, commented = hierarchy_counts(hierarchy)
+    roots = fan_in[0] if fan_in else 0
+    leaves = fan_out[0] if fan_out else 0
+    reached = sum(depths)
+    return {"classes": n, "subclass_edges": edges, "roots": roots, "leaves": leaves, "orphans": orphans,
+            "unreachable": unreachable, "multiple_inheritance": n - roots - (fan_in[1] if len(fan_in) > 1 else 0),
+            "max_depth": len(depths) - 1 if depths else None,
+            "mean_depth": round(sum(d * count for d, count in enumerate(depths)) / reached, 4) if reached else None,
+            "max_fan_out": len(fan_out) - 1 if fan_out else None,
+            "mean_fan_out": round(edges / (n - leaves), 4) if n - leaves else None,
+            "max_fan_in": len(fan_in) - 1 if fan_in else None,
+            "mean_fan_in": round(edges / (n - roots), 4) if n - roots else None,
+            "depth_distribution": depths,
+            "fan_out_distribution": [[fan, count] for fan, count in enumerate(fan_out) if count],
+            "label_coverage": round(labelled / n, 4) if n else None,
+            "comment_coverage": round(commented / n, 4) if n else None}
+
+def get_random_classes_fair_foops(n, ontology_dir, fair_foops, ctx=None, pending=None):
     """Get n random classes from given ontology and generate fair and foops report
 
     Args:
         n (int): number of classes to get
         ontology_dir (string): path to ontology file
         fair_foops (bool): generate fair/foops
+        ctx (OntologyContext): shared analysis context, a new one is created if None
+        pending (list): futures of the fair/foops reports are appended here instead of waiting for them if given
     """    
     ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename=".txt")
     ontname = ontology_dir.split(os.path.sep)[-1].split(".")[0]
-    try:
-        onto = get_ontology("file://"+ontology_dir).load()
-    except Exception as e:
-        with open(path +"/"+ontname+"Exception_while_Loading.txt", 'w') as f:
-                f.write(str(e))
-        return
-    if onto.base_iri and fair_foops:
-        get_foops_report(ontology_dir, onto.base_iri)
-        get_faircheck_report(ontology_dir, onto.base_iri)
-    classes = random.sample(list(onto.classes()),k=n)
+    ctx = ctx or OntologyContext(ontology_dir)
+    # the reservoir sample of the streaming extractor differs from the sample of the loaded ontology
+    stage = "random_classes:stream:%d" % n if ctx.stream_sample == n else "random_classes:%d" % n
+    report = ctx.cached(stage)
+    summary = ctx.streamed("random_classes") if report is None and ctx.stream_sample == n else None
+    if summary is not None:
+        if len(summary["sample"]) < n:
+            e = ValueError("Sample larger than population or is negative")
+            record_error("random_classes", e)
+            ctx.finished("classes", str(e))
+            os.makedirs(path, exist_ok=True)
+            with atomic_write(path +"/"+ontname+"Exception_while_Loading.txt") as f:
+                    f.write(str(e))
+            return
+        report = {key: summary[key] for key in ("base_iri", "classes", "annotation_properties", "data_properties", "object_properties", "properties", "sample")}
+        ctx.store(stage, report)
+        if report["base_iri"] and fair_foops:
+            run_remote(pending, get_foops_report, ontology_dir, report["base_iri"], ctx)
+            run_remote(pending, get_faircheck_report, ontology_dir, report["base_iri"], ctx)
+    elif report is None:
+        try:
+            onto = ctx.use("random_classes", "onto")
+        except Exception as e:
+            record_error("random_classes", e)
+            ctx.finished("classes", str(e))
+            os.makedirs(path, exist_ok=True)
+            with atomic_write(path +"/"+ontname+"Exception_while_Loading.txt") as f:
+                    f.write(str(e))
+            return
+        if onto.base_iri and fair_foops:
+            run_remote(pending, get_foops_report, ontology_dir, onto.base_iri, ctx)
+            run_remote(pending, get_faircheck_report, ontology_dir, onto.base_iri, ctx)
+        classes = sorted(onto.classes(), key=lambda cl: cl.iri)
+        if len(classes) < n:
+            e = ValueError("Sample larger than population or is negative")
+            record_error("random_classes", e)
+            ctx.finished("classes", str(e))
+            os.makedirs(path, exist_ok=True)
+            with atomic_write(path +"/"+ontname+"Exception_while_Loading.txt") as f:
+                    f.write(str(e))
+            return
+        classes = random.sample(classes, k=n)
+        report = {"base_iri": onto.base_iri,
+                  "classes": len(list(onto.classes())),
+                  "annotation_properties": len(list(onto.annotation_properties())),
+                  "data_properties": len(list(onto.data_properties())),
+                  "object_properties": len(list(onto.object_properties())),
+                  "properties": len(list(onto.properties())),
+                  "sample": [[str(cl), str(cl.comment)] for cl in classes]}
+        ctx.store(stage, report)
+    elif report["base_iri"] and fair_foops:
+        run_remote(pending, get_foops_report, ontology_dir, report["base_iri"], ctx)
+        run_remote(pending, get_faircheck_report, ontology_dir, report["base_iri"], ctx)
     os.makedirs(path, exist_ok=True)
-    if( os.path.isfile(ontpath) and not os.path.getsize(ontpath) <= 0):
+    if ctx.keep_output(ontpath):
+        add_report(ctx, "classes", ontpath)
         return
-    with open(str(ontpath), 'w') as f:
-        f.write("Classes:" + str(len(list(onto.classes()))))
+    with atomic_write(ontpath) as f:
+        f.write("Classes:" + str(report["classes"]))
         f.write('\n')
-        f.write("Annotation properties:" + str(len(list(onto.annotation_properties()))))
+        f.write("Annotation properties:" + str(report["annotation_properties"]))
         f.write('\n')
-        f.write("Data properties:" + str(len(list(onto.data_properties()))))
+        f.write("Data properties:" + str(report["data_properties"]))
         f.write('\n')
-        f.write("Object properties:" + str(len(list(onto.object_properties()))))
+        f.write("Object properties:" + str(report["object_properties"]))
         f.write('\n')
-        f.write("total properties:" + str(len(list(onto.properties()))))
+        f.write("total properties:" + str(report["properties"]))
         f.write('\n')
-        for cl in classes:
-            f.write(str(cl))
+        for cl, comment in report["sample"]:
+            f.write(cl)
+            f.write('\n')
+            f.write(comment)
             f.write('\n')
-            f.write(str(cl.comment))
+    add_report(ctx, "classes", ontpath, report)
+
+def get_used_onts( ontology_dir, ctx=None):
+    """Get every ontology that is used in given ontology via namespace
+
+    Args:
+        ontology_dir (str): path to ontology file
+        ctx (OntologyContext): shared analysis context, a new one is created if None
+    """ 
+    
+    ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename="_used_Ontologies.txt")
+    ctx = ctx or OntologyContext(ontology_dir)
+    used_onts = ctx.cached("used_onts")
+    if used_onts is None:
+        summary = ctx.streamed("used_onts")
+        try:
+            if summary is not None:
+                used_onts = summary["namespaces"]
+            else:
+                used_onts = [(prefix, str(iri)) for prefix, iri in ctx.use("used_onts", "namespaces")]
+        except Exception as e:
+            record_error("used_onts", e)
+            ctx.finished("used_onts", str(e))
+            os.makedirs(path, exist_ok=True)
+            with atomic_write(path +"/"+ontname+"Exception_while_Loading.txt") as f:
+                    f.write(str(e))
+            return
+        ctx.store("used_onts", used_onts)
+    os.makedirs(path, exist_ok=True)
+    if ctx.keep_output(ontpath):
+        add_report(ctx, "used_onts", ontpath)
+        return
+    with atomic_write(ontpath) as f:
+        f.write("Used_Ontologies:" + str(len(used_onts)))
+        f.write('\n')
+        for ontname,iri in used_onts:
+            f.write(ontname + ": " + str(iri))
             f.write('\n')
+    add_report(ctx, "used_onts", ontpath, used_onts)
+
+
+def get_class_structure(ontology_dir, ctx=None):
+    """Get the structure metrics of the class hierarchy of given ontology, see hierarchy_metrics. The hierarchy is
+    taken from the streaming pass or from the quadstore of the loaded ontology, whichever the context already has
+
+    Args:
+        ontology_dir (str): path to ontology file
+        ctx (OntologyContext): shared analysis context, a new one is created if None
+    """
+    ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir, filename="_structure.json")
+    ctx = ctx or OntologyContext(ontology_dir)
+    structure = ctx.cached("structure")
+    if structure is None:
+        summary = ctx.streamed("structure")
+        try:
+            if summary is not None:
+                hierarchy = summary["hierarchy"]
+            else:
+                hierarchy = onto_hierarchy(ctx.use("structure", "onto"))
+            structure = hierarchy_metrics(hierarchy)
+        except Exception as e:
+            record_error("structure", e)
+            ctx.finished("structure", str(e))
+            os.makedirs(path, exist_ok=True)
+            with atomic_write(path +"/"+ontname+"Exception_while_Loading.txt") as f:
+                    f.write(str(e))
+            return
+        ctx.store("structure", structure)
+    os.makedirs(path, exist_ok=True)
+    if ctx.keep_output(ontpath):
+        add_report(ctx, "structure", ontpath)
+        return
+    with atomic_write(ontpath) as f:
+        json.dump(structure, f)
+    add_report(ctx, "structure", ontpath, structure)
+
+
+def get_ont_files(dir):
+    """Get all ontology files ending with owl, rdf, ttl and nt in a given dir. An owl file next to a ttl file of the
+    same name is left out, it is the output of the former ttl to owl conversion
+
+    Args:
+        dir (str): dir to search for files
+
+    Returns:
+        list: all paths to the ontology files
+    """    
+    onts = []
+    for dp, dn, filenames in os.walk(dir):
+        for f in filenames:
+            name, ext = os.path.splitext(f)
+            if ext in ('.owl', '.rdf', '.ttl', '.nt') and not (ext == '.owl' and name + '.ttl' in filenames):
+                onts.append(os.path.join(dp, f))
+    return onts
+
+def analysis_stages():
+    """Returns the report kinds of the stages analyze_ontology runs with the current settings"""
+    return ["used_onts", "oops", "classes", "structure"] + (["reasoner"] if REASONING else [])
+
+def analyze_ontology(ontology_dir):
+    """Generate everything(foops,fair,oops,used_onts, random classes, class structure, reasoner) for one ontology in its own owlready2 world.
+    The remote assessments run in the background while the ontology is analyzed locally. If the reasoner is not run,
+    namespaces, counts and random classes come from the streaming extractor and the ontology is not loaded.
+    With telemetry the events of the ontology are returned under "events", with PROFILE the cProfile output is
+    saved and returned under "profile".
+
+    Args:
+        ontology_dir (str): path to ontology file
+
+    Returns:
+        dict: ontology path, consumed representations per stage, the errors of the analysis if any and the
+            status of every stage by report kind
+    """
+    # seeded per ontology so the sampled classes do not depend on the processing order
+    random.seed("%s:%s" % (RANDOM_SEED, ontology_dir))
+    telemetry = get_telemetry()
+    if telemetry is not None:
+        telemetry.ontology = ontology_dir
+    profile = None
+    if PROFILE:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+    start, cpu = time.perf_counter(), time.thread_time()
+    ctx = new_context(ontology_dir, None if REASONING else 5)
+    pending = []
+    reasoning = []
+    error = None
+    remote_errors = []
+    # the results of all stages of the ontology are written to the results store in one transaction
+    with get_index().batch():
+        try:
+            with measure("used_onts"):
+                get_used_onts(ontology_dir, ctx)
+            with measure("oops"):
+                get_oops_pitfalls(ontology_dir, ctx, pending)
+            with measure("random_classes"):
+                get_random_classes_fair_foops(5, ontology_dir, True, ctx, pending)
+        except Exception as e:
+            error = str(e)
+        # the class structure does not depend on the other stages and is computed even if one of them failed
+        try:
+            with measure("structure"):
+                get_class_structure(ontology_dir, ctx)
+            ctx.release_graph()
+        except Exception as e:
+            error = error or str(e)
+        if REASONING:
+            with measure("reasoner"):
+                run_reasoner(ontology_dir, ctx, reasoning)
+        ctx.close()
+        with measure("remote"):
+            for future in pending:
+                try:
+                    future.result()
+                except Exception as e:
+                    remote_errors.append(str(e))
+            outcome = reasoning[0].result() if reasoning else None
+    ctx.report()
+    status = dict(ctx.status)
+    for kind in analysis_stages():
+        status.setdefault(kind, {"status": "failed", "error": error or "not finished"})
+    result = {"ontology": ontology_dir, "stages": ctx.consumed, "error": error, "remote_errors": remote_errors, "reasoner": outcome,
+              "status": status}
+    wall = time.perf_counter() - start
+    if profile is not None:
+        profile.disable()
+        directory = os.path.join(OUTPUT_DIR, "profiles")
+        os.makedirs(directory, exist_ok=True)
+        ontname = os.path.splitext(os.path.basename(ontology_dir))[0]
+        fd, path = tempfile.mkstemp(dir=directory, prefix=ontname + "_", suffix=".prof")
+        os.close(fd)
+        profile.dump_stats(path)
+        result["profile"] = {"path": path, "wall": wall}
+    if telemetry is not None:
+        events = telemetry.drain()
+        peaks = [event["peak_rss"] for event in events if event["event"] == "stage"]
+        events.append({"event": "ontology", "time": time.time(), "ontology": ontology_dir, "bytes": os.path.getsize(ontology_dir),
+                       "triples": ctx.triples, "wall": wall, "cpu": time.thread_time() - cpu,
+                       "peak_rss": max(peaks) if peaks else None, "error": error})
+        telemetry.ontology = None
+        result["events"] = events
+    return result
+
+def get_all_for_all_onts_in_dir(dir, jobs=1, resume=False, retry_failed=False):
+    """Generate everything(foops,fair,oops,used_onts, random classes, reasoner) for every ontology in the given dir
+    and writes one result line per ontology to analysis_results.jsonl in the output directory.
+    Stages whose result for the current file content is in the result cache are not run again.
+    If MAX_RSS is set, no further ontology is started while this process and its workers use more memory than that.
+    With TELEMETRY the events of every ontology are appended to that run log, with PROFILE the cProfile output of
+    that many slowest ontologies is kept in the profiles directory of the output directory.
+    The progress of every ontology is recorded in the job manifest of the output directory. When resuming, the
+    ontologies whose last analysis is done are kept and the reports of the unfinished stages of the others are
+    removed before they are analyzed again.
+    With IMPORT_MIRROR everything the ontologies import is added to the import mirror before they are analyzed.
+
+    Args:
+        dir (str): path to ontology file
+        jobs (int): number of worker processes, the ontologies are analyzed in this process if 1
+        resume (bool): only analyze ontologies that are new, changed, failed, interrupted or analyzed with other settings
+        retry_failed (bool): same as resume
+    """    
+    from alive_progress import alive_bar
+    onts = get_ont_files(dir)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = JobManifest(os.path.join(OUTPUT_DIR, MANIFEST_FILE))
+    kept = manifest.plan(onts) if resume or retry_failed else {}
+    todo = [(i, o) for i, o in enumerate(onts) if o not in kept]
+    if resume or retry_failed:
+        print("Resuming: %d of %d ontologies are finished" % (len(kept), len(onts)))
+        for i, o in todo:
+            remove_reports(o, manifest.unfinished(o))
+    run_log = RunLog(TELEMETRY, PROFILE)
+    start = time.perf_counter()
+    errors = 0
+    run_log.write([{"event": "run", "time": time.time(), "ontology": None, "dir": dir, "ontologies": len(onts), "jobs": jobs, "kept": len(kept)}])
+    if get_catalog() is not None and todo:
+        imports = get_catalog().build_corpus([o for i, o in todo], get_cache())
+        print("Import mirror: %d imported ontologies, %d added, %d missing" % (imports["imports"], imports["added"], len(imports["missing"])))
+        run_log.write([{"event": "imports", "time": time.time(), "ontology": None, **imports}])
+    with alive_bar(len(todo), ctrl_c=False, title=f'Processed Onts ')  as bar, open(os.path.join(OUTPUT_DIR, "analysis_results.jsonl"), 'w') as f:
+        writer = OrderedResultWriter(f)
+        for i, o in enumerate(onts):
+            if o in kept:
+                writer.add(i, kept[o])
+        if jobs <= 1:
+            for i, o in todo:
+                manifest.start(o)
+                try:
+                    result = run_log.add(analyze_ontology(o))
+                except Exception as e:
+                    # an error outside the stages, e.g. of a file removed after it was listed, fails only its ontology
+                    result = {"ontology": o, "stages": {}, "error": str(e), "remote_errors": [], "reasoner": None}
+                    run_log.write([{"event": "error", "time": time.time(), "ontology": o, "stage": "analyze_ontology", "error": str(e)}])
+                manifest.finish(result)
+                errors += result["error"] is not None
+                writer.add(i, result)
+                gc.collect()
+                bar()
+        else:
+            with worker_pool(jobs) as executor:
+                futures = {}
+                queue = todo[::-1]
+                while queue or futures:
+                    while queue and len(futures) < jobs and not (futures and MAX_RSS and current_rss() > MAX_RSS):
+                        i, o = queue.pop()
+                        manifest.start(o)
+                        futures[executor.submit(analyze_ontology, o)] = i
+                    future = next(as_completed(futures))
+                    i = futures.pop(future)
+                    try:
+                        result = run_log.add(future.result())
+                    except Exception as e:
+                        result = {"ontology": onts[i], "stages": {}, "error": str(e), "remote_errors": [], "reasoner": None}
+                        run_log.write([{"event": "error", "time": time.time(), "ontology": onts[i], "stage": "worker", "error": str(e)}])
+                    manifest.finish(result)
+                    errors += result["error"] is not None
+                    writer.add(i, result)
+                    bar()
+    if get_cache() is not None:
+        get_cache().evict()
+    run_log.write([{"event": "run_end", "time": time.time(), "ontology": None, "wall": time.perf_counter() - start, "ontologies": len(onts), "errors": errors}])
+    run_log.close()
+    manifest.close()
+
+
+def worker_pool(jobs):
+    """Creates the process pool of the parallel analysis, its workers get the settings of this process
+
+    Args:
+        jobs (int): number of worker processes
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: the pool
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    pool_args = {}
+    mp_context = multiprocessing.get_context()
+    if MAX_RSS:
+        # workers are recycled so memory fragmented by large ontologies is given back
+        pool_args["max_tasks_per_child"] = WORKER_MAX_TASKS
+        mp_context = multiprocessing.get_context("spawn")
+    reasoner_slots = mp_context.BoundedSemaphore(REASONER_JOBS)
+    initargs = (OUTPUT_DIR, worker_client_settings(jobs, mp_context), USE_CACHE, CACHE_SETTINGS, QUADSTORE_DIR, (REASONER, REASONER_TIMEOUT, REASONER_MEMORY, REASONING), reasoner_slots, (TELEMETRY, PROFILE), (OOPS_ROUTE, OOPS_MAX_BYTES, OOPS_GZIP), (IMPORT_MIRROR, IMPORTS_OFFLINE))
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context, initializer=init_worker, initargs=initargs, **pool_args)
+
+def warm_up():
+    """Imports the libraries of the analysis and opens the stores in a worker process before its first ontology
+
+    Returns:
+        int: process id of the worker
+    """
+    import owlready2
+    import rdflib
+    import requests
+    get_client()
+    get_cache()
+    get_index()
+    return os.getpid()
+
+class AnalysisService:
+    """Long-running analysis of ontology directories. The directories are polled for new and changed ontology
+    files, only the stat of the files is read between two analyses. The files wait in a priority queue, files
+    submitted over HTTP first, then changed and then new files, smaller files first within a priority. They are
+    analyzed by worker processes that stay alive between analyses, so interpreter start, imports and the
+    connections of the stores are paid once. What the job manifest records as finished is not analyzed again
+    after a restart. A local HTTP server answers in json:
+
+        GET /status                        watched directories, queued, running and finished ontologies
+        GET /result?path=<file>            status, stage status and result of an ontology
+        POST /analyze {"path": "<file>"}   queues a file before all others, replies if it was submitted and the status
+
+    Args:
+        dirs (list): directories to watch
+        jobs (int): number of worker processes
+        interval (float): seconds between two scans of the directories
+        host (str): address of the HTTP server
+        port (int): port of the HTTP server, a free port is chosen if 0 and no server is started if None
+    """
+
+    SUBMITTED, CHANGED, NEW = 0, 1, 2
+    # files modified more recently are left for the next scan, they may still be written
+    SETTLE = 1.0
+
+    def __init__(self, dirs, jobs=1, interval=2.0, host="127.0.0.1", port=8790):
+        self.dirs = [os.path.abspath(dir) for dir in dirs]
+        self.jobs = max(1, jobs)
+        self.interval = interval
+        self.address = (host, port)
+        self.manifest_path = os.path.join(OUTPUT_DIR, MANIFEST_FILE)
+        self.ignored = [os.path.join(os.path.abspath(dir), "") for dir in (OUTPUT_DIR, IMPORT_MIRROR) if dir]
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.stopped = threading.Event()
+        self.queue = []
+        self.queued = {}
+        self.running = {}
+        self.deferred = set()
+        self.finished = []
+        self.known = {}
+        self.seq = 0
+        self.counts = {"done": 0, "failed": 0}
+        self.server = None
+
+    def enqueue(self, path, priority):
+        """Queues an ontology file, a file that is already waiting only moves up to a higher priority
+
+        Args:
+            path (str): path to ontology file
+            priority (int): SUBMITTED, CHANGED or NEW
+
+        Returns:
+            bool: True if the file was queued or moved up
+        """
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        with self.condition:
+            entry = self.queued.get(path)
+            if entry is not None and entry[0] <= priority:
+                return False
+            if entry is not None:
+                # the former entry is skipped when it is popped
+                entry[-1] = None
+            self.seq += 1
+            entry = [priority, size, self.seq, path]
+            self.queued[path] = entry
+            heapq.heappush(self.queue, entry)
+            self.condition.notify_all()
+        return True
+
+    def pop(self):
+        """Returns the next queued file, None if no file is waiting. The caller holds the condition"""
+        while self.queue:
+            path = heapq.heappop(self.queue)[-1]
+            if path is not None:
+                del self.queued[path]
+                return path
+        return None
+
+    def submit(self, path):
+        """Queues a file before all others, it is not queued again by the next scan
+
+        Args:
+            path (str): path to ontology file
+
+        Returns:
+            bool: True if the file was queued or moved up
+        """
+        path = os.path.abspath(path)
+        with self.condition:
+            self.known[path] = JobManifest.signature(path)
+        return self.enqueue(path, self.SUBMITTED)
+
+    def scan(self):
+        """Queues the new and changed ontology files of the watched directories
+
+        Returns:
+            int: number of queued files
+        """
+        with self.condition:
+            known = dict(self.known)
+        now = time.time_ns()
+        seen = set()
+        changed = []
+        for dir in self.dirs:
+            for path in get_ont_files(dir):
+                path = os.path.abspath(path)
+                if any(path.startswith(ignored) for ignored in self.ignored):
+                    continue
+                seen.add(path)
+                try:
+                    signature = JobManifest.signature(path)
+                except OSError:
+                    continue
+                if known.get(path) != signature and now - signature[1] >= self.SETTLE * 1e9:
+                    changed.append((path, signature))
+        queued = 0
+        with self.condition:
+            for path in known:
+                if path not in seen and any(path.startswith(os.path.join(dir, "")) for dir in self.dirs):
+                    self.known.pop(path, None)
+            for path, signature in changed:
+                priority = self.CHANGED if path in self.known else self.NEW
+                self.known[path] = signature
+                queued += self.enqueue(path, priority)
+        return queued
+
+    def watch(self):
+        """Scans the watched directories every interval seconds until the service stops"""
+        while not self.stopped.wait(self.interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print("Scan failed:", e, file=sys.stderr)
+
+    def done(self, future):
+        """Hands a finished analysis to the dispatcher"""
+        with self.condition:
+            self.finished.append(future)
+            self.condition.notify_all()
+
+    def ready(self):
+        """Checks if the dispatcher has something to do. The caller holds the condition"""
+        return bool(self.finished) or self.stopping or (bool(self.queued) and len(self.running) < self.jobs)
+
+    def status(self):
+        """Returns the state of the service
+
+        Returns:
+            dict: watched directories, number of queued files, the next queued files, the running files
+                and the number of finished and failed analyses since the start
+        """
+        with self.condition:
+            waiting = sorted(entry for entry in self.queue if entry[-1] is not None)
+            return {"dirs": self.dirs, "queued": len(waiting), "next": [entry[-1] for entry in waiting[:20]],
+                    "running": sorted(path for path, start in self.running.values()), **self.counts}
+
+    def result(self, path):
+        """Returns what is known about an ontology file
+
+        Args:
+            path (str): path to ontology file
+
+        Returns:
+            dict: the record of the job manifest, see JobManifest.get, with the status "queued" or "running"
+                while it waits or is analyzed, None if the file is unknown
+        """
+        path = os.path.abspath(path)
+        manifest = JobManifest(self.manifest_path)
+        try:
+            state = manifest.get(path)
+        finally:
+            manifest.close()
+        with self.condition:
+            if path in self.queued:
+                state = dict(state or {"ontology": path}, status="queued")
+            elif any(path == running for running, start in self.running.values()):
+                state = dict(state or {"ontology": path}, status="running")
+        return state
+
+    def serve(self):
+        """Starts the HTTP server in a background thread
+
+        Returns:
+            tuple: address and port the server listens on
+        """
+        from http.server import ThreadingHTTPServer
+        self.server = ThreadingHTTPServer(self.address, service_handler(self))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address
+
+    def stop(self):
+        """Stops the service, the running analyses are finished and the queued files are left for the next start"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.stopped.set()
+
+    def run(self):
+        """Watches, analyzes and serves until stop is called, SIGTERM or SIGINT is received"""
+        import signal
+        from concurrent.futures.process import BrokenProcessPool
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        manifest = JobManifest(self.manifest_path)
+        self.known = manifest.finished()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda signum, frame: self.stop())
+        run_log = RunLog(TELEMETRY, PROFILE)
+        run_log.write([{"event": "run", "time": time.time(), "ontology": None, "dir": self.dirs, "ontologies": None, "jobs": self.jobs, "kept": len(self.known)}])
+        executor = worker_pool(self.jobs)
+        for _ in range(self.jobs):
+            executor.submit(warm_up)
+        self.scan()
+        if self.address[1] is not None:
+            print("Serving on http://%s:%d" % self.serve()[:2], flush=True)
+        print("Watching %s, %d ontologies queued" % (", ".join(self.dirs), self.status()["queued"]), flush=True)
+        watcher = threading.Thread(target=self.watch, daemon=True)
+        watcher.start()
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(self.ready, timeout=self.interval)
+                    finished, self.finished = self.finished, []
+                    if self.stopping and not self.running and not finished:
+                        break
+                    todo = []
+                    busy = {path for path, start in self.running.values()}
+                    while not self.stopping and len(self.running) + len(todo) < self.jobs and \
+                            not ((self.running or todo) and MAX_RSS and current_rss() > MAX_RSS):
+                        path = self.pop()
+                        if path is None:
+                            break
+                        if path in busy:
+                            # a file that changed while it is analyzed is queued again once the analysis finished
+                            self.deferred.add(path)
+                        elif os.path.isfile(path):
+                            busy.add(path)
+                            todo.append(path)
+                for future in finished:
+                    with self.condition:
+                        path, start = self.running.pop(future)
+                    try:
+                        result = run_log.add(future.result())
+                    except BrokenProcessPool as e:
+                        if self.stopping:
+                            # interrupted workers, the ontology stays running in the manifest and is analyzed after a restart
+                            continue
+                        result = {"ontology": path, "stages": {}, "error": str(e), "remote_errors": [], "reasoner": None}
+                    except Exception as e:
+                        result = {"ontology": path, "stages": {}, "error": str(e), "remote_errors": [], "reasoner": None}
+                        run_log.write([{"event": "error", "time": time.time(), "ontology": path, "stage": "worker", "error": str(e)}])
+                    status = manifest.finish(result)
+                    with self.condition:
+                        self.counts[status] += 1
+                    print("%s %s %.2fs" % (status, path, time.perf_counter() - start), flush=True)
+                    if path in self.deferred and os.path.isfile(path):
+                        self.deferred.discard(path)
+                        self.enqueue(path, self.CHANGED)
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        # a worker died, the pool cannot be used any more
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = worker_pool(self.jobs)
+                for path in todo:
+                    manifest.start(path)
+                    remove_reports(path, ResultsIndex.SUFFIXES)
+                    with self.condition:
+                        future = executor.submit(analyze_ontology, path)
+                        self.running[future] = (path, time.perf_counter())
+                    future.add_done_callback(self.done)
+        finally:
+            self.stop()
+            if self.server is not None:
+                self.server.shutdown()
+                self.server.server_close()
+            executor.shutdown(wait=True, cancel_futures=True)
+            if get_cache() is not None:
+                get_cache().evict()
+            run_log.write([{"event": "run_end", "time": time.time(), "ontology": None, "wall": None, "ontologies": sum(self.counts.values()), "errors": self.counts["failed"]}])
+            run_log.close()
+            manifest.close()
+
+def service_handler(service):
+    """Creates the request handler class of the HTTP server of an AnalysisService
+
+    Args:
+        service (AnalysisService): the service
+
+    Returns:
+        type: BaseHTTPRequestHandler subclass
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def reply(self, status, value):
+            body = json.dumps(value).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            if url.path == "/status":
+                return self.reply(200, service.status())
+            if url.path == "/result":
+                if not query.get("path"):
+                    return self.reply(400, {"error": "path is missing"})
+                state = service.result(query["path"][0])
+                if state is None:
+                    return self.reply(404, {"error": "unknown ontology", "path": query["path"][0]})
+                return self.reply(200, state)
+            self.reply(404, {"error": "not found"})
 
-def get_used_onts( ontology_dir):
-    """Get every ontology that is used in given ontology via namespace
+        def do_POST(self):
+            url = urllib.parse.urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if url.path != "/analyze":
+                return self.reply(404, {"error": "not found"})
+            try:
+                path = json.loads(body or b"{}")["path"]
+            except (ValueError, KeyError, TypeError):
+                return self.reply(400, {"error": "expected a json object with the path of an ontology file"})
+            if not isinstance(path, str) or not os.path.isfile(path):
+                return self.reply(404, {"error": "no such file", "path": path})
+            submitted = service.submit(path)
+            self.reply(202, {"path": os.path.abspath(path), "submitted": submitted, **service.status()})
+
+    return Handler
+
+def remove_reports(ontology_dir, kinds):
+    """Removes the reports of an ontology and their rows in the results store so they are written again
 
     Args:
         ontology_dir (str): path to ontology file
-    """ 
-    
-    ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename="_used_Ontologies.txt")
+        kinds (list): report kinds, see report_kind
+    """
+    for kind in kinds:
+        ontpath = name_path_ontpath(ontology_dir=ontology_dir, filename=ResultsIndex.SUFFIXES[kind])[1]
+        if os.path.isfile(ontpath):
+            os.remove(ontpath)
+        get_index().remove(kind, ontpath)
+
+def run_reasoner(ontology_dir, ctx=None, pending=None):
+    """Run reasoner for given ontology. The ontology already loaded in the analysis context is saved for the reasoner
+    which then runs in the bounded reasoner pool with the timeout REASONER_TIMEOUT and the heap REASONER_MEMORY.
+    The outcome is written to _reasoner.json and, if the ontology is not consistent, its error to _reasoner_error.txt
+
+    Args:
+        ontology_dir (str): path to ontology file
+        ctx (OntologyContext): shared analysis context, a new one is created if None
+        pending (list): the future of the reasoner outcome is appended here instead of waiting for it if given,
+            also if the outcome is known without running the reasoner
+
+    Returns:
+        dict: reasoner outcome, None if the reasoner runs in the background
+    """    
+    ctx = ctx or OntologyContext(ontology_dir)
+    stage = "reasoner:%s:%s:%s" % (REASONER, REASONER_TIMEOUT, REASONER_MEMORY)
+    outcome = ctx.cached(stage)
+    if outcome is not None:
+        return settled(finish_reasoner(ontology_dir, ctx, None, outcome), pending)
+    from owlready2 import owl_imports
+    tmp = tempfile.NamedTemporaryFile("wb", suffix=".nt", dir=QUADSTORE_DIR, delete=False)
     try:
-        g = Graph(bind_namespaces='none')
-        g.parse(ontology_dir)
+        onto = ctx.use("reasoner", "onto")
+        onto.world.save(tmp, format="ntriples", filter=lambda graph, s, p, o, d: p != owl_imports)
+        tmp.close()
     except Exception as e:
-        g.close()
-        with open(path +"/"+ontname+"Exception_while_Loading.txt", 'w') as f:
-                f.write(str(e))
-        return
-    nm = g.namespace_manager
-    used_onts = list(nm.namespaces())
-    g = None
-    nm = None
-    os.makedirs(path, exist_ok=True)
-    if( os.path.isfile(ontpath) and not os.path.getsize(ontpath) <= 0):
-        return
-    with open(str(ontpath), 'w') as f:
-        f.write("Used_Ontologies:" + str(len(used_onts)))
-        f.write('\n')
-        for ontname,iri in used_onts:
-            f.write(ontname + ": " + str(iri))
-            f.write('\n')
+        tmp.close()
+        os.remove(tmp.name)
+        return settled(finish_reasoner(ontology_dir, ctx, stage, {"reasoner": REASONER, "status": "error", "seconds": 0, "error": str(e)}), pending)
+    if pending is None:
+        return check_consistency(ontology_dir, ctx, stage, tmp.name)
+    pending.append(get_reasoner_pool().submit(check_consistency, ontology_dir, ctx, stage, tmp.name))
 
+def settled(outcome, pending):
+    """Hands a reasoner outcome that is known without running the reasoner to the caller of run_reasoner
 
-def get_ont_files(dir):
-    """Get all ontology files ending with owl and ttl in a given dir
+    Args:
+        outcome (dict): reasoner outcome
+        pending (list): a finished future of the outcome is appended here if given
+
+    Returns:
+        dict: the outcome, None if it was appended to pending
+    """
+    if pending is None:
+        return outcome
+    from concurrent.futures import Future
+    future = Future()
+    future.set_result(outcome)
+    pending.append(future)
+
+def get_reasoner_pool():
+    """Returns the thread pool of this process the reasoners are run in, it is created on first use
+
+    Returns:
+        ThreadPoolExecutor: the pool
+    """
+    global _reasoner_pool
+    if _reasoner_pool is None:
+        _reasoner_pool = ThreadPoolExecutor(max_workers=REASONER_JOBS)
+    return _reasoner_pool
+
+def reasoner_command(filename):
+    """Builds the java command line of the selected reasoner, the same as the one used by owlready2
 
     Args:
-        dir (str): dir to search for files
+        filename (str): path to the N-Triples file to reason on
 
     Returns:
-        list: all paths to the ontology files
-    """    
-    return  [os.path.join(dp, f) for dp, dn, filenames in os.walk(dir) for f in filenames if os.path.splitext(f)[1] == '.owl' or os.path.splitext(f)[1] == '.ttl']
+        list: command line
+    """
+    import owlready2.reasoning
+    heap = "-Xmx%sM" % REASONER_MEMORY
+    if REASONER == "pellet":
+        return [owlready2.JAVA_EXE, heap, "-cp", owlready2.reasoning._PELLET_CLASSPATH, "pellet.Pellet", "realize", "--loader", "Jena", "--input-format", "N-Triples", "--ignore-imports", filename]
+    return [owlready2.JAVA_EXE, heap, "-cp", owlready2.reasoning._HERMIT_CLASSPATH, "org.semanticweb.HermiT.cli.CommandLine", "-c", "-O", "-D", "-I", "file:///%s" % filename.replace('\\','/')]
 
-def get_all_for_all_onts_in_dir(dir):
-    """Generate everything(foops,fair,oops,used_onts, random classes, reasoner) for every ontology in the given dir
+def check_consistency(ontology_dir, ctx, stage, filename):
+    """Runs the reasoner on a saved ontology and records its outcome
 
     Args:
-        dir (str): path to ontology file
-    """    
-    onts = get_ont_files(dir)
-    with alive_bar(len(onts), ctrl_c=False, title=f'Processed Onts ')  as bar:
-        for o in onts:
-            o_old = None
-            if(".ttl" in o):
-                o_old = o
-                o = ttl_to_owl(o)
-            try:
-                if not o_old: 
-                    get_used_onts(o) 
-                else: 
-                    get_used_onts(o_old)
-                get_random_classes_fair_foops(5, o, True)
-                get_oops_pitfalls(o)
-            except Exception as e:  
-                pass
-            run_reasoner(o)
-            bar()
+        ontology_dir (str): path to ontology file
+        ctx (OntologyContext): analysis context the outcome is cached for
+        stage (str): cache stage of the outcome
+        filename (str): path to the saved ontology, it is deleted afterwards
 
+    Returns:
+        dict: reasoner, status ("consistent", "inconsistent", "timeout", "oom" or "error"), seconds and error message
+    """
+    outcome = {"reasoner": REASONER, "status": "consistent", "seconds": 0, "error": None}
+    if REASONER_SLOTS is not None:
+        REASONER_SLOTS.acquire()
+    start = time.perf_counter()
+    try:
+        reply = subprocess.run(reasoner_command(filename), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=REASONER_TIMEOUT)
+        output = (reply.stdout + reply.stderr).decode("utf-8", errors="replace")
+        if reply.returncode != 0:
+            if "OutOfMemoryError" in output:
+                outcome["status"] = "oom"
+            elif "Inconsistent ontology" in output or "Ontology is inconsistent" in output:
+                outcome["status"] = "inconsistent"
+            else:
+                outcome["status"] = "error"
+            outcome["error"] = output
+    except subprocess.TimeoutExpired:
+        outcome["status"] = "timeout"
+        outcome["error"] = "Reasoner did not finish within %s seconds" % REASONER_TIMEOUT
+    except OSError as e:
+        # a missing java is no property of the ontology and is not cached
+        outcome["status"] = "error"
+        outcome["error"] = str(e)
+        stage = None
+    finally:
+        outcome["seconds"] = time.perf_counter() - start
+        if REASONER_SLOTS is not None:
+            REASONER_SLOTS.release()
+        os.remove(filename)
+    return finish_reasoner(ontology_dir, ctx, stage, outcome)
 
-def run_reasoner(ontology_dir):
-    """Run reasoner for given ontology
+def finish_reasoner(ontology_dir, ctx, stage, outcome):
+    """Caches a reasoner outcome and writes the reasoner reports
 
     Args:
         ontology_dir (str): path to ontology file
-    """    
+        ctx (OntologyContext): analysis context the outcome is cached for
+        stage (str): cache stage of the outcome, not cached if None
+        outcome (dict): reasoner outcome
+
+    Returns:
+        dict: reasoner outcome
+    """
+    if stage is not None:
+        ctx.store(stage, outcome)
     ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename="_reasoner_error.txt")
-    try:
-        onto = get_ontology("file://"+ontology_dir).load()
-        with onto:     
-            sync_reasoner()
-    except Exception as e:
-        with open(ontpath, 'w') as f:
-            f.write(str(e))
+    os.makedirs(path, exist_ok=True)
+    with atomic_write(os.path.join(path, ontname + "_reasoner.json")) as f:
+        json.dump(outcome, f)
+    get_index().add("reasoner", os.path.join(path, ontname + "_reasoner.json"), outcome)
+    # timeouts, memory exhaustion and inconsistencies are results, errors such as a missing java are not
+    ctx.finished("reasoner", outcome["error"] if outcome["status"] == "error" else None)
+    if outcome["status"] != "consistent":
+        with atomic_write(ontpath) as f:
+            f.write(outcome["error"])
+    elif os.path.isfile(ontpath):
+        os.remove(ontpath)
+    return outcome
 
         
 
-def ttl_to_owl(dir):
-    """Converts ttl ontology to owl ontology
+class RateLimiter:
+    """Token bucket limiting the request rate to a remote service
+
+    Args:
+        rate (float): requests per second, unlimited if None
+        burst (int): number of requests that can be sent at once
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request may be sent"""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class RemoteClient:
+    """Connection-pooled client for the OOPS, FOOPS and FAIR-Checker services. Every service gets its own
+    keep-alive connection pool, concurrency limit and rate limiter. Failed requests are retried with exponential backoff.
+
+    Args:
+        endpoints (dict): service urls by service name ("oops", "foops", "fair")
+        concurrency (dict): maximum number of parallel requests per service
+        rate (dict): maximum requests per second per service
+        timeout (tuple): connect and read timeout in seconds
+        retries (int): maximum number of retries of a failed request
+        backoff (float): delay before the first retry in seconds, doubled for every further retry
+        max_backoff (float): maximum delay between two retries in seconds
+        slots (dict): semaphores limiting the parallel requests per service, shared with other processes,
+            the concurrency limits of this client are used if None
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, endpoints=None, concurrency=None, rate=None, timeout=(10, 300), retries=5, backoff=1.0, max_backoff=60.0, slots=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.endpoints = {"oops": OOPS_URL, "foops": FOOPS_URL, "fair": FAIR_URL}
+        self.endpoints.update(endpoints or {})
+        self.concurrency = {"oops": 2, "foops": 4, "fair": 4}
+        self.concurrency.update(concurrency or {})
+        rates = {"oops": 1.0, "foops": 2.0, "fair": 2.0}
+        rates.update(rate or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        for service, url in self.endpoints.items():
+            self.session.mount(url, HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency[service]))
+        self.semaphores = {service: threading.BoundedSemaphore(n) for service, n in self.concurrency.items()}
+        self.semaphores.update(slots or {})
+        self.limiters = {service: RateLimiter(r) for service, r in rates.items()}
+        self.executor = ThreadPoolExecutor(max_workers=sum(self.concurrency.values()))
+        self._jitter = random.Random()
+
+    def request(self, service, method, url, **kwargs):
+        """Sends a request to a service and retries it on connection errors, timeouts and overload responses
+
+        Args:
+            service (str): service name ("oops", "foops", "fair")
+            method (str): http method
+            url (str): request url
+            **kwargs: further arguments of requests.Session.request
+
+        Raises:
+            requests.RequestException: if the request still fails after the last retry
+
+        Returns:
+            requests.Response: response of the service. With stream=True the request keeps its place in the
+                concurrency limit of the service until the response is closed, so reading the body is limited as well
+        """
+        import requests
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        attempts = 0
+        status = None
+        failure = None
+        try:
+            for attempt in range(self.retries + 1):
+                reply = None
+                error = None
+                attempts += 1
+                semaphore = self.semaphores[service]
+                semaphore.acquire()
+                held = True
+                try:
+                    self.limiters[service].acquire()
+                    try:
+                        reply = self.session.request(method, url, **kwargs)
+                    except (requests.ConnectionError, requests.Timeout) as e:
+                        error = e
+                    if reply is not None and reply.status_code not in self.RETRY_STATUS and kwargs.get("stream"):
+                        release_on_close(reply, semaphore)
+                        held = False
+                finally:
+                    if held:
+                        semaphore.release()
+                status = reply.status_code if reply is not None else None
+                if reply is not None and reply.status_code not in self.RETRY_STATUS:
+                    try:
+                        reply.raise_for_status()
+                    except requests.HTTPError:
+                        reply.close()
+                        raise
+                    return reply
+                if attempt == self.retries:
+                    if reply is not None:
+                        reply.raise_for_status()
+                    raise error
+                if reply is not None:
+                    reply.close()
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                time.sleep(delay * self._jitter.uniform(0.5, 1.0))
+        except Exception as e:
+            failure = str(e)
+            raise
+        finally:
+            telemetry = get_telemetry()
+            if telemetry is not None:
+                telemetry.emit("request", service=service, method=method, seconds=time.perf_counter() - start,
+                               attempts=attempts, status=status, error=failure)
+
+    def resolves(self, iri):
+        """Checks if an iri can be fetched, which is what OOPS does with a submitted iri
+
+        Args:
+            iri (str): http or https iri
+
+        Returns:
+            bool: True if the iri answers with a status below 400
+        """
+        import requests
+        headers = {"Accept": "application/rdf+xml, text/turtle;q=0.9, */*;q=0.1"}
+        try:
+            with self.session.head(iri, headers=headers, allow_redirects=True, timeout=(5, 10)) as reply:
+                if reply.status_code == 405:
+                    # servers that do not allow HEAD are asked with a GET whose body is not read
+                    with self.session.get(iri, headers=headers, timeout=(5, 10), stream=True) as reply:
+                        return reply.status_code < 400
+                return reply.status_code < 400
+        except requests.RequestException:
+            return False
+
+    def submit(self, fn, *args):
+        """Runs fn in the background
+
+        Returns:
+            concurrent.futures.Future: future of the call
+        """
+        return self.executor.submit(fn, *args)
+
+    def close(self):
+        """Waits for the background calls and closes the connection pools"""
+        self.executor.shutdown()
+        self.session.close()
+
+
+def release_on_close(reply, semaphore):
+    """Releases a semaphore once when a response is closed, also when it is closed by its with block
+
+    Args:
+        reply (requests.Response): streamed response
+        semaphore (threading.Semaphore): acquired semaphore
+    """
+    close = reply.close
+    released = threading.Lock()
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            if released.acquire(blocking=False):
+                semaphore.release()
+
+    reply.close = close_and_release
+
+
+def configure_client(**settings):
+    """Sets the RemoteClient arguments used by get_client and drops the current client
+
+    Args:
+        **settings: RemoteClient arguments
+    """
+    global CLIENT_SETTINGS, _client
+    CLIENT_SETTINGS = settings
+    if _client is not None:
+        _client.close()
+    _client = None
+
+def get_client():
+    """Returns the RemoteClient of this process, it is created on first use
+
+    Returns:
+        RemoteClient: the client
+    """
+    global _client
+    if _client is None:
+        _client = RemoteClient(**CLIENT_SETTINGS)
+    return _client
+
+def worker_client_settings(jobs, mp_context):
+    """Shares the concurrency limits of the remote services between the worker processes, like the reasoner slots,
+    and splits their rates
 
     Args:
-        dir (str): path to ttl ontology file
+        jobs (int): number of worker processes
+        mp_context (multiprocessing.context.BaseContext): context the worker processes are started with
 
     Returns:
-        str: path to owl ontology file
-    """    
-    g = Graph()
-    g.parse(dir)
-    g.serialize(format="pretty-xml", destination=dir.split(".ttl")[0]+".owl")
-    g.close()
-    return dir.split(".ttl")[0]+".owl"
+        dict: RemoteClient arguments of a worker
+    """
+    client = get_client()
+    settings = dict(CLIENT_SETTINGS)
+    settings["slots"] = {service: mp_context.BoundedSemaphore(n) for service, n in client.concurrency.items()}
+    settings["rate"] = {service: limiter.rate / jobs if limiter.rate else None for service, limiter in client.limiters.items()}
+    return settings
 
-def get_oops_pitfalls(ontology_dir):
+def run_remote(pending, fn, *args):
+    """Runs a remote assessment in the background if pending is a list, else waits for it
+
+    Args:
+        pending (list): list the future of the assessment is appended to, or None
+        fn (function): the assessment
+        *args: arguments of fn
+    """
+    if pending is None:
+        fn(*args)
+    else:
+        pending.append(get_client().submit(fn, *args))
+
+class OOPSRequest:
+    """Body of an OOPS request that is streamed in chunks from the ontology file instead of being built in memory.
+    Every iteration yields the whole body again, so a failed request can be retried
+
+    Args:
+        iri (str): iri OOPS fetches the ontology from, or None
+        source (str): path of the RDF/XML file that is submitted if no iri is given
+        compress (bool): gzip the body, it is then sent with chunked transfer encoding
+        temporary (bool): source is deleted by close
+    """
+
+    HEAD = b"""<?xml version="1.0" encoding="UTF-8"?>
+        <OOPSRequest>
+          <OntologyUrl>%s</OntologyUrl>
+          <OntologyContent>"""
+    TAIL = b"""</OntologyContent>
+            <Pitfalls>2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13, 19, 20, 21, 22, 24, 25, 25, 26, 27, 28, 29</Pitfalls>
+	      <OutputFormat>RDF/XML</OutputFormat>
+	    </OOPSRequest>"""
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, iri=None, source=None, compress=False, temporary=False):
+        self.iri = iri
+        self.source = None if iri else source
+        self.compress = compress
+        self.temporary = temporary and source is not None
+        self._len = None
+
+    def chunks(self):
+        """Yields the uncompressed body in chunks"""
+        from xml.sax.saxutils import escape
+        yield self.HEAD % escape(self.iri or "").encode('utf-8')
+        if self.source is not None:
+            yield b"<![CDATA[ "
+            with open(self.source, 'rb') as f:
+                carry = b""
+                while True:
+                    chunk = f.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    chunk = carry + chunk
+                    # a trailing "]" or "]]" may start a "]]>" that ends in the next chunk
+                    keep = 2 if chunk.endswith(b"]]") else 1 if chunk.endswith(b"]") else 0
+                    chunk, carry = chunk[:len(chunk) - keep], chunk[len(chunk) - keep:]
+                    yield chunk.replace(b"]]>", b"]]]]><![CDATA[>")
+                yield carry
+            yield b" ]]>"
+        yield self.TAIL
+
+    def __iter__(self):
+        if not self.compress:
+            yield from self.chunks()
+            return
+        compressor = zlib.compressobj(wbits=31)
+        for chunk in self.chunks():
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @property
+    def len(self):
+        """Length of the uncompressed body, read by requests to send a Content-Length instead of chunks"""
+        if self.compress:
+            return None
+        if self._len is None:
+            self._len = sum(len(chunk) for chunk in self.chunks())
+        return self._len
+
+    def close(self):
+        """Deletes a temporary source file"""
+        if self.temporary and os.path.exists(self.source):
+            os.remove(self.source)
+
+
+def oops_iri(ctx, resolve=True):
+    """Returns the iri OOPS can fetch the ontology of a context from
+
+    Args:
+        ctx (OntologyContext): analysis context of the ontology
+        resolve (bool): check that the iri resolves
+
+    Returns:
+        str: base iri of the ontology without fragment, None if it is no http iri or does not resolve
+    """
+    summary = ctx.streamed("oops")
+    try:
+        iri = summary["base_iri"] if summary is not None else ctx.use("oops", "onto").base_iri
+    except Exception:
+        return None
+    iri = (iri or "").rstrip("#")
+    if not iri.startswith(("http://", "https://")) or (resolve and not get_client().resolves(iri)):
+        return None
+    return iri
+
+def get_oops_pitfalls(ontology_dir, ctx=None, pending=None):
     """Generate OOPS report via sourcecode. Adapted from  https://github.com/OnToology/oops-report/blob/master/main.py
+    With OOPS_ROUTE "auto" the iri is submitted if it resolves and the content is uploaded otherwise, "iri" submits
+    the iri whenever the ontology has an http iri and "content" always uploads. The content is streamed from the
+    RDF/XML file, gzip compressed if OOPS_GZIP is set. Uploads larger than OOPS_MAX_BYTES are skipped.
 
     Args:
         ontology_dir (str): path to ontology file
+        ctx (OntologyContext): shared analysis context, a new one is created if None
+        pending (list): the future of the request is appended here instead of waiting for it if given
     """    
     ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename="_OOPS.txt")
-    while(not os.path.isfile(ontpath) or os.path.getsize(ontpath) <= 0):
-        g= Graph()
-        g.parse(ontology_dir)
-        v = g.serialize(format="xml")
-        url = "https://oops.linkeddata.es/rest"
-        xml_content = """<?xml version="1.0" encoding="UTF-8"?>
-        <OOPSRequest>
-          <OntologyUrl></OntologyUrl>
-          <OntologyContent><![CDATA[ %s ]]></OntologyContent>
-            <Pitfalls>2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13, 19, 20, 21, 22, 24, 25, 25, 26, 27, 28, 29</Pitfalls>
-	      <OutputFormat>RDF/XML</OutputFormat>
-	    </OOPSRequest>""" % (v)
+    ctx = ctx or OntologyContext(ontology_dir)
+    if ctx.keep_output(ontpath):
+        add_report(ctx, "oops", ontpath)
+        return
+    report = ctx.cached("oops")
+    if report is not None:
+        os.makedirs(path, exist_ok=True)
+        with atomic_write(ontpath, encoding='utf-8') as f:
+            f.write(report)
+        add_report(ctx, "oops", ontpath, report)
+    else:
+        iri = oops_iri(ctx, OOPS_ROUTE == "auto") if OOPS_ROUTE != "content" else None
+        if iri is not None:
+            data = OOPSRequest(iri=iri, compress=OOPS_GZIP)
+            ctx.consumed["oops"] = "iri"
+        else:
+            limit = "%d bytes exceed the OOPS upload limit of %s bytes"
+            if OOPS_MAX_BYTES is not None and os.path.getsize(ontology_dir) > OOPS_MAX_BYTES:
+                ctx.finished("oops", limit % (os.path.getsize(ontology_dir), OOPS_MAX_BYTES), "skipped")
+                return
+            if stream_format(ontology_dir) == "xml":
+                # RDF/XML is sent as it is instead of parsing and serializing it again
+                data = OOPSRequest(source=ontology_dir, compress=OOPS_GZIP)
+                ctx.consumed["oops"] = "file"
+            else:
+                fd, source = tempfile.mkstemp(suffix=".owl", dir=QUADSTORE_DIR)
+                with open(fd, 'wb') as f:
+                    ctx.use("oops", "graph").serialize(destination=f, format="xml")
+                data = OOPSRequest(source=source, compress=OOPS_GZIP, temporary=True)
+                if OOPS_MAX_BYTES is not None and os.path.getsize(source) > OOPS_MAX_BYTES:
+                    ctx.finished("oops", limit % (os.path.getsize(source), OOPS_MAX_BYTES), "skipped")
+                    data.close()
+                    return
         headers = {
             'Connection': 'Keep-Alive',
             'Accept': 'application/xml'
         }
-        g.close()
+        if OOPS_GZIP:
+            headers['Content-Encoding'] = 'gzip'
         os.makedirs(path, exist_ok=True)
-        with open(ontpath, 'wb') as f:
-            with requests.post(url, headers=headers, data=xml_content.encode('utf-8'), stream=True) as reply:
-                reply.raw.decode_content = True
-                copyfileobj(reply.raw,f)
-        sum_oops(path, "Sum_OOPS_Pitfalls")
+        run_remote(pending, post_oops_request, ontpath, data, headers, ctx)
 
 def get_oops_pitfalls2(ontology_dir, iri):
     """Generate OOPS report via iri. Adapted from  https://github.com/OnToology/oops-report/blob/master/main.py
@@ -200,8 +3623,7 @@ def get_oops_pitfalls2(ontology_dir, iri):
         ontology_dir (str): path to ontology file
     """    
     ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename="_OOPS.txt")
-    while(not os.path.isfile(ontpath) or os.path.getsize(ontpath) <= 0):
-        url = "https://oops.linkeddata.es/rest"
+    if(not os.path.isfile(ontpath) or os.path.getsize(ontpath) <= 0):
         xml_content = """<?xml version="1.0" encoding="UTF-8"?>
         <OOPSRequest>
           <OntologyUrl>%s</OntologyUrl>
@@ -209,35 +3631,72 @@ def get_oops_pitfalls2(ontology_dir, iri):
             <Pitfalls>2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13, 19, 20, 21, 22, 24, 25, 25, 26, 27, 28, 29</Pitfalls>
             <OutputFormat>XML</OutputFormat>
         </OOPSRequest>""" % (iri)
+        from requests.structures import CaseInsensitiveDict
         headers = CaseInsensitiveDict()
         headers["Accept"] = "application/json"
         headers["Content-Type"] = "application/xml"
         headers = {'Content-Type':'rdf/xml'}
         os.makedirs(path, exist_ok=True)
-        with open(ontpath, 'wb') as f:
-            with requests.post(url, headers=headers, data=xml_content.encode('utf-8'), stream=True) as reply:
+        post_oops_request(ontpath, xml_content.encode('utf-8'), headers)
+
+def post_oops_request(ontpath, data, headers, ctx=None):
+    """Sends an OOPS request and streams the report to ontpath
+
+    Args:
+        ontpath (str): path of the OOPS report
+        data (bytes): OOPS request, or an OOPSRequest that is closed afterwards
+        headers (dict): request headers
+        ctx (OntologyContext): analysis context the report is cached for, not cached if None
+    """
+    client = get_client()
+    try:
+        with client.request("oops", "POST", client.endpoints["oops"], headers=headers, data=data, stream=True) as reply:
+            with atomic_write(ontpath, 'wb') as f:
                 reply.raw.decode_content = True
                 copyfileobj(reply.raw,f)
-        sum_oops(path, "Sum_OOPS_Pitfalls")
+    except Exception as e:
+        if ctx is not None:
+            ctx.finished("oops", str(e))
+        raise
+    finally:
+        if isinstance(data, OOPSRequest):
+            data.close()
+    with open(ontpath, 'r', encoding='utf-8', errors='replace') as f:
+        report = f.read()
+    if ctx is not None and ctx.cache is not None:
+        ctx.store("oops", report)
+    add_report(ctx, "oops", ontpath, report)
 
-def get_foops_report(ontology_dir, iri):
+def get_foops_report(ontology_dir, iri, ctx=None):
     """Generate FOOPS report via iri.
 
     Args:
         ontology_dir (str): path to ontology file
         iri (str): ontology iri
+        ctx (OntologyContext): shared analysis context, a new one is created if None
     """    
     ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename="_FOOPS.json")
-    while(not os.path.isfile(ontpath) or os.path.getsize(ontpath) <= 0):
-        url = "https://foops.linkeddata.es/assessOntology"
+    ctx = ctx or OntologyContext(ontology_dir)
+    if ctx.keep_output(ontpath):
+        add_report(ctx, "foops", ontpath)
+        return
+    report = ctx.cached("foops")
+    if report is None:
+        client = get_client()
+        from requests.structures import CaseInsensitiveDict
         headers = CaseInsensitiveDict()
         headers["Accept"] = "application/json"
-        os.makedirs(path, exist_ok=True)
-        with open(ontpath, 'w') as f:
-            with requests.post(url, headers=headers, json={"ontologyUri": str(iri)}, stream=True)as reply:
-                #reply.raw.decode_content = True
-                json.dump(reply.json(),f)
-                #copyfileobj(reply.raw,f)
+        try:
+            with client.request("foops", "POST", client.endpoints["foops"], headers=headers, json={"ontologyUri": str(iri)}) as reply:
+                report = reply.json()
+        except Exception as e:
+            ctx.finished("foops", str(e))
+            raise
+        ctx.store("foops", report)
+    os.makedirs(path, exist_ok=True)
+    with atomic_write(ontpath) as f:
+        json.dump(report,f)
+    add_report(ctx, "foops", ontpath, report)
 
 def name_path_ontpath(ontology_dir, filename):
     """helper function generating ontname, ontpath and path from path to ontology file and filename
@@ -258,22 +3717,37 @@ def name_path_ontpath(ontology_dir, filename):
         ontpath = OUTPUT_DIR+ontname+"/"+ontname+filename
     return ontname, ontpath, path
 
-def get_faircheck_report(ontology_dir, iri):
+def get_faircheck_report(ontology_dir, iri, ctx=None):
     """Generate FAIR Check from IRI
 
     Args:
         ontology_dir (str): path to ontology file
         iri (str): ontology iri
+        ctx (OntologyContext): shared analysis context, a new one is created if None
     """    
     ontname, ontpath, path = name_path_ontpath(ontology_dir=ontology_dir,filename="_Fair_Checker.json")
-    while(not os.path.isfile(ontpath) or os.path.getsize(ontpath) <= 0):
-        url = "https://fair-checker.france-bioinformatique.fr/api/check/metrics_all?url={0}".format(urllib.parse.quote(str(iri), safe=''))
+    ctx = ctx or OntologyContext(ontology_dir)
+    if ctx.keep_output(ontpath):
+        add_report(ctx, "fair", ontpath)
+        return
+    report = ctx.cached("fair")
+    if report is None:
+        client = get_client()
+        url = client.endpoints["fair"] + "?url={0}".format(urllib.parse.quote(str(iri), safe=''))
+        from requests.structures import CaseInsensitiveDict
         headers = CaseInsensitiveDict()
         headers["Accept"] = "application/json"
-        os.makedirs(path, exist_ok=True)
-        with open(ontpath, 'w') as f:
-            with requests.get(url, headers=headers, stream=True)as reply:
-                json.dump(parse_faircheck_json(reply.json()),f)
+        try:
+            with client.request("fair", "GET", url, headers=headers) as reply:
+                report = parse_faircheck_json(reply.json())
+        except Exception as e:
+            ctx.finished("fair", str(e))
+            raise
+        ctx.store("fair", report)
+    os.makedirs(path, exist_ok=True)
+    with atomic_write(ontpath) as f:
+        json.dump(report,f)
+    add_report(ctx, "fair", ontpath, report)
             
 
 def parse_faircheck_json(payload):
@@ -306,22 +3780,10 @@ def sum_class_prop(dir,filename):
         dir (str): path to ontology rports (generated via get_random_classes_fair_foops)
         filename (str): filename where the sum should be saved
     """    
-    files = [os.path.join(dp, f) for dp, dn, filenames in os.walk(dir) for f in filenames if os.path.splitext(f)[1] == '.txt' and "_OOPS" not in os.path.splitext(f)[0]and "exception" not in os.path.splitext(f)[0]and "_used_Ontologies" not in os.path.splitext(f)[0] and filename not in os.path.splitext(f)[0]]  
-    sum_classes = 0
-    sum_anot_prop = 0
-    sum_data_prop = 0
-    sum_object_prop = 0
-    sum_total_prop = 0
-    with alive_bar(len(files), ctrl_c=False, title=f'Processed Onts')  as bar:
-        for file in files:
-            with open(file, "r") as f:
-                sum_classes += int(f.readline().split(':')[1])
-                sum_anot_prop += int(f.readline().split(':')[1])
-                sum_data_prop += int(f.readline().split(':')[1])
-                sum_object_prop += int(f.readline().split(':')[1]) 
-                sum_total_prop += int(f.readline().split(':')[1])
-            bar()
-    with open(dir+filename+'.txt', 'w') as f:
+    sum_classes, sum_anot_prop, sum_data_prop, sum_object_prop, sum_total_prop = open_index(dir).select(
+        "SELECT COALESCE(SUM(classes), 0), COALESCE(SUM(annotation_properties), 0), COALESCE(SUM(data_properties), 0), "
+        "COALESCE(SUM(object_properties), 0), COALESCE(SUM(properties), 0) FROM sizes WHERE report >= ?1 AND report < ?1 || x'ff'", dir)[0]
+    with atomic_write(dir+filename+'.txt') as f:
         f.write("Classes:" + str(sum_classes))
         f.write('\n')
         f.write("Annotation properties:" + str(sum_anot_prop))
@@ -341,28 +3803,23 @@ def sum_used_onts(dir,filename):
         dir (str): path to ontology rports (generated via get_used_onts)
         filename (str): filename where the sum should be saved
     """   
-    files = [os.path.join(dp, f) for dp, dn, filenames in os.walk(dir) for f in filenames if os.path.splitext(f)[1] == '.txt' and "_used_Ontologies" in os.path.splitext(f)[0]and filename not in os.path.splitext(f)[0]]  
     results = {}
-    with alive_bar(len(files), ctrl_c=False, title=f'Processed Onts ')  as bar:
-        for file in files:
-            with open(file, "r") as f:
-                f.readline()
-                line = f.readline()
-                i = 0
-                while line:
-                    abrv = line.split(":")[0]
-                    iri = line.split(":",1)[1]
-                    if abrv:
-                        results[str(abrv)] = str(iri)
-                    elif "NO name" + str(i) in results.keys() and results["NO name" + str(i)] != str(iri):
-                        results["NO name" + str(i)] = str(iri)
-                        i = i + 1
-                    elif "NO name" + str(i) not in results.keys():
-                        results["NO name" + str(i)] = str(iri)
-                        i = i + 1
-                    line = f.readline()
-            bar()
-    with open(dir +filename+'.txt', 'w') as f:
+    current = None
+    for report, abrv, iri in open_index(dir).select("SELECT report, prefix, iri FROM namespaces WHERE report >= ?1 AND report < ?1 || x'ff' ORDER BY report, position", dir):
+        if report != current:
+            current = report
+            i = 0
+        # written as the values were read from the report lines before
+        iri = " " + iri + "\n"
+        if abrv:
+            results[str(abrv)] = str(iri)
+        elif "NO name" + str(i) in results.keys() and results["NO name" + str(i)] != str(iri):
+            results["NO name" + str(i)] = str(iri)
+            i = i + 1
+        elif "NO name" + str(i) not in results.keys():
+            results["NO name" + str(i)] = str(iri)
+            i = i + 1
+    with atomic_write(dir +filename+'.txt') as f:
         f.write("namespace --- iri" + "/n Used Ontologies:" + str(len(results)))
         for key, value in results.items():
             f.write('\n')
@@ -375,18 +3832,11 @@ def sum_oops(dir,filename):
         dir (str): path to ontology rports (generated via get_used_onts)
         filename (str): filename where the sum should be saved
     """   
-    files = [os.path.join(dp, f) for dp, dn, filenames in os.walk(dir) for f in filenames if os.path.splitext(f)[1] == '.txt' and "_OOPS" in os.path.splitext(f)[0]and filename not in os.path.splitext(f)[0]]  
     results = {"Minor":0, "Important":0}
-    with alive_bar(len(files), ctrl_c=False, title=f'Processed Onts ')  as bar:
-        for file in files:
-            with open(file, "r") as f:
-                for line in f.readlines():
-                    if "Importance" in line and "Minor" in line:
-                        results["Minor"] += 1
-                    elif "Importance" in line and "Important" in line:
-                        results["Important"] +=1
-            bar()
-    with open(dir +filename+'.txt', 'w') as f:
+    for importance, count in open_index(dir).select("SELECT importance, COUNT(*) FROM oops_pitfalls WHERE report >= ?1 AND report < ?1 || x'ff' GROUP BY importance", dir):
+        if importance in results:
+            results[importance] = count
+    with atomic_write(dir +filename+'.txt') as f:
         f.write("namespace --- iri" + " OOPS:" + str(len(results)))
         for key, value in results.items():
             f.write('\n')
@@ -399,93 +3849,489 @@ def mean_fair_foops(dir, filename):
         dir (str): path to ontology rports (generated via get_fair and get_foops)
         filename (str): filename where the sum should be saved
     """ 
-    files_foops = [os.path.join(dp, f) for dp, dn, filenames in os.walk(dir) for f in filenames if os.path.splitext(f)[1] == '.json' and "_FOOPS" in os.path.splitext(f)[0] and filename not in os.path.splitext(f)[0]]
-    files_fair = [os.path.join(dp, f) for dp, dn, filenames in os.walk(dir) for f in filenames if os.path.splitext(f)[1] == '.json' and "Fair_Checker" in os.path.splitext(f)[0]and filename not in os.path.splitext(f)[0]]  
+    index = open_index(dir)
+    scores_foops = index.select("SELECT overall_score FROM foops_scores WHERE report >= ?1 AND report < ?1 || x'ff' ORDER BY report", dir)
+    scores_fair = index.select("SELECT f, a, i, r FROM fair_scores WHERE report >= ?1 AND report < ?1 || x'ff' ORDER BY report", dir)
     results = {"FOOPS":0, "F":0, "A":0, "I":0, "R":0}
-    with alive_bar(len(files_foops + files_fair), ctrl_c=False, title=f'Processed Onts ')  as bar:
-        for file in files_foops + files_fair:
-            print(file)
-            with open(file, "r") as f:
-                data = json.load(f)
-                if("FOOPS" in file):
-                    results["FOOPS"] += data["overall_score"]
-                else:
-                    for key, value in data[0]["mean"].items():
-                        results[key] += value
-            bar()
-            print("end")
-    results["FOOPS"] /= len(files_foops)
-    results["F"] /= len(files_fair)
-    results["A"] /= len(files_fair)
-    results["I"] /= len(files_fair)
-    results["R"] /= len(files_fair)
-    with open(dir +filename+'.json', 'w') as f:
+    for (score,) in scores_foops:
+        results["FOOPS"] += score
+    for mean in scores_fair:
+        for key, value in zip("FAIR", mean):
+            results[key] += value
+    results["FOOPS"] /= len(scores_foops)
+    results["F"] /= len(scores_fair)
+    results["A"] /= len(scores_fair)
+    results["I"] /= len(scores_fair)
+    results["R"] /= len(scores_fair)
+    with atomic_write(dir +filename+'.json') as f:
         json.dump(results,f)
 
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
 
+def percentile(values, q):
+    """Returns a percentile of sorted values, interpolated linearly between the two closest ranks
 
-parser = argparse.ArgumentParser(prog = 'OntMetaScript',
-                    description = 'Gather Ontology Metadata and Analysis from Ont files',
-                    epilog = 'Text at the bottom of help')
-parser.add_argument("-o", "--output", help="Set output directory.",default='./analysis/')
-parser.add_argument("-a", "--analysis", help="Analyses all owl or ttl ontologies in the supplied directory and saves them.")
-parser.add_argument("-rf", "--random_classes_fair_foops", help=" n, ont_dir, bool Gets a given number n of random classes from the ontology file dir and gets FOOPS and FAIR report if bool is True. Also generates a normal report with the random classes in it", nargs=3)
-parser.add_argument("-fo", "--foops", help="Ont_dir, iri.Generate FOOPS Report of given ontology.",nargs=2)
-parser.add_argument("-fa", "--fair", help="Ont_dir, iri.Generate FAIR Report of given ontology, also generates a Mean fair score.",nargs=2)
-parser.add_argument("-oo", "--oops", help="Ont_dir.Generate OOPS Report of given ontology.")
-parser.add_argument("-r", "--reasoner", help="Ont_dir.Checks if Reasoner can be run.")
-parser.add_argument("-so", "--sum_onts", help="Dir, Name. Sums up the used onts of all ontologies in a dir and saves them in a file named Name. Used Ontologies report needed.",nargs=2)
-parser.add_argument("-scp", "--sum_classes_prop",help="Dir, Name. Sums up the classes and properties of all ontologies in a dir and saves them in a file named Name.Normal Report needed",nargs=2)
-parser.add_argument("-m", "--mean_fair_foops", help="Dir, Name. Means the Fair and foops score of all ontologies in a dir and saves them in a file named Name. FOOPS Report and FAIR Report needed",nargs=2)
+    Args:
+        values (list): sorted numbers
+        q (float): percentile between 0 and 100
 
-args = parser.parse_args()
+    Returns:
+        float: the percentile, None if there are no values
+    """
+    if not values:
+        return None
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
 
-init()
+def count_edges(values):
+    """Histogram edges 0, 1, 10, 100, ... up to above the largest value, the sizes of ontologies span orders of magnitude
 
-if args.output:
-    OUTPUT_DIR=args.output
-if args.analysis:
-    get_all_for_all_onts_in_dir(args.analysis)
-if args.random_classes_fair_foops:
-    try:
-        n = int(args.random_classes_fair_foops[0])
-        dir = args.random_classes_fair_foops[1]
-        bo = bool(args.random_classes_fair_foops[2])
-        get_random_classes_fair_foops(n,dir,bo)
-    except Exception as e:
-        print(e)
-if args.foops:
-    try:
-        get_foops_report(args.foops[0],args.foops[1])
-    except Exception as e:
-        print(e)
-if args.fair:
-    try:
-        get_faircheck_report(args.fair[0],args.fair[1])
-    except Exception as e:
-        print(e)
-if args.oops:
-    try:
-        get_oops_pitfalls(args.oops)
-    except Exception as e:
-        print(e)
-if args.reasoner:
-    try:
-        run_reasoner(args.reasoner)
-    except Exception as e:
-        print(e)
-if args.sum_onts:
-    try:
-        sum_used_onts(args.sum_onts[0],args.sum_onts[1])
-    except Exception as e:
-        print(e)
-if args.sum_classes_prop:
-    try:
-        sum_class_prop(args.sum_classes_prop[0],args.sum_classes_prop[1])
-    except Exception as e:
-        print(e)
-if args.mean_fair_foops:
-    try:
-        mean_fair_foops(args.mean_fair_foops[0],args.mean_fair_foops[1])
-    except Exception as e:
-        print(e)
+    Args:
+        values (list): non-negative counts
+
+    Returns:
+        list: ascending bin edges
+    """
+    largest = max((v for v in values if v is not None), default=0)
+    return [0] + [10 ** i for i in range(len(str(int(largest))) + 1)]
+
+def score_edges(values, bins=10):
+    """Equal-width histogram edges from 0 to the largest score, at least 1 (FOOPS scores go up to 1, FAIR means up to 2)
+
+    Args:
+        values (list): non-negative scores
+        bins (int): number of bins
+
+    Returns:
+        list: ascending bin edges
+    """
+    top = max(1, math.ceil(max((v for v in values if v is not None), default=0)))
+    return [round(top * i / bins, 10) for i in range(bins + 1)]
+
+def distribution(values, edges):
+    """Summarizes values by their count, extremes, mean, percentiles and histogram
+
+    Args:
+        values (list): numbers, None is left out
+        edges (list): ascending bin edges, a bin holds the values from its lower edge up to below its upper edge,
+            the first bin also holds smaller values and the last bin its upper edge and larger values
+
+    Returns:
+        dict: count, min, max, mean, percentiles by "p<q>" and histogram as a list of {"from", "to", "count"}
+    """
+    values = sorted(v for v in values if v is not None)
+    bounds = [0] + [bisect.bisect_left(values, edge) for edge in edges[1:-1]] + [len(values)]
+    return {"count": len(values), "min": values[0] if values else None, "max": values[-1] if values else None,
+            "mean": sum(values) / len(values) if values else None,
+            "percentiles": {"p%g" % q: percentile(values, q) for q in PERCENTILES},
+            "histogram": [{"from": edges[i], "to": edges[i + 1], "count": bounds[i + 1] - bounds[i]} for i in range(len(edges) - 1)]}
+
+def corpus_distributions(dir, filename):
+    """Describes all ontologies of a directory by distributions instead of totals and saves them in filename:
+    percentiles and histograms of the class and property counts, of the class structure metrics, of the pitfalls
+    per ontology and of the FOOPS and FAIR scores, how many ontologies use every namespace iri and how often every OOPS pitfall occurs.
+    Namespaces are counted by iri, so different iris declared with the same prefix are kept apart
+
+    Args:
+        dir (str): path to ontology reports
+        filename (str): filename where the distributions should be saved
+    """
+    index = open_index(dir)
+    size_columns = ["classes", "annotation_properties", "data_properties", "object_properties", "properties"]
+    sizes = index.select("SELECT %s FROM sizes WHERE report >= ?1 AND report < ?1 || x'ff'" % ", ".join(size_columns), dir)
+    results = {"ontologies": len(sizes), "sizes": {}}
+    for column, values in zip(size_columns, list(zip(*sizes)) or [()] * len(size_columns)):
+        results["sizes"][column] = distribution(values, count_edges(values))
+    structure = index.select("SELECT %s FROM class_structure WHERE report >= ?1 AND report < ?1 || x'ff'" % ", ".join(ResultsIndex.STRUCTURE_COLUMNS), dir)
+    results["structure"] = {}
+    for column, values in zip(ResultsIndex.STRUCTURE_COLUMNS, list(zip(*structure)) or [()] * len(ResultsIndex.STRUCTURE_COLUMNS)):
+        results["structure"][column] = distribution(values, score_edges(values) if column.endswith("_coverage") else count_edges(values))
+
+    namespaces = {}
+    for iri, prefix in index.select("SELECT DISTINCT iri, prefix FROM namespaces WHERE report >= ?1 AND report < ?1 || x'ff'", dir):
+        namespaces.setdefault(iri, {"iri": iri, "prefixes": [], "ontologies": 0})["prefixes"].append(prefix)
+    for iri, ontologies in index.select("SELECT iri, COUNT(DISTINCT report) FROM namespaces WHERE report >= ?1 AND report < ?1 || x'ff' GROUP BY iri", dir):
+        namespaces[iri]["ontologies"] = ontologies
+    results["namespaces"] = sorted(namespaces.values(), key=lambda n: (-n["ontologies"], n["iri"]))
+    for namespace in results["namespaces"]:
+        namespace["prefixes"].sort()
+
+    pitfalls = index.select("SELECT code, name, importance, COUNT(*), COUNT(DISTINCT report), SUM(affected) FROM oops_pitfalls "
+                            "WHERE report >= ?1 AND report < ?1 || x'ff' GROUP BY code, name, importance", dir)
+    results["pitfalls"] = [{"code": code, "name": name, "importance": importance, "occurrences": n, "ontologies": ontologies, "affected": affected}
+                           for code, name, importance, n, ontologies, affected in sorted(pitfalls, key=lambda p: (-p[3], str(p[0]), str(p[1]), str(p[2])))]
+    per_ontology = [n for _, n in index.select("SELECT reports.path, COUNT(oops_pitfalls.report) FROM reports LEFT JOIN oops_pitfalls "
+                                               "ON oops_pitfalls.report=reports.path WHERE reports.kind='oops' AND "
+                                               "reports.path >= ?1 AND reports.path < ?1 || x'ff' GROUP BY reports.path", dir)]
+    results["pitfalls_per_ontology"] = distribution(per_ontology, count_edges(per_ontology))
+
+    foops = [score for (score,) in index.select("SELECT overall_score FROM foops_scores WHERE report >= ?1 AND report < ?1 || x'ff'", dir)]
+    fair = index.select("SELECT f, a, i, r FROM fair_scores WHERE report >= ?1 AND report < ?1 || x'ff'", dir)
+    results["scores"] = {"FOOPS": distribution(foops, score_edges(foops))}
+    for key, values in zip("FAIR", list(zip(*fair)) or [()] * 4):
+        results["scores"][key] = distribution(values, score_edges(values))
+    with atomic_write(dir + filename + '.json') as f:
+        json.dump(results, f, indent=1)
+
+
+AGGREGATIONS = {"used_onts": (sum_used_onts, "Sum_Used_Ontologies", ".txt"),
+                "classes": (sum_class_prop, "Sum_Classes_Properties", ".txt"),
+                "oops": (sum_oops, "Sum_OOPS_Pitfalls", ".txt"),
+                "fair_foops": (mean_fair_foops, "Mean_FAIR_FOOPS", ".json"),
+                "distributions": (corpus_distributions, "Corpus_Distributions", ".json")}
+COMMANDS = ("analyze", "report", "aggregate", "index", "export", "imports", "serve")
+
+def analyze_file(ontology_dir, **settings):
+    """Generates every report of one ontology, like analyze_dir does for every ontology of a directory
+
+    Args:
+        ontology_dir (str): path to ontology file
+        **settings: analysis settings, see configure
+
+    Returns:
+        dict: ontology path, consumed representations per stage and the errors of the analysis if any
+    """
+    configure(**settings)
+    init()
+    return analyze_ontology(ontology_dir)
+
+def analyze_dir(dir, jobs=1, resume=False, retry_failed=False, **settings):
+    """Generates every report of every ontology in a directory, see get_all_for_all_onts_in_dir
+
+    Args:
+        dir (str): directory of the ontology files
+        jobs (int): number of worker processes
+        resume (bool): only analyze ontologies that are new, changed, failed, interrupted or analyzed with other settings
+        retry_failed (bool): same as resume
+        **settings: analysis settings, see configure
+
+    Returns:
+        list: result of every ontology in the order of get_ont_files
+    """
+    configure(**settings)
+    init()
+    get_all_for_all_onts_in_dir(dir, jobs, resume, retry_failed)
+    with open(os.path.join(OUTPUT_DIR, "analysis_results.jsonl")) as f:
+        return [json.loads(line) for line in f]
+
+def serve(dirs, jobs=1, interval=2.0, host="127.0.0.1", port=8790, **settings):
+    """Watches directories and analyzes new and changed ontologies until SIGTERM or SIGINT, see AnalysisService
+
+    Args:
+        dirs (list): directories to watch
+        jobs (int): number of worker processes
+        interval (float): seconds between two scans of the directories
+        host (str): address of the HTTP server
+        port (int): port of the HTTP server, no server is started if None
+        **settings: analysis settings, see configure
+    """
+    configure(**settings)
+    init()
+    AnalysisService(dirs, jobs, interval, host, port).run()
+
+def aggregate(dir, kinds=None, names=None, jobs=1):
+    """Aggregates the results of the reports in a directory into files in that directory. Only the results store
+    is read, so neither owlready2 nor rdflib is imported
+
+    Args:
+        dir (str): directory of the reports
+        kinds (list): aggregations to run, keys of AGGREGATIONS, all if None
+        names (dict): file name without extension by aggregation, the default of AGGREGATIONS if missing
+        jobs (int): number of worker processes parsing the reports if the results store has to be built
+
+    Returns:
+        dict: path of the written file by aggregation
+    """
+    dir = os.path.join(dir, "")
+    open_index(dir, jobs)
+    paths = {}
+    for kind in kinds or AGGREGATIONS:
+        fn, name, extension = AGGREGATIONS[kind]
+        name = (names or {}).get(kind, name)
+        fn(dir, name)
+        paths[kind] = dir + name + extension
+    return paths
+
+
+def add_settings_arguments(parser):
+    """Adds the analysis and remote service options to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser
+    """
+    parser.add_argument("--quadstore_dir", help="Memory-bounded mode for -a. Every ontology is loaded into its own owlready2 quadstore file in this dir, which is deleted after the analysis.")
+    parser.add_argument("--max_rss", help="Memory ceiling for -a in MB. No further ontology is started while the analysis uses more memory.", type=float)
+    parser.add_argument("--no_reasoner", help="Do not run the reasoner in -a. Namespaces, counts and random classes are then extracted in a single streaming pass without loading the ontology.", action="store_true")
+    parser.add_argument("--reasoner_engine", help="Reasoner of -a and -r.", choices=["hermit", "pellet"], default="hermit")
+    parser.add_argument("--reasoner_timeout", help="Wall-clock limit of one reasoner run in seconds.", type=float, default=600)
+    parser.add_argument("--reasoner_memory", help="Java heap limit of one reasoner run in MB.", type=int, default=2000)
+    parser.add_argument("--reasoner_jobs", help="Maximum number of reasoners running at the same time, defaults to the number of jobs.", type=int)
+    parser.add_argument("--telemetry", help="Json lines run log of -a with the wall time, cpu time and peak memory of every stage, the remote requests and the errors of every ontology.")
+    parser.add_argument("--profile", help="Keeps the cProfile output of the N slowest ontologies of -a in [output]/profiles.", type=int, default=0)
+    parser.add_argument("--import_mirror", help="Directory of the import mirror. Imported ontologies are fetched and parsed once into it and loaded from it by every analysis.")
+    parser.add_argument("--offline", help="Never fetch imported ontologies from the network, imports missing in --import_mirror are left empty.", action="store_true")
+    parser.add_argument("--no_cache", help="Do not use the result cache of -a, every stage is run again.", action="store_true")
+    parser.add_argument("--cache_max_entries", help="Maximum number of results in the result cache.", type=int, default=200000)
+    parser.add_argument("--cache_max_age", help="Days after which an unused result is removed from the result cache.", type=float, default=90)
+    parser.add_argument("--timeout", help="Read timeout of the OOPS, FOOPS and FAIR-Checker requests in seconds.", type=float, default=300)
+    parser.add_argument("--retries", help="Maximum number of retries of a failed OOPS, FOOPS or FAIR-Checker request.", type=int, default=5)
+    parser.add_argument("--oops_url", help="Url of the OOPS REST service.", default=OOPS_URL)
+    parser.add_argument("--oops_route", help="How ontologies are given to OOPS: auto submits the iri if it resolves and uploads the content otherwise.", choices=["auto", "iri", "content"], default="auto")
+    parser.add_argument("--oops_max_mb", help="Ontologies larger than this many MB are not uploaded to OOPS, the reason is recorded in the results.", type=float)
+    parser.add_argument("--oops_gzip", help="Upload ontologies to OOPS gzip compressed.", action="store_true")
+    parser.add_argument("--foops_url", help="Url of the FOOPS assessOntology service.", default=FOOPS_URL)
+    parser.add_argument("--fair_url", help="Url of the FAIR-Checker metrics_all service.", default=FAIR_URL)
+
+def apply_settings(args, jobs=1):
+    """Configures this process from the options of add_settings_arguments and the output directory
+
+    Args:
+        args (argparse.Namespace): parsed options
+        jobs (int): number of worker processes, the default of the reasoner jobs
+    """
+    configure(output_dir=args.output, use_cache=not args.no_cache,
+              cache_settings={"max_entries": args.cache_max_entries, "max_age": args.cache_max_age},
+              quadstore_dir=args.quadstore_dir, max_rss=args.max_rss, reasoner=args.reasoner_engine,
+              reasoner_timeout=args.reasoner_timeout, reasoner_memory=args.reasoner_memory,
+              reasoner_jobs=args.reasoner_jobs or max(1, jobs), reasoning=not args.no_reasoner,
+              telemetry=args.telemetry, profile=args.profile, oops_route=args.oops_route,
+              oops_max_bytes=int(args.oops_max_mb * 1e6) if args.oops_max_mb is not None else None, oops_gzip=args.oops_gzip,
+              import_mirror=args.import_mirror, imports_offline=args.offline)
+    configure_client(endpoints={"oops": args.oops_url, "foops": args.foops_url, "fair": args.fair_url},
+                     timeout=(10, args.timeout), retries=args.retries)
+
+def command_parser():
+    """Parser of the subcommands, each of them only imports what it needs
+
+    Returns:
+        argparse.ArgumentParser: the parser
+    """
+    parser = argparse.ArgumentParser(prog = 'OntMetaScript',
+                        description = 'Gather Ontology Metadata and Analysis from Ont files')
+    commands = parser.add_subparsers(dest="command", required=True)
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("-o", "--output", help="Set output directory.", default='./analysis/')
+    settings = argparse.ArgumentParser(add_help=False)
+    add_settings_arguments(settings)
+
+    analyze = commands.add_parser("analyze", parents=[output, settings], help="Generates every report of all ontologies in a directory or of one ontology file.")
+    analyze.add_argument("path", help="Directory of ontology files or ontology file.")
+    analyze.add_argument("-j", "--jobs", help="Number of worker processes, each ontology is analyzed in its own owlready2 world.", type=int, default=1)
+    analyze.add_argument("--resume", help="Only analyze the ontologies of a directory that are new, changed, failed, interrupted or analyzed with other settings.", action="store_true")
+    analyze.add_argument("--retry_failed", "--retry-failed", help="Same as --resume.", action="store_true")
+
+    report = commands.add_parser("report", parents=[output, settings], help="Generates one report of an ontology.")
+    report.add_argument("kind", choices=["classes", "structure", "used_onts", "oops", "foops", "fair", "reasoner"])
+    report.add_argument("ontology", help="Ontology file.")
+    report.add_argument("iri", nargs="?", help="Ontology iri, needed by foops and fair.")
+    report.add_argument("-n", "--classes", help="Number of random classes of the classes report.", type=int, default=5)
+    report.add_argument("--fair_foops", help="Also generate the FOOPS and FAIR reports with the classes report.", action="store_true")
+
+    aggregation = commands.add_parser("aggregate", help="Aggregates the results of all ontologies in a directory, only the results store is read.")
+    aggregation.add_argument("dir", help="Directory of the reports.")
+    aggregation.add_argument("-k", "--kinds", help="Aggregations, all if not given.", nargs="+", choices=list(AGGREGATIONS))
+    aggregation.add_argument("-n", "--names", help="File names of the aggregations as kind=name.", nargs="+", default=[])
+    aggregation.add_argument("-j", "--jobs", help="Number of worker processes parsing the reports if the results store has to be built.", type=int, default=1)
+
+    index = commands.add_parser("index", help="Rebuilds the results store of a directory from its reports.")
+    index.add_argument("dir", help="Directory of the reports.")
+    index.add_argument("-j", "--jobs", help="Number of worker processes parsing the reports.", type=int, default=1)
+
+    export = commands.add_parser("export", parents=[output], help="Exports the tables of the results store of the output directory.")
+    export.add_argument("dir", help="Export directory.")
+    export.add_argument("--format", help="File format, parquet needs pyarrow.", choices=["csv", "parquet"], default="csv")
+
+    imports = commands.add_parser("imports", help="Adds everything the ontologies in a directory import to an import mirror, so later analyses can run offline.")
+    imports.add_argument("path", help="Directory of ontology files or ontology file.")
+    imports.add_argument("mirror", help="Directory of the import mirror.")
+    imports.add_argument("--offline", help="Only use local files, list the imports that are still missing.", action="store_true")
+
+    service = commands.add_parser("serve", parents=[output, settings], help="Watches directories, analyzes new and changed ontologies with warm worker processes and answers status requests over HTTP.")
+    service.add_argument("dirs", help="Directories of ontology files.", nargs="+")
+    service.add_argument("-j", "--jobs", help="Number of worker processes.", type=int, default=1)
+    service.add_argument("--interval", help="Seconds between two scans of the directories.", type=float, default=2.0)
+    service.add_argument("--host", help="Address of the HTTP server.", default="127.0.0.1")
+    service.add_argument("--port", help="Port of the HTTP server.", type=int, default=8790)
+    return parser
+
+def run_command(args):
+    """Runs a parsed subcommand
+
+    Args:
+        args (argparse.Namespace): options of command_parser
+
+    Returns:
+        int: exit status
+    """
+    if args.command == "analyze":
+        apply_settings(args, args.jobs)
+        if os.path.isfile(args.path):
+            print(json.dumps(analyze_file(args.path)))
+        else:
+            analyze_dir(args.path, args.jobs, args.resume, args.retry_failed)
+    elif args.command == "report":
+        apply_settings(args)
+        if args.kind in ("foops", "fair") and not args.iri:
+            print("The %s report needs the ontology iri" % args.kind, file=sys.stderr)
+            return 2
+        if args.kind in ("classes", "structure", "used_onts", "reasoner"):
+            init()
+        if args.kind == "classes":
+            get_random_classes_fair_foops(args.classes, args.ontology, args.fair_foops)
+        elif args.kind == "structure":
+            get_class_structure(args.ontology)
+        elif args.kind == "used_onts":
+            get_used_onts(args.ontology)
+        elif args.kind == "oops":
+            get_oops_pitfalls(args.ontology)
+        elif args.kind == "foops":
+            get_foops_report(args.ontology, args.iri)
+        elif args.kind == "fair":
+            get_faircheck_report(args.ontology, args.iri)
+        else:
+            print(json.dumps(run_reasoner(args.ontology)))
+    elif args.command == "aggregate":
+        names = dict(name.split("=", 1) for name in args.names)
+        for path in aggregate(args.dir, args.kinds, names, args.jobs).values():
+            print(path)
+    elif args.command == "index":
+        index = ResultsIndex(os.path.join(args.dir, INDEX_FILE))
+        print("Indexed reports:", index.rebuild(args.jobs))
+        index.close()
+    elif args.command == "export":
+        for path in open_index(args.output).export(args.dir, args.format):
+            print(path)
+    elif args.command == "serve":
+        apply_settings(args, args.jobs)
+        serve(args.dirs, args.jobs, args.interval, args.host, args.port)
+    else:
+        onts = [args.path] if os.path.isfile(args.path) else get_ont_files(args.path)
+        catalog = ImportCatalog(args.mirror, args.offline)
+        imports = catalog.build_corpus(onts)
+        print("Imported ontologies: %d, added: %d, missing: %d" % (imports["imports"], imports["added"], len(imports["missing"])))
+        for iri in imports["missing"]:
+            print("missing:", iri, (catalog.entry(iri) or {}).get("error"))
+    return 0
+
+def legacy_main(argv):
+    """Command line interface of the single-dash options, kept next to the subcommands
+
+    Args:
+        argv (list): command line arguments
+    """
+    parser = argparse.ArgumentParser(prog = 'OntMetaScript',
+                        description = 'Gather Ontology Metadata and Analysis from Ont files. Also available as the subcommands %s, see OntMetaScript <command> -h' % ", ".join(COMMANDS),
+                        epilog = 'Text at the bottom of help')
+    parser.add_argument("-o", "--output", help="Set output directory.",default='./analysis/')
+    parser.add_argument("-a", "--analysis", help="Analyses all owl or ttl ontologies in the supplied directory and saves them.")
+    parser.add_argument("-j", "--jobs", help="Number of worker processes for -a, each ontology is analyzed in its own owlready2 world.", type=int, default=1)
+    parser.add_argument("--resume", help="Only analyze the ontologies of -a that are new, changed, failed, interrupted or analyzed with other settings.", action="store_true")
+    parser.add_argument("--retry_failed", "--retry-failed", help="Same as --resume.", action="store_true")
+    parser.add_argument("-rf", "--random_classes_fair_foops", help=" n, ont_dir, bool Gets a given number n of random classes from the ontology file dir and gets FOOPS and FAIR report if bool is True. Also generates a normal report with the random classes in it", nargs=3)
+    parser.add_argument("-fo", "--foops", help="Ont_dir, iri.Generate FOOPS Report of given ontology.",nargs=2)
+    parser.add_argument("-fa", "--fair", help="Ont_dir, iri.Generate FAIR Report of given ontology, also generates a Mean fair score.",nargs=2)
+    parser.add_argument("-oo", "--oops", help="Ont_dir.Generate OOPS Report of given ontology.")
+    parser.add_argument("-r", "--reasoner", help="Ont_dir.Checks if Reasoner can be run.")
+    parser.add_argument("-so", "--sum_onts", help="Dir, Name. Sums up the used onts of all ontologies in a dir and saves them in a file named Name. Used Ontologies report needed.",nargs=2)
+    parser.add_argument("-scp", "--sum_classes_prop",help="Dir, Name. Sums up the classes and properties of all ontologies in a dir and saves them in a file named Name.Normal Report needed",nargs=2)
+    parser.add_argument("-m", "--mean_fair_foops", help="Dir, Name. Means the Fair and foops score of all ontologies in a dir and saves them in a file named Name. FOOPS Report and FAIR Report needed",nargs=2)
+    parser.add_argument("-ds", "--distributions", help="Dir, Name. Percentiles and histograms of the sizes, pitfalls and scores, namespace iri and pitfall frequencies of all ontologies in a dir, saved in a file named Name.", nargs=2)
+    parser.add_argument("-ri", "--rebuild_index", help="Dir. Rebuilds the results index used by -so, -scp, -m and -ds from the reports in a dir, -j sets the worker processes.")
+    parser.add_argument("--export", help="Dir. Exports the tables of the results store of the output directory to this dir.")
+    parser.add_argument("--export_format", help="File format of --export, parquet needs pyarrow.", choices=["csv", "parquet"], default="csv")
+    add_settings_arguments(parser)
+
+    args = parser.parse_args(argv)
+
+    # owlready2 is only initialized for the options that load ontologies
+    if args.analysis or args.random_classes_fair_foops or args.oops or args.reasoner:
+        init()
+    apply_settings(args, args.jobs)
+    if args.analysis:
+        get_all_for_all_onts_in_dir(args.analysis, args.jobs, args.resume, args.retry_failed)
+    if args.random_classes_fair_foops:
+        try:
+            n = int(args.random_classes_fair_foops[0])
+            dir = args.random_classes_fair_foops[1]
+            bo = bool(args.random_classes_fair_foops[2])
+            get_random_classes_fair_foops(n,dir,bo)
+        except Exception as e:
+            print(e)
+    if args.foops:
+        try:
+            get_foops_report(args.foops[0],args.foops[1])
+        except Exception as e:
+            print(e)
+    if args.fair:
+        try:
+            get_faircheck_report(args.fair[0],args.fair[1])
+        except Exception as e:
+            print(e)
+    if args.oops:
+        try:
+            get_oops_pitfalls(args.oops)
+        except Exception as e:
+            print(e)
+    if args.reasoner:
+        try:
+            run_reasoner(args.reasoner)
+        except Exception as e:
+            print(e)
+    if args.rebuild_index:
+        try:
+            index = ResultsIndex(os.path.join(args.rebuild_index, INDEX_FILE))
+            print("Indexed reports:", index.rebuild(args.jobs))
+            index.close()
+        except Exception as e:
+            print(e)
+    if args.export:
+        try:
+            for path in open_index(OUTPUT_DIR).export(args.export, args.export_format):
+                print(path)
+        except Exception as e:
+            print(e)
+    if args.sum_onts:
+        try:
+            sum_used_onts(args.sum_onts[0],args.sum_onts[1])
+        except Exception as e:
+            print(e)
+    if args.sum_classes_prop:
+        try:
+            sum_class_prop(args.sum_classes_prop[0],args.sum_classes_prop[1])
+        except Exception as e:
+            print(e)
+    if args.mean_fair_foops:
+        try:
+            mean_fair_foops(args.mean_fair_foops[0],args.mean_fair_foops[1])
+        except Exception as e:
+            print(e)
+    if args.distributions:
+        try:
+            corpus_distributions(args.distributions[0],args.distributions[1])
+        except Exception as e:
+            print(e)
+
+def main(argv=None):
+    """Command line interface, either a subcommand or the single-dash options
+
+    Args:
+        argv (list): command line arguments, sys.argv if None
+
+    Returns:
+        int: exit status
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        try:
+            return run_command(command_parser().parse_args(argv))
+        except Exception as e:
+            print(e, file=sys.stderr)
+            return 1
+    legacy_main(argv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Generates synthetic OWL ontologies in Turtle or RDF/XML for the benchmarks"""
+from xml.sax.saxutils import escape
+import argparse
+import random
+import os
+
+BASE = "http://bench.example.org/"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+
+def plan_ontology(name, classes, properties, axioms, imports, seed=0):
+    """Plans the content of a synthetic ontology, the same arguments always give the same ontology
+
+    Args:
+        name (str): ontology name, the ontology iri is BASE + name
+        classes (int): number of classes, arranged in a random tree
+        properties (int): number of properties, split between object, data and annotation properties
+        axioms (int): number of additional axioms (existential restrictions and disjoint classes)
+        imports (list): iris of the imported ontologies
+        seed (int): random seed
+
+    Yields:
+        tuple: statements ("ontology", iri, imports), ("class", iri, parent, label, comment),
+            ("property", iri, kind, domain, range), ("restriction", cls, property, filler) or ("disjoint", cls, other)
+    """
+    rng = random.Random("%s:%s" % (seed, name))
+    iri = BASE + name
+    yield ("ontology", iri, list(imports))
+
+    def cls(i):
+        return "%s#C%d" % (iri, i)
+
+    for i in range(classes):
+        parent = cls(rng.randrange(i)) if i else None
+        comment = "Synthetic class %d of %s" % (i, name) if rng.random() < 0.3 else None
+        yield ("class", cls(i), parent, "C%d" % i, comment)
+    object_properties = []
+    for i in range(properties):
+        kind = ("object", "data", "annotation")[i % 3]
+        prop = "%s#p%d" % (iri, i)
+        domain = cls(rng.randrange(classes)) if classes and kind != "annotation" else None
+        if kind == "object":
+            object_properties.append(prop)
+            target = cls(rng.randrange(classes)) if classes else None
+        else:
+            target = XSD + "string" if kind == "data" else None
+        yield ("property", prop, kind, domain, target)
+    for i in range(axioms if classes else 0):
+        if object_properties and i % 2 == 0:
+            yield ("restriction", cls(rng.randrange(classes)), rng.choice(object_properties), cls(rng.randrange(classes)))
+        else:
+            yield ("disjoint", cls(rng.randrange(classes)), cls(rng.randrange(classes)))
+
+
+def write_turtle(f, statements):
+    """Writes planned statements as Turtle
+
+    Args:
+        f (file): file opened in text mode
+        statements (iterable): statements of plan_ontology
+    """
+    f.write("@prefix owl: <http://www.w3.org/2002/07/owl#> .\n")
+    f.write("@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .\n")
+    f.write("@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n")
+    f.write("@prefix xsd: <%s> .\n\n" % XSD)
+    kinds = {"object": "owl:ObjectProperty", "data": "owl:DatatypeProperty", "annotation": "owl:AnnotationProperty"}
+    for statement in statements:
+        kind = statement[0]
+        if kind == "ontology":
+            f.write("<%s> a owl:Ontology" % statement[1])
+            for imported in statement[2]:
+                f.write(" ;\n    owl:imports <%s>" % imported)
+            f.write(" .\n\n")
+        elif kind == "class":
+            _, iri, parent, label, comment = statement
+            f.write("<%s> a owl:Class ;\n    rdfs:label \"%s\"@en" % (iri, label))
+            if parent:
+                f.write(" ;\n    rdfs:subClassOf <%s>" % parent)
+            if comment:
+                f.write(" ;\n    rdfs:comment \"%s\"" % comment)
+            f.write(" .\n\n")
+        elif kind == "property":
+            _, iri, prop_kind, domain, target = statement
+            f.write("<%s> a %s" % (iri, kinds[prop_kind]))
+            if domain:
+                f.write(" ;\n    rdfs:domain <%s>" % domain)
+            if target:
+                f.write(" ;\n    rdfs:range <%s>" % target)
+            f.write(" .\n\n")
+        elif kind == "restriction":
+            f.write("<%s> rdfs:subClassOf [ a owl:Restriction ;\n    owl:onProperty <%s> ;\n    owl:someValuesFrom <%s> ] .\n\n" % statement[1:])
+        elif kind == "disjoint":
+            f.write("<%s> owl:disjointWith <%s> .\n\n" % statement[1:])
+
+
+def write_rdfxml(f, statements):
+    """Writes planned statements as RDF/XML
+
+    Args:
+        f (file): file opened in text mode
+        statements (iterable): statements of plan_ontology
+    """
+    f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    f.write('<rdf:RDF\n  xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"\n'
+            '  xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"\n'
+            '  xmlns:owl="http://www.w3.org/2002/07/owl#"\n>\n')
+    kinds = {"object": "owl:ObjectProperty", "data": "owl:DatatypeProperty", "annotation": "owl:AnnotationProperty"}
+    for statement in statements:
+        kind = statement[0]
+        if kind == "ontology":
+            f.write('  <owl:Ontology rdf:about="%s">\n' % statement[1])
+            for imported in statement[2]:
+                f.write('    <owl:imports rdf:resource="%s"/>\n' % imported)
+            f.write('  </owl:Ontology>\n')
+        elif kind == "class":
+            _, iri, parent, label, comment = statement
+            f.write('  <owl:Class rdf:about="%s">\n    <rdfs:label xml:lang="en">%s</rdfs:label>\n' % (iri, escape(label)))
+            if parent:
+                f.write('    <rdfs:subClassOf rdf:resource="%s"/>\n' % parent)
+            if comment:
+                f.write('    <rdfs:comment>%s</rdfs:comment>\n' % escape(comment))
+            f.write('  </owl:Class>\n')
+        elif kind == "property":
+            _, iri, prop_kind, domain, target = statement
+            f.write('  <%s rdf:about="%s">\n' % (kinds[prop_kind], iri))
+            if domain:
+                f.write('    <rdfs:domain rdf:resource="%s"/>\n' % domain)
+            if target:
+                f.write('    <rdfs:range rdf:resource="%s"/>\n' % target)
+            f.write('  </%s>\n' % kinds[prop_kind])
+        elif kind == "restriction":
+            f.write('  <rdf:Description rdf:about="%s">\n    <rdfs:subClassOf>\n      <owl:Restriction>\n'
+                    '        <owl:onProperty rdf:resource="%s"/>\n        <owl:someValuesFrom rdf:resource="%s"/>\n'
+                    '      </owl:Restriction>\n    </rdfs:subClassOf>\n  </rdf:Description>\n' % statement[1:])
+        elif kind == "disjoint":
+            f.write('  <rdf:Description rdf:about="%s">\n    <owl:disjointWith rdf:resource="%s"/>\n  </rdf:Description>\n' % statement[1:])
+    f.write('</rdf:RDF>\n')
+
+
+def generate_ontology(path, classes=100, properties=10, axioms=50, imports=(), seed=0):
+    """Writes a synthetic ontology, Turtle if path ends with .ttl and RDF/XML otherwise
+
+    Args:
+        path (str): path of the ontology file, its name without extension is the ontology name
+        classes (int): number of classes
+        properties (int): number of properties
+        axioms (int): number of additional axioms
+        imports (list): iris of the imported ontologies
+        seed (int): random seed
+
+    Returns:
+        str: iri of the ontology
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    statements = plan_ontology(name, classes, properties, axioms, imports, seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith(".ttl"):
+            write_turtle(f, statements)
+        else:
+            write_rdfxml(f, statements)
+    return BASE + name
+
+
+def generate_corpus(dir, count, classes, properties, axioms, imports, formats=("ttl", "owl"), seed=0):
+    """Writes count synthetic ontologies to dir/onts and the ontologies they import to dir/imports.
+    The imported ontologies are found by owlready2 if dir/imports is in onto_path
+
+    Args:
+        dir (str): directory of the corpus
+        count (int): number of ontologies
+        classes (int): number of classes per ontology
+        properties (int): number of properties per ontology
+        axioms (int): number of additional axioms per ontology
+        imports (int): number of ontologies imported by every ontology
+        formats (tuple): file extensions used in turn, "ttl" or "owl"
+        seed (int): random seed
+
+    Returns:
+        list: paths of the ontology files without the imported ones
+    """
+    imported = [generate_ontology(os.path.join(dir, "imports", "import%d.owl" % i), max(1, classes // 10), 3, 0, (), seed)
+                for i in range(imports)]
+    onts = [os.path.join(dir, "onts", "ont%d.%s" % (i, formats[i % len(formats)])) for i in range(count)]
+    for i, path in enumerate(onts):
+        generate_ontology(path, classes, properties, axioms, imported, seed + i)
+    return onts
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(prog='generate_ontology',
+                        description='Generates synthetic ontologies for the OntMeta benchmarks')
+    parser.add_argument("dir", help="Output directory, the ontologies are written to dir/onts and their imports to dir/imports.")
+    parser.add_argument("-n", "--count", help="Number of ontologies.", type=int, default=10)
+    parser.add_argument("-c", "--classes", help="Number of classes per ontology.", type=int, default=1000)
+    parser.add_argument("-p", "--properties", help="Number of properties per ontology.", type=int, default=50)
+    parser.add_argument("-x", "--axioms", help="Number of additional axioms per ontology.", type=int, default=500)
+    parser.add_argument("-i", "--imports", help="Number of ontologies imported by every ontology.", type=int, default=0)
+    parser.add_argument("-f", "--formats", help="File formats used in turn.", nargs="+", choices=["ttl", "owl"], default=["ttl", "owl"])
+    parser.add_argument("-s", "--seed", help="Random seed.", type=int, default=0)
+    args = parser.parse_args()
+    for path in generate_corpus(args.dir, args.count, args.classes, args.properties, args.axioms, args.imports, args.formats, args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Local mock servers of the OOPS REST, FOOPS assessOntology and FAIR-Checker metrics_all services for the benchmarks"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import threading
+import gzip
+import argparse
+import random
+import time
+import json
+
+FAIR_METRICS = ["F1A", "F1B", "F2A", "F2B", "A1.1", "A1.2", "I1", "I2", "I3", "R1.1", "R1.2", "R1.3"]
+
+
+class ServiceBehaviour:
+    """Latency and failure rate of a mock service
+
+    Args:
+        latency (float): mean response time in seconds
+        jitter (float): response times are uniformly spread by this many seconds around latency
+        failure_rate (float): share of the requests answered with 503 Service Unavailable
+        seed (int): random seed
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def respond(self):
+        """Waits for the response time of a request
+
+        Returns:
+            bool: False if the request is to fail
+        """
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.failure_rate
+            self.requests += 1
+            self.failures += failed
+        time.sleep(delay)
+        return not failed
+
+
+def oops_reply(body):
+    """OOPS response with a few pitfalls, their number depends on the request size
+
+    Args:
+        body (bytes): OOPS request
+
+    Returns:
+        bytes: RDF/XML response
+    """
+    pitfalls = ["Minor"] * (1 + len(body) % 5) + ["Important"] * (len(body) % 3)
+    items = "".join("  <oops:Pitfall>\n    <oops:hasCode>P%02d</oops:hasCode>\n"
+                    "    <oops:hasImportanceLevel>%s</oops:hasImportanceLevel>\n  </oops:Pitfall>\n" % (i, level)
+                    for i, level in enumerate(pitfalls))
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+            'xmlns:oops="http://oops.linkeddata.es/def#">\n%s</rdf:RDF>\n' % items).encode("utf-8")
+
+
+def make_handler(behaviours):
+    """Creates the request handler class of the mock services
+
+    Args:
+        behaviours (dict): ServiceBehaviour by service name ("oops", "foops", "fair")
+
+    Returns:
+        type: BaseHTTPRequestHandler subclass
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def reply(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def handle_service(self, service, body):
+            if not behaviours[service].respond():
+                return self.reply(503, b"Service Unavailable", "text/plain")
+            if service == "oops":
+                return self.reply(200, oops_reply(body), "application/xml")
+            if service == "foops":
+                iri = json.loads(body or b"{}").get("ontologyUri", "")
+                score = (sum(map(ord, iri)) % 100) / 100
+                return self.reply(200, json.dumps({"ontology_URI": iri, "overall_score": score, "checks": []}).encode(), "application/json")
+            scores = [{"metric": metric, "score": str(i % 3)} for i, metric in enumerate(FAIR_METRICS)]
+            return self.reply(200, json.dumps(scores).encode(), "application/json")
+
+        def read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+                    if not size:
+                        break
+            else:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return body
+
+        def do_POST(self):
+            body = self.read_body()
+            if self.path.startswith("/rest"):
+                return self.handle_service("oops", body)
+            if self.path.startswith("/assessOntology"):
+                return self.handle_service("foops", body)
+            self.reply(404, b"Not Found", "text/plain")
+
+        def do_GET(self):
+            if self.path.startswith("/metrics_all"):
+                return self.handle_service("fair", b"")
+            self.reply(404, b"Not Found", "text/plain")
+
+    return Handler
+
+
+class MockServices:
+    """OOPS, FOOPS and FAIR-Checker mock served by one local HTTP server in a background thread
+
+    Args:
+        port (int): port of the server, a free port is chosen if 0
+        behaviours (dict): ServiceBehaviour by service name, services without one answer at once
+    """
+
+    def __init__(self, port=0, behaviours=None):
+        self.behaviours = {service: ServiceBehaviour() for service in ("oops", "foops", "fair")}
+        self.behaviours.update(behaviours or {})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(self.behaviours))
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def endpoints(self):
+        """service urls by service name, in the form of OntMeta.configure_client"""
+        url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        return {"oops": url + "/rest", "foops": url + "/assessOntology", "fair": url + "/metrics_all"}
+
+    def start(self):
+        """Starts serving in a background thread
+
+        Returns:
+            MockServices: self
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stats(self):
+        """Returns the number of requests and failures per service
+
+        Returns:
+            dict: {"requests", "failures"} by service name
+        """
+        return {service: {"requests": b.requests, "failures": b.failures} for service, b in self.behaviours.items()}
+
+    def stop(self):
+        """Stops the server"""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(prog='mock_services',
+                        description='Serves mocks of the OOPS, FOOPS and FAIR-Checker services for OntMeta benchmarks')
+    parser.add_argument("-p", "--port", help="Port of the server.", type=int, default=8765)
+    parser.add_argument("-l", "--latency", help="Mean response time in seconds of every service.", type=float, default=0.0)
+    parser.add_argument("-j", "--jitter", help="Spread of the response time in seconds.", type=float, default=0.0)
+    parser.add_argument("-f", "--failure_rate", help="Share of the requests answered with 503.", type=float, default=0.0)
+    parser.add_argument("--oops_latency", help="Mean response time of OOPS in seconds, overrides --latency.", type=float)
+    parser.add_argument("-s", "--seed", help="Random seed.", type=int, default=0)
+    args = parser.parse_args()
+    behaviours = {service: ServiceBehaviour(args.latency, args.jitter, args.failure_rate, args.seed + i)
+                  for i, service in enumerate(("oops", "foops", "fair"))}
+    if args.oops_latency is not None:
+        behaviours["oops"].latency = args.oops_latency
+    services = MockServices(args.port, behaviours)
+    for service, url in services.endpoints.items():
+        print(service, url)
+    try:
+        services.server.serve_forever()
+    except KeyboardInterrupt:
+        services.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
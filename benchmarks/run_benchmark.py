@@ -0,0 +1,207 @@
+"""Times the analysis stages of OntMeta on synthetic ontologies of several sizes against the local mock services.
+Every measurement is written as one json line so runs can be compared to find regressions."""
+from generate_ontology import generate_corpus
+from mock_services import MockServices, ServiceBehaviour
+import statistics
+import subprocess
+import argparse
+import platform
+import tempfile
+import shutil
+import time
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import OntMeta
+import owlready2
+
+# name: (ontologies, classes, properties, axioms, imports)
+TIERS = {"small": (6, 200, 20, 100, 1),
+         "medium": (4, 5000, 200, 2500, 2),
+         "large": (2, 50000, 1000, 25000, 2)}
+STAGES = ["stream_ontology", "get_used_onts", "load", "get_random_classes_fair_foops", "get_class_structure", "get_oops_pitfalls", "run_reasoner"]
+AGGREGATORS = ["sum_used_onts", "sum_class_prop", "sum_oops", "mean_fair_foops", "corpus_distributions"]
+
+
+def timed(fn, *args):
+    """Runs fn and measures it
+
+    Returns:
+        dict: wall and cpu seconds, whether fn returned without exception, its error and the status of a reasoner outcome
+    """
+    start, cpu = time.perf_counter(), time.process_time()
+    error = None
+    result = None
+    try:
+        result = fn(*args)
+    except Exception as e:
+        error = "%s: %s" % (type(e).__name__, e)
+    return {"seconds": time.perf_counter() - start, "cpu_seconds": time.process_time() - cpu, "ok": error is None, "error": error,
+            "status": result.get("status") if isinstance(result, dict) else None}
+
+
+def set_output_dir(output_dir):
+    """Points OntMeta to a fresh output directory, reports of an earlier repetition would otherwise be kept
+
+    Args:
+        output_dir (str): output directory, ends with a slash
+    """
+    OntMeta.configure(output_dir=output_dir)
+
+
+def bench_ontology(path, skip):
+    """Times the stages of one ontology in the order of OntMeta.analyze_ontology
+
+    Args:
+        path (str): path to ontology file
+        skip (list): stages not to run
+
+    Returns:
+        list: (stage, measurement) pairs
+    """
+    ctx = OntMeta.new_context(path)
+    stages = {"stream_ontology": lambda: OntMeta.stream_ontology(path, 5),
+              "get_used_onts": lambda: OntMeta.get_used_onts(path, ctx),
+              # loading replaces the former ttl_to_owl conversion
+              "load": lambda: ctx.onto,
+              "get_random_classes_fair_foops": lambda: OntMeta.get_random_classes_fair_foops(5, path, True, ctx),
+              "get_class_structure": lambda: OntMeta.get_class_structure(path, ctx),
+              "get_oops_pitfalls": lambda: OntMeta.get_oops_pitfalls(path, ctx),
+              "run_reasoner": lambda: OntMeta.run_reasoner(path, ctx)}
+    results = []
+    try:
+        for stage in STAGES:
+            if stage not in skip:
+                results.append((stage, timed(stages[stage])))
+    finally:
+        ctx.close()
+    return results
+
+
+def bench_tier(tier, onts, output_dir, repeat, skip, jobs):
+    """Times every stage of every ontology of a tier, the aggregators and the analysis of the whole directory
+
+    Args:
+        tier (str): tier name
+        onts (list): paths of the ontology files of the tier
+        output_dir (str): directory of the reports
+        repeat (int): number of the repetition
+        skip (list): stages not to run
+        jobs (int): number of worker processes of the directory analysis
+
+    Yields:
+        dict: one measurement
+    """
+    set_output_dir(os.path.join(output_dir, tier, "stages%d" % repeat) + os.path.sep)
+    for path in onts:
+        for stage, measurement in bench_ontology(path, skip):
+            yield dict(tier=tier, repeat=repeat, stage=stage, ontology=os.path.basename(path), bytes=os.path.getsize(path), **measurement)
+    for stage in AGGREGATORS:
+        if stage not in skip:
+            measurement = timed(getattr(OntMeta, stage), OntMeta.OUTPUT_DIR, "bench_" + stage)
+            yield dict(tier=tier, repeat=repeat, stage=stage, ontology=None, bytes=None, **measurement)
+    if "get_all_for_all_onts_in_dir" not in skip:
+        set_output_dir(os.path.join(output_dir, tier, "dir%d" % repeat) + os.path.sep)
+        measurement = timed(OntMeta.get_all_for_all_onts_in_dir, os.path.dirname(onts[0]), jobs)
+        yield dict(tier=tier, repeat=repeat, stage="get_all_for_all_onts_in_dir", ontology=None,
+                   bytes=sum(os.path.getsize(path) for path in onts), **measurement)
+
+
+def git_commit():
+    """Returns the commit of the working tree, None outside of a git repository"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(records):
+    """Medians of the wall seconds per tier and stage
+
+    Args:
+        records (list): measurements
+
+    Returns:
+        dict: {tier: {stage: median seconds}}
+    """
+    seconds = {}
+    for record in records:
+        if record["ok"]:
+            seconds.setdefault(record["tier"], {}).setdefault(record["stage"], []).append(record["seconds"])
+    return {tier: {stage: statistics.median(values) for stage, values in stages.items()} for tier, stages in seconds.items()}
+
+
+def parse_tier(value):
+    """Parses a tier argument, either the name of a predefined tier or name:ontologies:classes:properties:axioms:imports"""
+    if value in TIERS:
+        return value, TIERS[value]
+    name, *sizes = value.split(":")
+    if len(sizes) != 5:
+        raise argparse.ArgumentTypeError("expected a tier name or name:ontologies:classes:properties:axioms:imports")
+    return name, tuple(int(size) for size in sizes)
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(prog='run_benchmark',
+                        description='Times the OntMeta stages on synthetic ontologies against local mock services')
+    parser.add_argument("-t", "--tiers", help="Size tiers, %s or name:ontologies:classes:properties:axioms:imports." % ", ".join(TIERS),
+                        type=parse_tier, nargs="+", default=[parse_tier("small"), parse_tier("medium")])
+    parser.add_argument("-r", "--repeat", help="Number of repetitions.", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Json lines file the measurements are appended to.", default="bench_results.jsonl")
+    parser.add_argument("-w", "--workdir", help="Directory for the ontologies and reports, a temporary one is used and removed if not given.")
+    parser.add_argument("-j", "--jobs", help="Worker processes of the directory analysis.", type=int, default=1)
+    parser.add_argument("-s", "--skip", help="Stages not to run.", nargs="+", default=[],
+                        choices=STAGES + AGGREGATORS + ["get_all_for_all_onts_in_dir"])
+    parser.add_argument("--latency", help="Mean response time of the mock services in seconds.", type=float, default=0.05)
+    parser.add_argument("--jitter", help="Spread of the response time of the mock services in seconds.", type=float, default=0.0)
+    parser.add_argument("--failure_rate", help="Share of the mock service requests answered with 503.", type=float, default=0.0)
+    parser.add_argument("--seed", help="Random seed of the ontologies and the mock services.", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ontmeta_bench_")
+    behaviours = {service: ServiceBehaviour(args.latency, args.jitter, args.failure_rate, args.seed + i)
+                  for i, service in enumerate(("oops", "foops", "fair"))}
+    services = MockServices(0, behaviours).start()
+    OntMeta.init()
+    OntMeta.configure(use_cache=False)
+    OntMeta.configure_client(endpoints=services.endpoints, rate={"oops": None, "foops": None, "fair": None},
+                             timeout=(10, 60), retries=5, backoff=0.05)
+    run = {"run": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "python": platform.python_version(),
+           "platform": platform.platform(), "tiers": dict(args.tiers), "repeat": args.repeat, "jobs": args.jobs,
+           "latency": args.latency, "jitter": args.jitter, "failure_rate": args.failure_rate, "seed": args.seed}
+    records = []
+    try:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps({"type": "run", **run}) + "\n")
+            for tier, (count, classes, properties, axioms, imports) in args.tiers:
+                corpus = os.path.join(workdir, "corpus", tier)
+                onts = generate_corpus(corpus, count, classes, properties, axioms, imports, seed=args.seed)
+                owlready2.onto_path.append(os.path.join(corpus, "imports"))
+                for repeat in range(args.repeat):
+                    for record in bench_tier(tier, onts, os.path.join(workdir, "analysis"), repeat, args.skip, args.jobs):
+                        record = {"type": "measurement", "run": run["run"], **record}
+                        records.append(record)
+                        f.write(json.dumps(record) + "\n")
+                        f.flush()
+                owlready2.onto_path.remove(os.path.join(corpus, "imports"))
+            f.write(json.dumps({"type": "summary", "run": run["run"], "median_seconds": summarize(records), "services": services.stats()}) + "\n")
+    finally:
+        services.stop()
+        OntMeta.configure_client()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    for tier, stages in summarize(records).items():
+        print(tier)
+        for stage, seconds in stages.items():
+            print("  %-32s %10.4f s" % (stage, seconds))
+    failed = [record for record in records if not record["ok"]]
+    if failed:
+        print("%d measurements failed, see %s" % (len(failed), args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Shared fixtures of the OntMeta tests"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import threading
+import time
+import sys
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import OntMeta
+
+
+class StubServer:
+    """Local HTTP server answering every request with the next of a list of (status, body) replies, the last
+    reply is repeated. A body given as a list is sent in chunks, pause seconds apart. peak is the largest number of
+    requests that were answered at the same time
+
+    Args:
+        replies (list): (status, body) pairs
+        pause (float): seconds between two chunks of a chunked body
+    """
+
+    def __init__(self, replies=((200, b"ok"),), pause=0.0):
+        self.replies = list(replies)
+        self.pause = pause
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.url = "http://127.0.0.1:%d/" % self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub.lock:
+                    stub.requests.append((self.command, self.path, body))
+                    status, payload = stub.replies[min(len(stub.requests), len(stub.replies)) - 1]
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    self.send(status, payload)
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+
+            def send(self, status, payload):
+                self.send_response(status)
+                if isinstance(payload, list):
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for chunk in payload:
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        self.wfile.flush()
+                        time.sleep(stub.pause)
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+
+            do_GET = do_POST = do_HEAD = reply
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    """Starts stub servers, StubServer arguments are passed to the returned factory"""
+    servers = []
+
+    def start(*args, **kwargs):
+        servers.append(StubServer(*args, **kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    """Points OntMeta to a fresh output directory with a result cache and restores the settings afterwards"""
+    settings = {name: getattr(OntMeta, variable) for name, variable in OntMeta.SETTINGS.items()}
+    directory = str(tmp_path / "analysis") + os.path.sep
+    OntMeta.configure(output_dir=directory, use_cache=True)
+    yield directory
+    OntMeta.configure(**settings)
+    for store in (OntMeta._cache, OntMeta._index):
+        if store is not None:
+            store.close()
+    OntMeta._cache = None
+    OntMeta._index = None
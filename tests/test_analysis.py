@@ -0,0 +1,79 @@
+"""Stages of the analysis of one ontology and of a directory"""
+import json
+import os
+
+import owlready2
+import pytest
+
+import OntMeta
+
+SMALL = """@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.org/small#> .
+<http://example.org/small> a owl:Ontology .
+ex:A a owl:Class .
+ex:B a owl:Class ; rdfs:subClassOf ex:A .
+"""
+
+
+@pytest.fixture
+def small(tmp_path):
+    path = str(tmp_path / "small.ttl")
+    with open(path, 'w') as f:
+        f.write(SMALL)
+    return path
+
+
+def test_too_small_sample_is_recorded(small, output_dir):
+    ctx = OntMeta.OntologyContext(small, owlready2.World())
+    OntMeta.get_random_classes_fair_foops(5, small, False, ctx)
+    assert ctx.status["classes"] == {"status": "failed", "error": "Sample larger than population or is negative"}
+    ctx.close()
+
+
+def test_structure_runs_after_a_failed_stage(small, output_dir, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError("failed stage")
+
+    monkeypatch.setattr(OntMeta, "REASONING", False)
+    monkeypatch.setattr(OntMeta, "get_oops_pitfalls", lambda *args: None)
+    monkeypatch.setattr(OntMeta, "get_random_classes_fair_foops", fail)
+    result = OntMeta.analyze_ontology(small)
+    assert result["error"] == "failed stage"
+    assert result["status"]["structure"]["status"] == "done"
+    ontname, ontpath, path = OntMeta.name_path_ontpath(ontology_dir=small, filename="_structure.json")
+    with open(ontpath) as f:
+        assert json.load(f)["classes"] == 2
+
+
+def test_sequential_run_records_a_failed_ontology(tmp_path, output_dir, monkeypatch):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for name in ("a.ttl", "b.ttl"):
+        (corpus / name).write_text(SMALL)
+
+    def analyze(path):
+        if path.endswith("a.ttl"):
+            raise FileNotFoundError(path)
+        return {"ontology": path, "stages": {}, "error": None, "remote_errors": [], "reasoner": None, "status": {}}
+
+    monkeypatch.setattr(OntMeta, "analyze_ontology", analyze)
+    OntMeta.get_all_for_all_onts_in_dir(str(corpus))
+    with open(output_dir + "analysis_results.jsonl") as f:
+        results = {os.path.basename(result["ontology"]): result for result in map(json.loads, f)}
+    assert results["a.ttl"]["error"] and results["b.ttl"]["error"] is None
+
+
+def test_reasoner_outcome_of_an_ontology_that_does_not_load(tmp_path, output_dir):
+    path = str(tmp_path / "broken.owl")
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0"?>\n<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"><rdf:Description')
+    ctx = OntMeta.OntologyContext(path, owlready2.World())
+    pending = []
+    assert OntMeta.run_reasoner(path, ctx, pending) is None
+    outcome = pending[0].result()
+    assert outcome["status"] == "error"
+    ontname, ontpath, directory = OntMeta.name_path_ontpath(ontology_dir=path, filename="_reasoner.json")
+    with open(ontpath) as f:
+        assert json.load(f) == outcome
+    ctx.close()
@@ -0,0 +1,105 @@
+"""ResultCache hits, invalidation by content and analysis version, eviction and the parses of the analysis context"""
+import os
+
+import owlready2
+from rdflib import Graph
+
+import OntMeta
+from generate_ontology import generate_ontology
+
+
+def test_results_are_cached_by_content(tmp_path):
+    cache = OntMeta.ResultCache(str(tmp_path / "cache" / "results.sqlite"))
+    path = str(tmp_path / "onto.ttl")
+    generate_ontology(path, 10, 3, 2)
+    ctx = OntMeta.OntologyContext(path, cache=cache)
+    ctx.store("used_onts", [["owl", "http://www.w3.org/2002/07/owl#"]])
+    assert OntMeta.OntologyContext(path, cache=cache).cached("used_onts") == [["owl", "http://www.w3.org/2002/07/owl#"]]
+    assert OntMeta.OntologyContext(path, cache=cache).cached("oops") is None
+    # a copy with the same content hits the same entry
+    copy = str(tmp_path / "copy.ttl")
+    with open(path, 'rb') as src, open(copy, 'wb') as dst:
+        dst.write(src.read())
+    assert OntMeta.OntologyContext(copy, cache=cache).cached("used_onts") is not None
+    cache.close()
+
+
+def test_changed_content_misses(tmp_path):
+    cache = OntMeta.ResultCache(str(tmp_path / "cache" / "results.sqlite"))
+    path = str(tmp_path / "onto.ttl")
+    generate_ontology(path, 10, 3, 2)
+    OntMeta.OntologyContext(path, cache=cache).store("used_onts", [])
+    with open(path, 'a') as f:
+        f.write("\n# changed\n")
+    # the size changes, so the file is hashed again
+    assert OntMeta.OntologyContext(path, cache=cache).cached("used_onts") is None
+    cache.close()
+
+
+def test_analysis_version_invalidates_and_evicts(tmp_path, monkeypatch):
+    cache = OntMeta.ResultCache(str(tmp_path / "cache" / "results.sqlite"))
+    cache.put("abc", "oops", "report")
+    os.makedirs(cache.conversions)
+    with open(cache.conversion("abc"), 'w') as f:
+        f.write("")
+    assert cache.get("abc", "oops") == "report"
+    monkeypatch.setattr(OntMeta, "ANALYSIS_VERSION", OntMeta.ANALYSIS_VERSION + "-next")
+    assert cache.get("abc", "oops") is None
+    assert cache.evict() == 1
+    assert not os.path.exists(cache.conversion("abc"))
+    cache.close()
+
+
+def test_eviction_keeps_the_most_recently_used(tmp_path):
+    cache = OntMeta.ResultCache(str(tmp_path / "cache" / "results.sqlite"), max_entries=2)
+    for digest in ("a", "b", "c"):
+        cache.put(digest, "oops", digest)
+    cache.get("a", "oops")
+    assert cache.evict() == 1
+    assert cache.get("b", "oops") is None
+    assert cache.get("a", "oops") == "a" and cache.get("c", "oops") == "c"
+    cache.close()
+
+
+def test_stage_reads_the_cache(tmp_path, output_dir):
+    path = str(tmp_path / "onto.ttl")
+    generate_ontology(path, 10, 3, 2)
+    first = OntMeta.OntologyContext(path, cache=OntMeta.get_cache())
+    OntMeta.get_used_onts(path, first)
+    assert first.consumed["used_onts"] == "rdflib.Graph"
+    second = OntMeta.OntologyContext(path, cache=OntMeta.get_cache())
+    OntMeta.get_used_onts(path, second)
+    assert second.consumed["used_onts"] == "cache"
+    assert second.parses == 0
+    first.close()
+    second.close()
+
+
+def test_stream_collects_the_hierarchy_only_for_the_structure_stage(tmp_path, output_dir):
+    path = str(tmp_path / "onto.ttl")
+    generate_ontology(path, 10, 3, 2)
+    first = OntMeta.OntologyContext(path, cache=OntMeta.get_cache(), stream_sample=5)
+    assert "hierarchy" in first.streamed("used_onts")
+    OntMeta.get_class_structure(path, first)
+    second = OntMeta.OntologyContext(path, cache=OntMeta.get_cache(), stream_sample=5)
+    assert "hierarchy" not in second.streamed("used_onts")
+    OntMeta.get_class_structure(path, second)
+    assert second.consumed["structure"] == "cache"
+    first.close()
+    second.close()
+
+
+def test_files_loaded_by_owlready2_are_parsed_once(tmp_path, output_dir):
+    for extension, parses, namespaces in (("owl", 1, "stream_namespaces"), ("nt", 1, "stream_namespaces"), ("ttl", 2, "rdflib.Graph")):
+        path = str(tmp_path / ("onto." + extension))
+        if extension == "nt":
+            generate_ontology(str(tmp_path / "source.ttl"), 10, 3, 2)
+            Graph().parse(str(tmp_path / "source.ttl")).serialize(path, format="nt", encoding="utf-8")
+        else:
+            generate_ontology(path, 10, 3, 2)
+        ctx = OntMeta.OntologyContext(path, owlready2.World())
+        OntMeta.get_used_onts(path, ctx)
+        ctx.use("random_classes", "onto")
+        # Turtle is parsed with rdflib and loaded into owlready2 from its N-Triples conversion
+        assert (ctx.parses, ctx.consumed["used_onts"]) == (parses, namespaces)
+        ctx.close()
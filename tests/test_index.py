@@ -0,0 +1,76 @@
+"""Results index: report keys, directory selection and aggregations"""
+import json
+import os
+import shutil
+
+import OntMeta
+
+OOPS = "Pitfall P08 ... Importance: Minor\nPitfall P10 ... Importance: Important\nPitfall P13 ... Importance: Minor\n"
+
+
+def write_reports(dir, ontologies):
+    for ontology in ontologies:
+        os.makedirs(os.path.join(dir, ontology))
+        with open(os.path.join(dir, ontology, ontology + "_OOPS.txt"), 'w') as f:
+            f.write(OOPS)
+        with open(os.path.join(dir, ontology, ontology + "_FOOPS.json"), 'w') as f:
+            json.dump({"ontology_URI": "http://example.org/" + ontology, "overall_score": 0.5}, f)
+        with open(os.path.join(dir, ontology, ontology + "_Fair_Checker.json"), 'w') as f:
+            json.dump([{"mean": {"F": 1.0, "A": 0.5, "I": 0.5, "R": 1.0}}], f)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_moved_output_directory_keeps_its_index(tmp_path):
+    dir = str(tmp_path / "out")
+    write_reports(dir, ["a", "b"])
+    paths = OntMeta.aggregate(dir, ["oops", "fair_foops"])
+    before = {kind: read(path) for kind, path in paths.items()}
+    assert "Minor---4" in before["oops"]
+    moved = str(tmp_path / "moved")
+    shutil.move(dir, moved)
+    paths = OntMeta.aggregate(moved, ["oops", "fair_foops"])
+    assert {kind: read(path) for kind, path in paths.items()} == before
+
+
+def test_select_is_limited_to_the_directory(tmp_path):
+    dir = str(tmp_path / "out")
+    write_reports(dir, ["a", "ab"])
+    index = OntMeta.open_index(dir)
+    select = "SELECT DISTINCT ontology FROM oops_pitfalls WHERE report >= ?1 AND report < ?1 || x'ff'"
+    assert index.select(select, os.path.join(dir, "a")) == [("a",)]
+    assert sorted(index.select(select, dir)) == [("a",), ("ab",)]
+    plan = index.conn.execute("EXPLAIN QUERY PLAN " + select, ("a/",)).fetchall()
+    assert any("USING INDEX oops_pitfalls_report" in row[-1] for row in plan)
+    index.close()
+
+
+def test_aggregations_are_no_reports(tmp_path):
+    files = {"Sum_Classes_Properties.txt": "Classes:3\n", "aSum_OOPS_Pitfalls.txt": "namespace --- iri OOPS:2\n",
+             "Mean_FAIR_FOOPS.json": "{}", "Corpus_Distributions.json": "{}", "a.txt": "Classes:3\n", "a_OOPS.txt": OOPS}
+    for name, content in files.items():
+        with open(str(tmp_path / name), 'w') as f:
+            f.write(content)
+    kinds = {name: OntMeta.report_kind(str(tmp_path / name)) for name in files}
+    assert kinds == {"Sum_Classes_Properties.txt": None, "aSum_OOPS_Pitfalls.txt": None, "Mean_FAIR_FOOPS.json": None,
+                     "Corpus_Distributions.json": None, "a.txt": "classes", "a_OOPS.txt": "oops"}
+
+
+def test_removed_reports_leave_the_index(tmp_path, output_dir):
+    ontology = str(tmp_path / "onto.ttl")
+    ontpath = OntMeta.name_path_ontpath(ontology_dir=ontology, filename="_FOOPS.json")[1]
+    os.makedirs(os.path.dirname(ontpath), exist_ok=True)
+    result = {"ontology_URI": "http://example.org/onto", "overall_score": 0.5}
+    with open(ontpath, 'w') as f:
+        json.dump(result, f)
+    index = OntMeta.get_index()
+    index.add("foops", ontpath, result)
+    select = "SELECT COUNT(*) FROM foops_scores WHERE report >= ?1 AND report < ?1 || x'ff'"
+    assert index.select(select, output_dir) == [(1,)]
+    OntMeta.remove_reports(ontology, ["foops", "fair"])
+    assert not os.path.exists(ontpath)
+    assert index.select(select, output_dir) == [(0,)]
+    assert index.select("SELECT COUNT(*) FROM reports WHERE path >= ?1 AND path < ?1 || x'ff'", output_dir) == [(0,)]
@@ -0,0 +1,57 @@
+"""Job manifest: resuming finished analyses only for the stages and settings they ran with"""
+import sqlite3
+
+import OntMeta
+
+
+def finish(manifest, path, status="done"):
+    manifest.start(path)
+    manifest.finish({"ontology": path, "error": None, "status": {kind: {"status": status, "error": None}
+                                                                   for kind in OntMeta.analysis_stages()}})
+
+
+def test_changed_settings_are_not_finished(tmp_path, monkeypatch):
+    monkeypatch.setattr(OntMeta, "REASONING", False)
+    path = str(tmp_path / "onto.ttl")
+    (tmp_path / "onto.ttl").write_text("")
+    manifest = OntMeta.JobManifest(str(tmp_path / "manifest.sqlite"))
+    finish(manifest, path)
+    assert list(manifest.plan([path])) == [path]
+    assert list(manifest.finished()) == [path]
+    assert "reasoner" not in manifest.get(path)["settings"]["stages"]
+    monkeypatch.setattr(OntMeta, "REASONING", True)
+    assert manifest.plan([path]) == {} and manifest.finished() == {}
+    assert manifest.unfinished(path) == list(OntMeta.ResultsIndex.SUFFIXES)
+    monkeypatch.setattr(OntMeta, "REASONING", False)
+    assert list(manifest.plan([path])) == [path]
+    assert "used_onts" not in manifest.unfinished(path)
+    manifest.close()
+
+
+def test_manifests_without_settings_are_analyzed_again(tmp_path):
+    path = str(tmp_path / "onto.ttl")
+    (tmp_path / "onto.ttl").write_text("")
+    conn = sqlite3.connect(str(tmp_path / "manifest.sqlite"))
+    conn.execute("CREATE TABLE ontologies (ontology TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, status TEXT, result TEXT, updated REAL)")
+    conn.execute("INSERT INTO ontologies VALUES (?, ?, ?, 'done', '{}', 0)", (path,) + OntMeta.JobManifest.signature(path))
+    conn.commit()
+    conn.close()
+    manifest = OntMeta.JobManifest(str(tmp_path / "manifest.sqlite"))
+    assert manifest.plan([path]) == {}
+    finish(manifest, path)
+    assert list(manifest.plan([path])) == [path]
+    manifest.close()
+
+
+def test_failed_analyses_are_resumed(tmp_path):
+    paths = [str(tmp_path / name) for name in ("done.ttl", "failed.ttl", "running.ttl")]
+    for path in paths:
+        with open(path, 'w') as f:
+            f.write("")
+    manifest = OntMeta.JobManifest(str(tmp_path / "manifest.sqlite"))
+    finish(manifest, paths[0])
+    finish(manifest, paths[1], "failed")
+    manifest.start(paths[2])
+    assert list(manifest.plan(paths)) == [paths[0]]
+    assert manifest.unfinished(paths[1]) == list(OntMeta.ResultsIndex.SUFFIXES)
+    manifest.close()
@@ -0,0 +1,150 @@
+"""RemoteClient and RateLimiter against local stub servers"""
+import socket
+import time
+
+import pytest
+import requests
+
+import OntMeta
+
+
+def client_for(server, **kwargs):
+    kwargs.setdefault("rate", {"oops": None, "foops": None, "fair": None})
+    return OntMeta.RemoteClient(endpoints={"oops": server.url if server else "http://127.0.0.1:9/"}, **kwargs)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_overload_responses_are_retried(stub):
+    server = stub([(503, b""), (503, b""), (200, b"done")])
+    client = client_for(server, retries=3, backoff=0.01)
+    with client.request("oops", "POST", server.url, data=b"x") as reply:
+        assert reply.text == "done"
+    assert len(server.requests) == 3
+    client.close()
+
+
+def test_retries_are_capped(stub):
+    server = stub([(503, b"")])
+    client = client_for(server, retries=2, backoff=0.01)
+    with pytest.raises(requests.HTTPError):
+        client.request("oops", "GET", server.url)
+    assert len(server.requests) == 3
+    client.close()
+
+
+def test_client_errors_are_not_retried(stub):
+    server = stub([(404, b"")])
+    client = client_for(server, retries=4, backoff=0.01)
+    with pytest.raises(requests.HTTPError):
+        client.request("oops", "GET", server.url)
+    assert len(server.requests) == 1
+    client.close()
+
+
+def test_backoff_doubles_up_to_the_maximum(stub, monkeypatch):
+    server = stub([(503, b"")])
+    client = client_for(server, retries=4, backoff=1.0, max_backoff=3.0)
+    sleeps = []
+    monkeypatch.setattr(OntMeta.time, "sleep", sleeps.append)
+    with pytest.raises(requests.HTTPError):
+        client.request("oops", "GET", server.url)
+    # jitter draws every delay from the upper half of the backoff
+    for delay, backoff in zip(sleeps, [1, 2, 3, 3]):
+        assert backoff / 2 <= delay <= backoff
+    assert len(sleeps) == 4
+    client.close()
+
+
+def test_connection_errors_are_retried(monkeypatch):
+    client = OntMeta.RemoteClient(endpoints={"oops": "http://127.0.0.1:%d/" % free_port()}, rate={"oops": None},
+                                  retries=2, backoff=0.01, timeout=(1, 1))
+    sleeps = []
+    monkeypatch.setattr(OntMeta.time, "sleep", sleeps.append)
+    with pytest.raises(requests.ConnectionError):
+        client.request("oops", "GET", client.endpoints["oops"])
+    assert len(sleeps) == 2
+    client.close()
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = OntMeta.RateLimiter(20)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    # the first request uses the burst, the other four wait 1/20 s each
+    assert time.monotonic() - start >= 0.18
+
+
+def test_unlimited_rate_does_not_wait():
+    limiter = OntMeta.RateLimiter(None)
+    start = time.monotonic()
+    for _ in range(1000):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+def test_client_applies_service_rate(stub):
+    server = stub()
+    client = client_for(server, rate={"oops": 10})
+    start = time.monotonic()
+    for _ in range(3):
+        client.request("oops", "GET", server.url).close()
+    assert time.monotonic() - start >= 0.18
+    client.close()
+
+
+def test_streamed_body_keeps_its_concurrency_slot(stub):
+    server = stub([(200, [b"a" * 10, b"b" * 10])], pause=0.05)
+    client = client_for(server, concurrency={"oops": 1})
+    slot = client.semaphores["oops"]
+    with client.request("oops", "POST", server.url, data=b"x", stream=True) as reply:
+        assert not slot.acquire(blocking=False)
+        assert reply.raw.read() == b"a" * 10 + b"b" * 10
+    assert slot.acquire(blocking=False)
+    slot.release()
+    # closing twice releases once
+    reply.close()
+    with pytest.raises(ValueError):
+        slot.release()
+    client.close()
+
+
+def test_buffered_response_releases_its_slot(stub):
+    server = stub()
+    client = client_for(server, concurrency={"oops": 1})
+    reply = client.request("oops", "GET", server.url)
+    assert client.semaphores["oops"].acquire(blocking=False)
+    client.semaphores["oops"].release()
+    reply.close()
+    client.close()
+
+
+def test_failed_streamed_response_releases_its_slot(stub):
+    server = stub([(404, b"missing")])
+    client = client_for(server, concurrency={"oops": 1})
+    with pytest.raises(requests.HTTPError):
+        client.request("oops", "GET", server.url, stream=True)
+    assert client.semaphores["oops"].acquire(blocking=False)
+    client.semaphores["oops"].release()
+    client.close()
+
+
+def fetch(url):
+    return OntMeta.get_client().request("oops", "GET", url).status_code
+
+
+def test_worker_processes_share_the_concurrency_limit(stub, output_dir):
+    server = stub([(200, [b"a", b"b", b"c"])], pause=0.05)
+    OntMeta.configure_client(endpoints={"oops": server.url}, concurrency={"oops": 2}, rate={"oops": None})
+    executor = OntMeta.worker_pool(4)
+    try:
+        assert list(executor.map(fetch, [server.url] * 12)) == [200] * 12
+    finally:
+        executor.shutdown()
+        OntMeta.configure_client()
+    assert server.peak == 2
@@ -0,0 +1,46 @@
+"""Report files: atomic writes"""
+import os
+import stat
+
+import pytest
+
+import OntMeta
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_atomic_write_uses_the_umask(tmp_path):
+    path = str(tmp_path / "report.txt")
+    with OntMeta.atomic_write(path) as f:
+        f.write("Classes:1\n")
+    assert mode(path) == 0o666 & ~OntMeta.file_umask()
+    previous = os.umask(0)
+    os.umask(previous)
+    assert OntMeta.file_umask() == previous
+
+
+def test_atomic_write_keeps_the_mode_of_the_target(tmp_path):
+    path = str(tmp_path / "report.txt")
+    with open(path, 'w') as f:
+        f.write("old")
+    os.chmod(path, 0o640)
+    with OntMeta.atomic_write(path) as f:
+        f.write("new")
+    assert mode(path) == 0o640
+    with open(path) as f:
+        assert f.read() == "new"
+
+
+def test_atomic_write_leaves_the_target_on_error(tmp_path):
+    path = str(tmp_path / "report.txt")
+    with open(path, 'w') as f:
+        f.write("old")
+    with pytest.raises(RuntimeError):
+        with OntMeta.atomic_write(path) as f:
+            f.write("partial")
+            raise RuntimeError()
+    with open(path) as f:
+        assert f.read() == "old"
+    assert os.listdir(str(tmp_path)) == ["report.txt"]
@@ -0,0 +1,25 @@
+"""Serve mode: the HTTP interface of the analysis service"""
+import requests
+
+import OntMeta
+
+
+def test_analyze_reply_keeps_the_queue_length(output_dir, tmp_path):
+    watched = tmp_path / "watched"
+    watched.mkdir()
+    for name in ("a.ttl", "b.ttl"):
+        (watched / name).write_text("@prefix ex: <http://example.org/> .\nex:A a <http://www.w3.org/2002/07/owl#Class> .\n")
+    service = OntMeta.AnalysisService([str(watched)], port=0)
+    host, port = service.serve()[:2]
+    try:
+        url = "http://%s:%d/analyze" % (host, port)
+        first = requests.post(url, json={"path": str(watched / "a.ttl")}).json()
+        assert first["submitted"] is True and first["queued"] == 1
+        second = requests.post(url, json={"path": str(watched / "b.ttl")}).json()
+        assert second["submitted"] is True and second["queued"] == 2
+        again = requests.post(url, json={"path": str(watched / "a.ttl")}).json()
+        assert again["submitted"] is False and again["queued"] == 2
+        assert requests.post(url, json={"path": str(watched / "c.ttl")}).status_code == 404
+    finally:
+        service.server.shutdown()
+        service.server.server_close()
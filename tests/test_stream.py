@@ -0,0 +1,123 @@
+"""The streaming extractor gives the namespaces and declaration counts of the parsed representations"""
+import pytest
+import owlready2
+from rdflib import Graph
+
+import OntMeta
+from generate_ontology import generate_ontology
+
+
+def parsed(path):
+    """Namespaces of the rdflib graph and declaration counts of the owlready2 ontology"""
+    g = Graph(bind_namespaces='none')
+    g.parse(path)
+    namespaces = sorted((prefix, str(iri)) for prefix, iri in g.namespace_manager.namespaces())
+    world = owlready2.World()
+    ctx = OntMeta.OntologyContext(path, world)
+    onto = ctx.onto
+    counts = {"classes": len(list(onto.classes())), "annotation_properties": len(list(onto.annotation_properties())),
+              "data_properties": len(list(onto.data_properties())), "object_properties": len(list(onto.object_properties()))}
+    ctx.close()
+    return namespaces, counts
+
+
+def streamed(path, n=5):
+    summary = OntMeta.stream_ontology(path, n)
+    return sorted(map(tuple, summary["namespaces"])), {key: summary[key] for key in
+                                                       ("classes", "annotation_properties", "data_properties", "object_properties")}
+
+
+@pytest.mark.parametrize("extension", ["ttl", "owl"])
+def test_generated_ontologies_match(tmp_path, extension):
+    path = str(tmp_path / ("onto." + extension))
+    generate_ontology(path, 120, 12, 40)
+    namespaces, counts = parsed(path)
+    stream_namespaces, stream_counts = streamed(path)
+    assert stream_counts == counts
+    assert stream_namespaces == namespaces
+    if extension == "owl":
+        assert sorted(OntMeta.stream_namespaces(path)) == namespaces
+
+
+def test_sample_is_drawn_from_the_classes(tmp_path):
+    path = str(tmp_path / "onto.ttl")
+    generate_ontology(path, 30, 3, 0)
+    summary = OntMeta.stream_ontology(path, 5)
+    assert len(summary["sample"]) == 5
+    assert all(name.startswith("onto.C") for name, comment in summary["sample"])
+    assert len(OntMeta.stream_ontology(path, 50)["sample"]) == 30
+
+
+def write(tmp_path, name, content):
+    path = str(tmp_path / name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+def test_base_before_prefixes_keeps_the_fragment(tmp_path):
+    # rdflib's serializer writes @base before the prefixes, absolute namespaces must keep their empty fragment
+    path = write(tmp_path, "based.ttl", """@base <http://ex.org/base/> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <#> .
+<A> a owl:Class .
+ex:B a owl:Class ; rdfs:subClassOf <A> .
+<http://ex.org/other#C> a owl:Class .
+""")
+    namespaces, counts = parsed(path)
+    stream_namespaces, stream_counts = streamed(path)
+    assert stream_counts == counts == {"classes": 3, "annotation_properties": 0, "data_properties": 0, "object_properties": 0}
+    assert stream_namespaces == namespaces
+    assert ("ex", "http://ex.org/base/#") in stream_namespaces
+
+
+def test_repeated_declarations_are_counted_once(tmp_path):
+    classes = "".join("ex:C%d a owl:Class .\n" % i for i in range(6))
+    path = write(tmp_path, "repeated.ttl", """@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix ex: <http://ex.org/> .
+%sex:C0 a owl:Class .
+ex:C1 a owl:Class .
+ex:p a owl:ObjectProperty .
+ex:p a owl:ObjectProperty .
+""" % classes)
+    namespaces, counts = parsed(path)
+    assert streamed(path)[1] == counts == {"classes": 6, "annotation_properties": 0, "data_properties": 0, "object_properties": 1}
+    # a repeated declaration never replaces a sampled class that was replaced already
+    for seed in range(20):
+        OntMeta.random.seed(seed)
+        summary = OntMeta.stream_ontology(path, 2)
+        assert len({name for name, comment in summary["sample"]}) == 2
+
+
+def test_rdfxml_namespaces_are_bound_like_rdflib(tmp_path):
+    path = write(tmp_path, "nested.owl", """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:owl="http://www.w3.org/2002/07/owl#"
+         xmlns:ex="http://ex.org/">
+  <owl:Class rdf:about="http://ex.org/A" xmlns:ex="http://ex.org/"/>
+  <owl:Class rdf:about="http://ex.org/B" xmlns:ex="http://ex.org/"/>
+  <owl:Class rdf:about="http://other.org/C" xmlns:ex="http://other.org/"/>
+  <owl:Class rdf:about="http://third.org/D" xmlns:ex="http://third.org/" xmlns:th="http://third.org/"/>
+  <owl:Class rdf:about="http://ex.org/E" xmlns:owl2="http://www.w3.org/2002/07/owl#"/>
+</rdf:RDF>
+""")
+    namespaces, counts = parsed(path)
+    stream_namespaces, stream_counts = streamed(path)
+    assert stream_counts == counts
+    assert stream_namespaces == namespaces
+    assert ("ex1", "http://other.org/") in stream_namespaces
+    # the namespaces of a file that owlready2 loads directly come from its namespace declarations only
+    assert sorted(OntMeta.stream_namespaces(path)) == namespaces
+
+
+def test_turtle_prefix_redefinitions_are_bound_like_rdflib(tmp_path):
+    path = write(tmp_path, "redefined.ttl", """@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix ex: <http://ex.org/> .
+@prefix ex2: <http://ex.org/> .
+ex:A a owl:Class .
+@prefix ex: <http://other.org/> .
+ex:B a owl:Class .
+@prefix : <http://default.org/> .
+:C a owl:Class .
+""")
+    assert streamed(path)[0] == parsed(path)[0]